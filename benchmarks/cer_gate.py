@@ -0,0 +1,55 @@
+# benchmarks/cer_gate.py
+"""
+Full CER vs. bounded-distance CER gating on long, noisy transcripts.
+
+The full path is wer.char_error_rate, which runs a complete Levenshtein
+distance for every pair. The gate is wer.cer_gate, which stops each pair
+once it exceeds the cutoff. Passing pairs must get the same CER from both.
+
+    PYTHONPATH=src python benchmarks/cer_gate.py --n 20000 --max-cer 0.1
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from evaluators.wer import cer_gate, char_error_rate
+
+ALPHABET = "abcdefghijklmnopqrstuvwxyz     "
+
+
+def synth(n: int, seed: int = 0):
+    rng = random.Random(seed)
+    refs, preds = [], []
+    for _ in range(n):
+        ref = "".join(rng.choice(ALPHABET) for _ in range(rng.randint(300, 3000)))
+        noise = rng.choice([0.02, 0.05, 0.3, 0.6])  # mostly fine, some garbage
+        refs.append(ref)
+        preds.append("".join(rng.choice(ALPHABET) if rng.random() < noise else c for c in ref))
+    return refs, preds
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--n", type=int, default=20_000)
+    parser.add_argument("--max-cer", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    refs, preds = synth(args.n, args.seed)
+
+    t0 = time.perf_counter()
+    _, full = char_error_rate(refs, preds)
+    t_full = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    gate = cer_gate(refs, preds, args.max_cer)
+    t_gate = time.perf_counter() - t0
+
+    for exact, gated in zip(full, gate.cer_scores):
+        assert gated == (exact if exact <= args.max_cer else None)
+    print(f"full distance: {t_full:.2f}s")
+    print(f"bounded gate:  {t_gate:.2f}s  ({gate.passed}/{args.n} pass at CER <= {args.max_cer})")
+    print(f"identical verdicts; speedup {t_full / t_gate:.1f}x")
@@ -0,0 +1,92 @@
+# benchmarks/wer_alignment.py
+"""
+Old vs. single-pass WER/CER scoring on synthetic utterances.
+
+The old path is what evaluate_stt used to do: jiwer.wer per pair,
+Levenshtein.distance per pair in char_error_rate, and one more corpus-wide
+JiWER alignment for S/D/I. The new path is wer.score_pairs, and with
+--processes the same engine runs chunked in a process pool
+(wer.score_pairs_parallel). All paths must produce identical numbers.
+
+    PYTHONPATH=src python benchmarks/wer_alignment.py --n 1000000 --processes 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+import jiwer
+
+from evaluators.wer import char_error_rate, score_pairs, score_pairs_parallel
+
+VOCAB = [
+    "the", "patient", "reports", "pain", "in", "left", "knee", "since", "monday",
+    "prescribed", "ibuprofen", "twice", "daily", "follow", "up", "two", "weeks",
+]
+
+
+def synth(n: int, seed: int = 0):
+    rng = random.Random(seed)
+    refs, preds = [], []
+    for _ in range(n):
+        ref = [rng.choice(VOCAB) for _ in range(rng.randint(4, 24))]
+        pred = []
+        for w in ref:
+            roll = rng.random()
+            if roll < 0.05:
+                continue  # deletion
+            pred.append(rng.choice(VOCAB) if roll < 0.12 else w)
+            if roll > 0.97:
+                pred.append(rng.choice(VOCAB))  # insertion
+        refs.append(" ".join(ref))
+        preds.append(" ".join(pred))
+    return refs, preds
+
+
+def old_path(refs, preds):
+    wer_scores = [jiwer.wer([r], [p]) for r, p in zip(refs, preds)]
+    avg_cer, cer_scores = char_error_rate(refs, preds)
+    m = jiwer.process_words(refs, preds)
+    return wer_scores, cer_scores, (m.hits, m.substitutions, m.deletions, m.insertions), avg_cer
+
+
+def new_path(refs, preds):
+    wer_scores, cer_scores, t = score_pairs(refs, preds)
+    return wer_scores, cer_scores, (t.hits, t.substitutions, t.deletions, t.insertions), t.cer
+
+
+def parallel_path(refs, preds, processes):
+    wer_scores, cer_scores, t = score_pairs_parallel(refs, preds, processes=processes)
+    return wer_scores, cer_scores, (t.hits, t.substitutions, t.deletions, t.insertions), t.cer
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--n", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--processes", type=int, help="Also time the process-pool path")
+    parser.add_argument("--skip-old", action="store_true", help="Skip the slow jiwer-per-pair path")
+    args = parser.parse_args()
+
+    refs, preds = synth(args.n, args.seed)
+    paths = [("new", new_path)]
+    if not args.skip_old:
+        paths.insert(0, ("old", old_path))
+    if args.processes:
+        paths.append((f"parallel x{args.processes}", lambda r, p: parallel_path(r, p, args.processes)))
+
+    timings = {}
+    outputs = {}
+    for name, fn in paths:
+        t0 = time.perf_counter()
+        outputs[name] = fn(refs, preds)
+        timings[name] = time.perf_counter() - t0
+        print(f"{name}: {timings[name]:.2f}s ({args.n / timings[name]:,.0f} utt/s)")
+
+    first = next(iter(outputs.values()))
+    assert all(out == first for out in outputs.values()), "scoring paths disagree"
+    print("identical results")
+    for name in timings:
+        print(f"  {name}: {timings[paths[0][0]] / timings[name]:.1f}x vs {paths[0][0]}")
@@ -0,0 +1,55 @@
+# benchmarks/wer_incremental.py
+"""
+Full scoring vs. an incremental re-run where a fraction of predictions changed.
+
+The first ScoreStore run aligns every pair and saves the dataset snapshot.
+The re-run changes `--changed` of the predictions and should only align
+those; its result must equal a fresh wer.score_pairs.
+
+    PYTHONPATH=src python benchmarks/wer_incremental.py --n 1000000 --changed 0.05
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from wer_alignment import VOCAB, synth
+
+from evaluators.wer import score_pairs
+from evaluators.wer_store import ScoreStore
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--n", type=int, default=1_000_000)
+    parser.add_argument("--changed", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    refs, preds = synth(args.n, args.seed)
+    rng = random.Random(args.seed + 1)
+
+    with tempfile.TemporaryDirectory() as tmp, ScoreStore(Path(tmp) / "scores.sqlite") as store:
+        t0 = time.perf_counter()
+        baseline = score_pairs(refs, preds)
+        t_plain = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        assert store.score(refs, preds, dataset="bench") == baseline
+        t_first = time.perf_counter() - t0
+
+        updated = list(preds)
+        for i in rng.sample(range(args.n), int(args.n * args.changed)):
+            updated[i] = updated[i] + " " + rng.choice(VOCAB)
+        t0 = time.perf_counter()
+        result = store.score(refs, updated, dataset="bench")
+        t_rerun = time.perf_counter() - t0
+
+        assert result == score_pairs(refs, updated), "incremental result differs from a full run"
+        print(f"score_pairs (no store): {t_plain:.2f}s")
+        print(f"first run (saves snapshot): {t_first:.2f}s")
+        print(f"re-run, {args.changed:.0%} changed: {t_rerun:.2f}s, aligned {store.last_scored} pairs "
+              f"({t_rerun / t_plain:.1%} of a full scoring)")
@@ -0,0 +1,285 @@
+# src/evaluators/audit_binary.py
+"""
+Compact binary audit-log format with interned strings.
+
+A file is a magic header followed by independent blocks:
+
+    block  := b"TGB1" <u32 n_records> <u32 raw_len> <u32 zlib_len> zlib(payload)
+    payload := <u32 n_strings> <u32 len>*n_strings <utf-8 strings>
+               <record>*n_records
+
+Each record is a fixed-width packed struct (`RECORD_DTYPE`) holding the
+numeric fields plus indexes into the block's string dictionary for
+trace_id, model and meta (meta is stored as its JSON text, so repeated
+route/country combinations intern to one entry). Field names and repeated
+strings are written once per block, and zlib takes care of the rest.
+
+Numeric columns decode straight into numpy arrays (`scan_columns`) without
+creating a Python object per record. Conversion to and from JSONL is
+lossless, and `read_binary_audit_log` mirrors `usage_eval.read_audit_log`.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import struct
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+
+import numpy as np
+
+from .usage_eval import LLMUsageRecord, encode_audit_record, iter_audit_log
+
+FILE_MAGIC = b"TGAUDIT\x01"
+BLOCK_MAGIC = b"TGB1"
+_BLOCK_HEADER = struct.Struct("<4sIII")
+
+RECORD_DTYPE = np.dtype(
+    [
+        ("timestamp_ms", "<i8"),
+        ("input_tokens", "<i8"),
+        ("output_tokens", "<i8"),
+        ("latency_ms", "<i8"),
+        ("cost_usd", "<f8"),
+        ("trace_id", "<u4"),
+        ("model", "<u4"),
+        ("meta", "<u4"),
+    ]
+)
+NUMERIC_COLUMNS = ("timestamp_ms", "input_tokens", "output_tokens", "latency_ms", "cost_usd")
+
+
+def _encode_block(records: Sequence[LLMUsageRecord], level: int) -> bytes:
+    strings: Dict[str, int] = {}
+
+    def intern(value: str) -> int:
+        idx = strings.get(value)
+        if idx is None:
+            idx = strings[value] = len(strings)
+        return idx
+
+    rows = np.empty(len(records), dtype=RECORD_DTYPE)
+    for column in NUMERIC_COLUMNS:
+        rows[column] = [getattr(r, column) for r in records]
+    rows["trace_id"] = [intern(r.trace_id) for r in records]
+    rows["model"] = [intern(r.model) for r in records]
+    rows["meta"] = [intern(json.dumps(r.meta, ensure_ascii=False)) for r in records]
+
+    encoded = [s.encode("utf-8") for s in strings]
+    payload = b"".join(
+        [
+            struct.pack("<I", len(encoded)),
+            np.array([len(s) for s in encoded], dtype="<u4").tobytes(),
+            *encoded,
+            rows.tobytes(),
+        ]
+    )
+    packed = zlib.compress(payload, level)
+    return _BLOCK_HEADER.pack(BLOCK_MAGIC, len(records), len(payload), len(packed)) + packed
+
+
+def _decode_block(n_records: int, payload: bytes) -> Tuple[List[str], np.ndarray]:
+    (n_strings,) = struct.unpack_from("<I", payload, 0)
+    lens = np.frombuffer(payload, dtype="<u4", count=n_strings, offset=4)
+    pos = 4 + 4 * n_strings
+    strings = []
+    for n in lens.tolist():
+        strings.append(payload[pos : pos + n].decode("utf-8"))
+        pos += n
+    rows = np.frombuffer(payload, dtype=RECORD_DTYPE, count=n_records, offset=pos)
+    return strings, rows
+
+
+def iter_blocks(path: str | Path) -> Iterator[Tuple[List[str], np.ndarray]]:
+    """(string dictionary, record array) per block; a torn final block is skipped."""
+    with Path(path).open("rb") as f:
+        if f.read(len(FILE_MAGIC)) != FILE_MAGIC:
+            raise ValueError(f"{path}: not a binary audit log")
+        while True:
+            header = f.read(_BLOCK_HEADER.size)
+            if len(header) < _BLOCK_HEADER.size:
+                return
+            magic, n_records, raw_len, packed_len = _BLOCK_HEADER.unpack(header)
+            if magic != BLOCK_MAGIC:
+                raise ValueError(f"{path}: corrupt block header at byte {f.tell() - len(header)}")
+            packed = f.read(packed_len)
+            if len(packed) < packed_len:
+                return  # crash mid-block
+            yield _decode_block(n_records, zlib.decompress(packed, bufsize=raw_len))
+
+
+def _complete_length(path: Path) -> int:
+    """Byte length of the magic header plus every complete block; 0 for an empty or headerless stub."""
+    with path.open("rb") as f:
+        size = f.seek(0, os.SEEK_END)
+        f.seek(0)
+        magic = f.read(len(FILE_MAGIC))
+        if magic != FILE_MAGIC:
+            if size < len(FILE_MAGIC) and FILE_MAGIC.startswith(magic):
+                return 0  # crashed while writing the header
+            raise ValueError(f"{path}: not a binary audit log")
+        end = f.tell()
+        while True:
+            header = f.read(_BLOCK_HEADER.size)
+            if len(header) < _BLOCK_HEADER.size:
+                return end
+            magic, _, _, packed_len = _BLOCK_HEADER.unpack(header)
+            if magic != BLOCK_MAGIC or end + _BLOCK_HEADER.size + packed_len > size:
+                return end
+            end = f.seek(packed_len, os.SEEK_CUR)
+
+
+class BinaryAuditWriter:
+    """
+    Appends records to a binary audit log, one compressed block per
+    `block_records`. A torn final block left by a crash is truncated on
+    open, so new blocks stay reachable.
+    """
+
+    def __init__(self, path: str | Path, *, block_records: int = 4096, level: int = 6) -> None:
+        self.path = Path(path)
+        self.block_records = block_records
+        self.level = level
+        self._pending: List[LLMUsageRecord] = []
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.path.exists():
+            keep = _complete_length(self.path)
+            if keep < self.path.stat().st_size:
+                os.truncate(self.path, keep)
+        self._fh = self.path.open("ab")
+        if self._fh.tell() == 0:
+            self._fh.write(FILE_MAGIC)
+
+    def write(self, record: LLMUsageRecord) -> None:
+        self._pending.append(record)
+        if len(self._pending) >= self.block_records:
+            self.flush()
+
+    def write_many(self, records: Iterable[LLMUsageRecord]) -> None:
+        for record in records:
+            self.write(record)
+
+    def flush(self) -> None:
+        if self._pending:
+            self._fh.write(_encode_block(self._pending, self.level))
+            self._pending = []
+        self._fh.flush()
+
+    def close(self) -> None:
+        self.flush()
+        self._fh.close()
+
+    def __enter__(self) -> "BinaryAuditWriter":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+# ---- readers ----
+
+def iter_block_records(strings: Sequence[str], rows: np.ndarray) -> Iterator[LLMUsageRecord]:
+    """Records for `rows` (RECORD_DTYPE) whose string fields index into `strings`, built as consumed."""
+    meta_cache: Dict[int, Dict] = {}
+    for ts, inp, out, lat, cost, trace, model, meta in rows.tolist():
+        if meta not in meta_cache:
+            meta_cache[meta] = json.loads(strings[meta])
+        yield LLMUsageRecord(
+            trace_id=strings[trace],
+            model=strings[model],
+            input_tokens=inp,
+            output_tokens=out,
+            latency_ms=lat,
+            cost_usd=cost,
+            timestamp_ms=ts,
+            meta=dict(meta_cache[meta]),
+        )
+
+
+def iter_binary_audit_log(path: str | Path) -> Iterator[LLMUsageRecord]:
+    if not Path(path).exists():
+        return
+    for strings, rows in iter_blocks(path):
+        yield from iter_block_records(strings, rows)
+
+
+def read_binary_audit_log(path: str | Path) -> List[LLMUsageRecord]:
+    return list(iter_binary_audit_log(path))
+
+
+def scan_columns(path: str | Path, columns: Sequence[str] = NUMERIC_COLUMNS) -> Dict[str, np.ndarray]:
+    """
+    Whole-log numpy columns with no per-record Python objects. Numeric
+    columns come back as int64/float64 arrays; "model" comes back as an
+    array of model names.
+    """
+    parts: Dict[str, List[np.ndarray]] = {c: [] for c in columns}
+    for strings, rows in iter_blocks(path):
+        for c in columns:
+            if c == "model":
+                names = np.array(strings, dtype=object)
+                parts[c].append(names[rows["model"]])
+            else:
+                parts[c].append(rows[c])
+    out: Dict[str, np.ndarray] = {}
+    for c in columns:
+        if parts[c]:
+            out[c] = np.concatenate(parts[c])
+        else:
+            out[c] = np.array([], dtype=object if c == "model" else RECORD_DTYPE[c])
+    return out
+
+
+# ---- converters ----
+# Both write a temp file and replace `dst`, so re-running a conversion
+# overwrites the previous output instead of appending a second copy.
+
+def _temp_for(dst: Path) -> Path:
+    tmp = dst.with_name(dst.name + ".converting")
+    tmp.unlink(missing_ok=True)
+    return tmp
+
+
+def jsonl_to_binary(src: str | Path, dst: str | Path, *, block_records: int = 4096) -> int:
+    dst = Path(dst)
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    tmp = _temp_for(dst)
+    n = 0
+    with BinaryAuditWriter(tmp, block_records=block_records) as writer:
+        for record in iter_audit_log(src):
+            writer.write(record)
+            n += 1
+    os.replace(tmp, dst)
+    return n
+
+
+def binary_to_jsonl(src: str | Path, dst: str | Path) -> int:
+    dst = Path(dst)
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    tmp = _temp_for(dst)
+    n = 0
+    with tmp.open("wb") as f:
+        for record in iter_binary_audit_log(src):
+            f.write(encode_audit_record(record))
+            n += 1
+    os.replace(tmp, dst)
+    return n
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Convert audit logs between JSONL and the binary format")
+    parser.add_argument("command", choices=["to-binary", "to-jsonl"])
+    parser.add_argument("src")
+    parser.add_argument("dst")
+    args = parser.parse_args()
+
+    if args.command == "to-binary":
+        count = jsonl_to_binary(args.src, args.dst)
+    else:
+        count = binary_to_jsonl(args.src, args.dst)
+    print(f"converted {count} records: {args.src} ({Path(args.src).stat().st_size} bytes) "
+          f"-> {args.dst} ({Path(args.dst).stat().st_size} bytes)")
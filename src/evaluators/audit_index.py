@@ -0,0 +1,255 @@
+# src/evaluators/audit_index.py
+"""
+Sidecar index over a JSONL audit log for time-range and trace_id lookups.
+
+The index lives next to the log (`audit.jsonl.idx.sqlite`) and records:
+
+- blocks of up to `block_records` consecutive lines, each with its byte range
+  and min/max `timestamp_ms`;
+- every trace_id with the byte offset of each of its lines;
+- how many bytes of the log have been indexed.
+
+`update()` indexes only the bytes appended since the last call, so keeping
+the index current costs O(new records). Passing `index.on_flush` as an
+AuditLogWriter listener indexes each batch as it is written. Queries
+memory-map the log and decode only the blocks or lines they need.
+
+If the log shrinks or is replaced (different inode), it is reindexed from
+scratch. The log can also be an audit_segments.SegmentedAuditLog: offsets
+are then log-wide, so rotation keeps the index, and records are read back
+through the log (`records_at`, `scan`) instead of a memory map.
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+from .audit_segments import ACTIVE, SegmentedAuditLog
+from .usage_eval import LLMUsageRecord, decode_audit_record, encode_audit_record, scan_audit_log
+
+
+class AuditIndex:
+    def __init__(
+        self,
+        log_path: str | Path | SegmentedAuditLog,
+        *,
+        index_path: Optional[str | Path] = None,
+        block_records: int = 1024,
+    ) -> None:
+        self.segmented = log_path if isinstance(log_path, SegmentedAuditLog) else None
+        self.log_path = self.segmented.root / ACTIVE if self.segmented is not None else Path(log_path)
+        if index_path is None:
+            index_path = self.log_path.with_name(self.log_path.name + ".idx.sqlite")
+        self.index_path = Path(index_path)
+        self.block_records = block_records
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.index_path), check_same_thread=False)
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS blocks ("
+            " start INTEGER PRIMARY KEY, end INTEGER NOT NULL, count INTEGER NOT NULL,"
+            " min_ts INTEGER NOT NULL, max_ts INTEGER NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS blocks_ts ON blocks (min_ts, max_ts);"
+            "CREATE TABLE IF NOT EXISTS traces ("
+            " trace_id TEXT NOT NULL, offset INTEGER NOT NULL,"
+            " PRIMARY KEY (trace_id, offset)) WITHOUT ROWID;"
+        )
+        self._db.commit()
+
+    # ---- bookkeeping ----
+
+    def _meta(self, key: str, default: int = 0) -> int:
+        row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def _set_meta(self, key: str, value: int) -> None:
+        self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    @property
+    def indexed_bytes(self) -> int:
+        with self._lock:
+            return self._meta("indexed_bytes")
+
+    def _check_identity(self) -> None:
+        if self.segmented is not None:
+            if self.segmented.size < self._meta("indexed_bytes"):
+                self._db.executescript("DELETE FROM blocks; DELETE FROM traces; DELETE FROM meta;")
+            return
+        st = os.stat(self.log_path)
+        if st.st_ino != self._meta("inode", st.st_ino) or st.st_size < self._meta("indexed_bytes"):
+            self._db.executescript("DELETE FROM blocks; DELETE FROM traces; DELETE FROM meta;")
+        self._set_meta("inode", st.st_ino)
+
+    def _add(self, entries: Sequence[Tuple[int, str, int]], end: int) -> None:
+        """Index (offset, trace_id, timestamp_ms) entries ending at byte `end`."""
+        self._db.executemany(
+            "INSERT OR IGNORE INTO traces (trace_id, offset) VALUES (?, ?)",
+            [(trace_id, offset) for offset, trace_id, _ in entries],
+        )
+
+        i = 0
+        last = self._db.execute(
+            "SELECT start, count, min_ts, max_ts FROM blocks ORDER BY start DESC LIMIT 1"
+        ).fetchone()
+        if last is not None and last[1] < self.block_records:
+            # top up the trailing partial block
+            take = entries[: self.block_records - last[1]]
+            ts = [e[2] for e in take]
+            block_end = entries[len(take)][0] if len(take) < len(entries) else end
+            self._db.execute(
+                "UPDATE blocks SET end = ?, count = ?, min_ts = ?, max_ts = ? WHERE start = ?",
+                (block_end, last[1] + len(take), min(last[2], *ts), max(last[3], *ts), last[0]),
+            )
+            i = len(take)
+
+        while i < len(entries):
+            block = entries[i : i + self.block_records]
+            i += len(block)
+            block_end = entries[i][0] if i < len(entries) else end
+            ts = [e[2] for e in block]
+            self._db.execute(
+                "INSERT INTO blocks (start, end, count, min_ts, max_ts) VALUES (?, ?, ?, ?, ?)",
+                (block[0][0], block_end, len(block), min(ts), max(ts)),
+            )
+        self._set_meta("indexed_bytes", end)
+        self._db.commit()
+
+    # ---- maintenance ----
+
+    def update(self) -> int:
+        """Index lines appended since the last update; returns how many were added."""
+        if not self.log_path.exists():
+            return 0
+        with self._lock:
+            self._check_identity()
+            end = self._meta("indexed_bytes")
+            entries: List[Tuple[int, str, int]] = []
+            scan = self.segmented.scan(end) if self.segmented is not None else scan_audit_log(self.log_path, end)
+            for offset, end, rec in scan:
+                if rec is not None:
+                    entries.append((offset, rec.trace_id, rec.timestamp_ms))
+            if entries:
+                self._add(entries, end)
+            elif end != self._meta("indexed_bytes"):  # only blank lines
+                self._set_meta("indexed_bytes", end)
+                self._db.commit()
+            return len(entries)
+
+    def on_flush(self, batch: List[LLMUsageRecord], offsets: List[int]) -> None:
+        """AuditLogWriter listener: index a batch straight from memory."""
+        with self._lock:
+            self._check_identity()
+            if not batch or offsets[0] != self._meta("indexed_bytes"):
+                gap = True
+            else:
+                gap = False
+                end = offsets[-1] + len(encode_audit_record(batch[-1]))
+                self._add([(o, r.trace_id, r.timestamp_ms) for o, r in zip(offsets, batch)], end)
+        if gap:
+            self.update()  # something else appended in between; rescan
+
+    # ---- queries ----
+
+    def _mapped(self) -> Optional[mmap.mmap]:
+        if not self.log_path.exists() or self.log_path.stat().st_size == 0:
+            return None
+        with self.log_path.open("rb") as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def lookup(self, trace_id: str, *, refresh: bool = True) -> List[LLMUsageRecord]:
+        """Every record for `trace_id` (hedged requests log more than one)."""
+        if refresh:
+            self.update()
+        with self._lock:
+            offsets = [
+                row[0]
+                for row in self._db.execute(
+                    "SELECT offset FROM traces WHERE trace_id = ? ORDER BY offset", (trace_id,)
+                )
+            ]
+        if self.segmented is not None:
+            return self.segmented.records_at(offsets)
+        mm = self._mapped() if offsets else None
+        if mm is None:
+            return []
+        try:
+            return [decode_audit_record(json.loads(mm[o : mm.find(b"\n", o)])) for o in offsets]
+        finally:
+            mm.close()
+
+    def range(self, start_ms: int, end_ms: int, *, refresh: bool = True) -> Iterator[LLMUsageRecord]:
+        """Records with start_ms <= timestamp_ms < end_ms, in log order."""
+        if refresh:
+            self.update()
+        with self._lock:
+            blocks = self._db.execute(
+                "SELECT start, end FROM blocks WHERE max_ts >= ? AND min_ts < ? ORDER BY start",
+                (start_ms, end_ms),
+            ).fetchall()
+        if self.segmented is not None:
+            yield from self._segmented_range(blocks, start_ms, end_ms)
+            return
+        mm = self._mapped() if blocks else None
+        if mm is None:
+            return
+        try:
+            for start, end in blocks:
+                for line in mm[start:end].splitlines():
+                    if not line.strip():
+                        continue
+                    record = decode_audit_record(json.loads(line))
+                    if start_ms <= record.timestamp_ms < end_ms:
+                        yield record
+        finally:
+            mm.close()
+
+    def _segmented_range(
+        self, blocks: List[Tuple[int, int]], start_ms: int, end_ms: int
+    ) -> Iterator[LLMUsageRecord]:
+        # one pass from the first selected block; lines between selected blocks are skipped
+        i = 0
+        for offset, _, record in self.segmented.scan(blocks[0][0]) if blocks else ():
+            while i < len(blocks) and offset >= blocks[i][1]:
+                i += 1
+            if i == len(blocks):
+                return
+            if offset >= blocks[i][0] and record is not None and start_ms <= record.timestamp_ms < end_ms:
+                yield record
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self) -> "AuditIndex":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Index and query a JSONL audit log")
+    parser.add_argument("log", help="Audit log path")
+    parser.add_argument("--trace", help="Print every record for this trace_id")
+    parser.add_argument("--since-ms", type=int, help="Range start (epoch ms, inclusive)")
+    parser.add_argument("--until-ms", type=int, help="Range end (epoch ms, exclusive)")
+    args = parser.parse_args()
+
+    with AuditIndex(args.log) as index:
+        added = index.update()
+        if args.trace:
+            for rec in index.lookup(args.trace, refresh=False):
+                print(rec)
+        elif args.since_ms is not None or args.until_ms is not None:
+            records = list(index.range(args.since_ms or 0, args.until_ms or 2**63 - 1, refresh=False))
+            print(f"records={len(records)} cost_usd={sum(r.cost_usd for r in records):.6f}")
+        else:
+            print(f"indexed {added} new records ({index.indexed_bytes} bytes)")
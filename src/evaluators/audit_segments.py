@@ -0,0 +1,530 @@
+# src/evaluators/audit_segments.py
+"""
+Rotating audit log: one active JSONL file plus sealed, compressed segments.
+
+Records are appended to `active.jsonl`. Once it exceeds `max_bytes`, or its
+first record is older than `max_age_s`, it is sealed: converted into an
+immutable binary segment (see audit_binary) and listed in `manifest.json`
+together with its record count and timestamp range. Sealing works in
+steps. The active file is renamed to `sealing-*.jsonl`, the segment is
+written and fsynced, then the manifest is replaced. A crash at any point is
+finished on the next open.
+
+`writer()` returns an AuditLogWriter that group-commits straight into the
+active file, so the segmented log is the write path and disk use is bounded
+by the segments themselves, not by a second, ever-growing JSONL file.
+
+Offsets are log-wide: positions in the JSONL stream of every record ever
+appended, sealed or not. Each manifest entry keeps the offset its segment
+started at and its JSONL length, and sealing is lossless, so an offset
+stays valid after its record moves into a segment. Writer listeners get
+these offsets, and `scan()` mirrors usage_eval.scan_audit_log over the
+whole log, so AuditIndex and UsageRollup can follow a rotating log.
+
+Column scans prune segments by timestamp range from the manifest and decode
+them in a process pool that lives as long as the log. Workers return numpy
+columns or whatever a top-level `fn` reduces them to, never per-record
+objects, so month-long aggregations scale with core count. `iter_records`
+has workers return each segment's rows sorted by time and builds records
+only as they are consumed, merging just the segments whose time ranges
+overlap.
+"""
+
+from __future__ import annotations
+
+import bisect
+import heapq
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from operator import attrgetter
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .audit_binary import (
+    NUMERIC_COLUMNS,
+    RECORD_DTYPE,
+    iter_binary_audit_log,
+    iter_block_records,
+    iter_blocks,
+    jsonl_to_binary,
+    scan_columns,
+)
+from .usage_eval import AuditLogWriter, LLMUsageRecord, encode_audit_record, iter_audit_log, scan_audit_log
+
+ACTIVE = "active.jsonl"
+MANIFEST = "manifest.json"
+
+_timestamp = attrgetter("timestamp_ms")
+
+
+def _save_json(path: Path, data: Dict[str, Any]) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _in_range(ts_ms: int, since_ms: Optional[int], until_ms: Optional[int]) -> bool:
+    return (since_ms is None or ts_ms >= since_ms) and (until_ms is None or ts_ms < until_ms)
+
+
+def _filter(
+    cols: Dict[str, np.ndarray],
+    columns: Sequence[str],
+    since_ms: Optional[int],
+    until_ms: Optional[int],
+) -> Dict[str, np.ndarray]:
+    ts = cols["timestamp_ms"]
+    mask = np.ones(len(ts), dtype=bool)
+    if since_ms is not None:
+        mask &= ts >= since_ms
+    if until_ms is not None:
+        mask &= ts < until_ms
+    return {c: cols[c][mask] for c in columns}
+
+
+def _with_ts(columns: Sequence[str]) -> List[str]:
+    return list(dict.fromkeys([*columns, "timestamp_ms"]))
+
+
+# Worker entry points; module-level so the process pool can pickle them.
+
+def _segment_columns(path: str, columns: Sequence[str], since_ms: Optional[int], until_ms: Optional[int]):
+    return _filter(scan_columns(path, _with_ts(columns)), _with_ts(columns), since_ms, until_ms)
+
+
+def _apply(path: str, fn: Callable[[Dict[str, np.ndarray]], Any], columns: Sequence[str], since_ms, until_ms) -> Any:
+    return fn(_segment_columns(path, columns, since_ms, until_ms))
+
+
+def _segment_rows(path: str, since_ms: Optional[int], until_ms: Optional[int]) -> Tuple[List[str], np.ndarray]:
+    """A segment's rows in the time range, sorted by timestamp, indexing one string table for all its blocks."""
+    strings: List[str] = []
+    parts = []
+    for block_strings, rows in iter_blocks(path):
+        rows = rows.copy()
+        for column in ("trace_id", "model", "meta"):
+            rows[column] += len(strings)
+        strings.extend(block_strings)
+        parts.append(rows)
+    rows = np.concatenate(parts) if parts else np.empty(0, dtype=RECORD_DTYPE)
+    if since_ms is not None:
+        rows = rows[rows["timestamp_ms"] >= since_ms]
+    if until_ms is not None:
+        rows = rows[rows["timestamp_ms"] < until_ms]
+    return strings, rows[np.argsort(rows["timestamp_ms"], kind="stable")]
+
+
+def _records_to_columns(records: Sequence[LLMUsageRecord], columns: Sequence[str]) -> Dict[str, np.ndarray]:
+    out: Dict[str, np.ndarray] = {}
+    for c in columns:
+        if c == "model":
+            out[c] = np.array([r.model for r in records], dtype=object)
+        else:
+            out[c] = np.array([getattr(r, c) for r in records], dtype=RECORD_DTYPE[c])
+    return out
+
+
+def _truncate_torn_tail(path: Path) -> None:
+    """Drop a partial last line left by a crash so new appends start clean."""
+    with path.open("r+b") as f:
+        size = f.seek(0, os.SEEK_END)
+        if size == 0:
+            return
+        f.seek(size - 1)
+        if f.read(1) == b"\n":
+            return
+        pos = size
+        while pos > 0:
+            step = min(pos, 1 << 16)
+            f.seek(pos - step)
+            chunk = f.read(step)
+            nl = chunk.rfind(b"\n")
+            if nl >= 0:
+                f.truncate(pos - step + nl + 1)
+                return
+            pos -= step
+        f.truncate(0)
+
+
+class SegmentedAuditLog:
+    def __init__(
+        self,
+        root: str | Path,
+        *,
+        max_bytes: int = 64 << 20,
+        max_age_s: Optional[float] = 3600.0,
+        block_records: int = 4096,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.max_age_s = max_age_s
+        self.block_records = block_records
+        self._clock = clock
+        self.root.mkdir(parents=True, exist_ok=True)
+        manifest_path = self.root / MANIFEST
+        if manifest_path.exists():
+            self._manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        else:
+            self._manifest = {"segments": [], "next_segment": 0, "sealed_bytes": 0}
+        self._fh = None
+        self._first_ts_ms: Optional[int] = None
+        self._lock = threading.RLock()  # writer thread vs. readers and rotation
+        self._pools: Dict[Optional[int], ProcessPoolExecutor] = {}
+        for leftover in sorted(self.root.glob("sealing-*.jsonl")):
+            self._seal(leftover)
+        self._open_active()
+
+    @property
+    def segments(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._manifest["segments"])
+
+    def _open_active(self) -> None:
+        path = self.root / ACTIVE
+        if path.exists():
+            _truncate_torn_tail(path)
+        self._first_ts_ms = next((r.timestamp_ms for r in iter_audit_log(path)), None)
+        self._fh = path.open("ab")
+
+    # ---- writes ----
+
+    def append(self, records: Iterable[LLMUsageRecord]) -> None:
+        batch = list(records)
+        self._write(batch, [encode_audit_record(r) for r in batch], sync=False)
+
+    def writer(self, **kwargs: Any) -> "SegmentedAuditWriter":
+        """Buffered, group-committed writer into this log; takes AuditLogWriter's options."""
+        return SegmentedAuditWriter(self, **kwargs)
+
+    def _write(self, batch: List[LLMUsageRecord], lines: List[bytes], sync: bool) -> List[int]:
+        """Append encoded records to the active file, then rotate if due; returns log-wide offsets."""
+        with self._lock:
+            if self._fh is None:
+                raise RuntimeError("segmented audit log is closed")
+            start = self._manifest["sealed_bytes"] + self._fh.tell()
+            offsets = []
+            for record, line in zip(batch, lines):
+                if self._first_ts_ms is None:
+                    self._first_ts_ms = record.timestamp_ms
+                offsets.append(start)
+                start += len(line)
+            if lines:
+                self._fh.write(b"".join(lines))
+                self._fh.flush()
+                if sync:
+                    os.fsync(self._fh.fileno())
+            self.maybe_rotate()
+            return offsets
+
+    def sync(self) -> None:
+        with self._lock:
+            if self._fh is not None:
+                os.fsync(self._fh.fileno())
+
+    def maybe_rotate(self) -> bool:
+        if self._fh is None or self._first_ts_ms is None:
+            return False
+        too_big = self._fh.tell() >= self.max_bytes
+        too_old = (
+            self.max_age_s is not None
+            and self._clock() * 1000 - self._first_ts_ms >= self.max_age_s * 1000
+        )
+        if too_big or too_old:
+            self.rotate()
+            return True
+        return False
+
+    def rotate(self) -> Optional[Dict[str, Any]]:
+        """Seal the active file into a compressed segment and start a new one."""
+        with self._lock:
+            self._fh.close()
+            active = self.root / ACTIVE
+            entry = None
+            if active.exists() and active.stat().st_size > 0:
+                sealing = self.root / f"sealing-{self._manifest['next_segment']:06d}.jsonl"
+                os.replace(active, sealing)
+                entry = self._seal(sealing)
+            self._open_active()
+            return entry
+
+    def _seal(self, sealing: Path) -> Dict[str, Any]:
+        number = int(sealing.stem.split("-")[1])
+        name = f"seg-{number:06d}.tgb"
+        tmp = self.root / (name + ".tmp")
+        tmp.unlink(missing_ok=True)
+        jsonl_bytes = sealing.stat().st_size
+        count = jsonl_to_binary(sealing, tmp, block_records=self.block_records)
+        with tmp.open("rb") as f:
+            os.fsync(f.fileno())
+        ts = scan_columns(tmp, ["timestamp_ms"])["timestamp_ms"]
+        os.replace(tmp, self.root / name)
+
+        # re-sealing after a crash that happened past the manifest update keeps the original start
+        previous = next((s for s in self._manifest["segments"] if s["name"] == name), None)
+        start = previous["start"] if previous else self._manifest["sealed_bytes"]
+        entry = {
+            "name": name,
+            "records": count,
+            "min_ts_ms": int(ts.min()) if count else None,
+            "max_ts_ms": int(ts.max()) if count else None,
+            "bytes": (self.root / name).stat().st_size,
+            "start": start,
+            "jsonl_bytes": jsonl_bytes,
+        }
+        segments = [s for s in self._manifest["segments"] if s["name"] != name] + [entry]
+        self._manifest = {
+            "segments": segments,
+            "next_segment": max(self._manifest["next_segment"], number + 1),
+            "sealed_bytes": max(self._manifest["sealed_bytes"], start + jsonl_bytes),
+        }
+        _save_json(self.root / MANIFEST, self._manifest)
+        sealing.unlink()
+        return entry
+
+    def close(self) -> None:
+        """Close the active file and the worker pools; the log stays readable."""
+        with self._lock:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+            pools, self._pools = self._pools, {}
+        for pool in pools.values():
+            pool.shutdown()
+
+    def __enter__(self) -> "SegmentedAuditLog":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    # ---- reads ----
+
+    def _selected_segments(self, since_ms: Optional[int], until_ms: Optional[int]) -> List[Dict[str, Any]]:
+        selected = []
+        for seg in self.segments:
+            if not seg["records"]:
+                continue
+            if since_ms is not None and seg["max_ts_ms"] < since_ms:
+                continue
+            if until_ms is not None and seg["min_ts_ms"] >= until_ms:
+                continue
+            selected.append(seg)
+        return selected
+
+    def _selected(self, since_ms: Optional[int], until_ms: Optional[int]) -> List[str]:
+        return [str(self.root / seg["name"]) for seg in self._selected_segments(since_ms, until_ms)]
+
+    @property
+    def size(self) -> int:
+        """Log-wide length in bytes: every sealed segment's JSONL plus the active file."""
+        with self._lock:
+            if self._fh is not None:
+                self._fh.flush()
+            return self._manifest["sealed_bytes"] + (self.root / ACTIVE).stat().st_size
+
+    def _scan_segment(self, seg: Dict[str, Any], start: int) -> Iterator[Tuple[int, int, LLMUsageRecord]]:
+        # sealing is lossless, so re-encoding a record gives back its original line length
+        offset = seg["start"]
+        for record in iter_binary_audit_log(self.root / seg["name"]):
+            end = offset + len(encode_audit_record(record))
+            if offset >= start:
+                yield offset, end, record
+            offset = end
+
+    def scan(self, start: int = 0) -> Iterator[Tuple[int, int, Optional[LLMUsageRecord]]]:
+        """
+        usage_eval.scan_audit_log over the whole log: (offset, end, record)
+        for each line from log-wide offset `start` on. The active part is
+        read up front, so a rotation during the scan cannot shift it.
+        """
+        with self._lock:
+            segments = self.segments
+            base = self._manifest["sealed_bytes"]
+            if self._fh is not None:
+                self._fh.flush()
+            active = list(scan_audit_log(self.root / ACTIVE, max(0, start - base)))
+        for seg in segments:
+            if seg["start"] + seg["jsonl_bytes"] > start:
+                yield from self._scan_segment(seg, start)
+        for offset, end, record in active:
+            yield base + offset, base + end, record
+
+    def records_at(self, offsets: Iterable[int]) -> List[LLMUsageRecord]:
+        """Records at log-wide `offsets` (as handed to listeners), in offset order."""
+        wanted = sorted(set(offsets))
+        found: Dict[int, LLMUsageRecord] = {}
+        with self._lock:
+            segments = self.segments
+            base = self._manifest["sealed_bytes"]
+        for seg in segments:
+            lo = bisect.bisect_left(wanted, seg["start"])
+            hi = bisect.bisect_left(wanted, seg["start"] + seg["jsonl_bytes"])
+            if lo == hi:
+                continue
+            inside = set(wanted[lo:hi])
+            for offset, _, record in self._scan_segment(seg, wanted[lo]):
+                if offset in inside:
+                    found[offset] = record
+                if offset >= wanted[hi - 1]:
+                    break
+        if wanted and wanted[-1] >= base:
+            rest = set(wanted) - found.keys()
+            for offset, _, record in self.scan(max(base, wanted[0])):
+                if offset in rest and record is not None:
+                    found[offset] = record
+        return [found[o] for o in wanted if o in found]
+
+    def _active_records(self) -> List[LLMUsageRecord]:
+        with self._lock:
+            if self._fh is not None:
+                self._fh.flush()
+            return list(iter_audit_log(self.root / ACTIVE))
+
+    def _pool(self, processes: Optional[int]) -> ProcessPoolExecutor:
+        # one pool per requested size, kept until close(): worker start-up is not paid per query
+        with self._lock:
+            pool = self._pools.get(processes)
+            if pool is None:
+                pool = self._pools[processes] = ProcessPoolExecutor(max_workers=processes)
+            return pool
+
+    def _decode_ahead(
+        self,
+        paths: List[str],
+        since_ms: Optional[int],
+        until_ms: Optional[int],
+        processes: Optional[int],
+    ) -> Iterator[Tuple[List[str], np.ndarray]]:
+        """_segment_rows for each path in order, keeping at most one decode per worker in flight."""
+        if processes == 1 or len(paths) <= 1:
+            for path in paths:
+                yield _segment_rows(path, since_ms, until_ms)
+            return
+        pool = self._pool(processes)
+        todo = iter(paths)
+        pending = deque(
+            pool.submit(_segment_rows, path, since_ms, until_ms)
+            for path in islice(todo, processes or os.cpu_count() or 1)
+        )
+        while pending:
+            done = pending.popleft().result()
+            for path in islice(todo, 1):
+                pending.append(pool.submit(_segment_rows, path, since_ms, until_ms))
+            yield done
+
+    def _map(self, fn: Callable[..., Any], paths: List[str], *args: Any, processes: Optional[int]) -> List[Any]:
+        if processes == 1 or len(paths) <= 1:
+            return [fn(p, *args) for p in paths]
+        return list(self._pool(processes).map(fn, paths, *([a] * len(paths) for a in args)))
+
+    def map_segments(
+        self,
+        fn: Callable[[Dict[str, np.ndarray]], Any],
+        columns: Sequence[str] = NUMERIC_COLUMNS,
+        *,
+        since_ms: Optional[int] = None,
+        until_ms: Optional[int] = None,
+        processes: Optional[int] = None,
+    ) -> List[Any]:
+        """
+        `fn(columns)` for each segment (in worker processes) and for the
+        active file, in segment order; `fn` must be a picklable top-level
+        function. Combine the partial results in the caller.
+        """
+        paths = self._selected(since_ms, until_ms)
+        results = self._map(_apply, paths, fn, columns, since_ms, until_ms, processes=processes)
+        active = _records_to_columns(self._active_records(), _with_ts(columns))
+        results.append(fn(_filter(active, _with_ts(columns), since_ms, until_ms)))
+        return results
+
+    def columns(
+        self,
+        columns: Sequence[str] = NUMERIC_COLUMNS,
+        *,
+        since_ms: Optional[int] = None,
+        until_ms: Optional[int] = None,
+        processes: Optional[int] = None,
+    ) -> Dict[str, np.ndarray]:
+        """Requested columns over every matching record, sorted by timestamp_ms."""
+        wanted = _with_ts(columns)
+        paths = self._selected(since_ms, until_ms)
+        parts = self._map(_segment_columns, paths, wanted, since_ms, until_ms, processes=processes)
+        parts.append(_filter(_records_to_columns(self._active_records(), wanted), wanted, since_ms, until_ms))
+        merged = {c: np.concatenate([p[c] for p in parts]) for c in wanted}
+        order = np.argsort(merged["timestamp_ms"], kind="stable")
+        return {c: merged[c][order] for c in columns}
+
+    def iter_records(
+        self,
+        *,
+        since_ms: Optional[int] = None,
+        until_ms: Optional[int] = None,
+        processes: Optional[int] = None,
+    ) -> Iterator[LLMUsageRecord]:
+        """
+        Full records across segments in timestamp order. Workers decode
+        segments into sorted rows a few ahead of the consumer; records are
+        built here as they are consumed. Segments are heap-merged only with
+        those whose manifest time ranges overlap, so memory holds a few
+        segments' rows, not the whole log. Use columns() or map_segments()
+        for aggregations.
+        """
+        segments = self._selected_segments(since_ms, until_ms)
+        active = [r for r in self._active_records() if _in_range(r.timestamp_ms, since_ms, until_ms)]
+        active.sort(key=_timestamp)
+        # (min_ts, max_ts, position): position len(segments) is the active file, which comes last on ties
+        runs = [(seg["min_ts_ms"], seg["max_ts_ms"], i) for i, seg in enumerate(segments)]
+        if active:
+            runs.append((active[0].timestamp_ms, active[-1].timestamp_ms, len(segments)))
+        runs.sort(key=lambda run: run[0])
+        decoded = self._decode_ahead(
+            [str(self.root / segments[i]["name"]) for _, _, i in runs if i < len(segments)],
+            since_ms,
+            until_ms,
+            processes,
+        )
+
+        overlapping: List[Tuple[int, Iterator[LLMUsageRecord]]] = []
+        overlap_end = 0
+        for lo, hi, i in runs:
+            if overlapping and lo > overlap_end:
+                yield from heapq.merge(*(run for _, run in sorted(overlapping)), key=_timestamp)
+                overlapping = []
+            run = iter(active) if i == len(segments) else iter_block_records(*next(decoded))
+            overlap_end = max(overlap_end, hi) if overlapping else hi
+            overlapping.append((i, run))
+        if overlapping:
+            yield from heapq.merge(*(run for _, run in sorted(overlapping)), key=_timestamp)
+
+
+class SegmentedAuditWriter(AuditLogWriter):
+    """
+    AuditLogWriter whose batches go into a SegmentedAuditLog, rotating as
+    they land. Listener offsets are log-wide, so they survive rotation. The
+    log itself is owned, and closed, by the caller.
+    """
+
+    def __init__(self, log: SegmentedAuditLog, **kwargs: Any) -> None:
+        self.log = log
+        super().__init__(log.root / ACTIVE, **kwargs)
+
+    def _open(self) -> Any:
+        return None
+
+    def _write(self, batch: List[LLMUsageRecord], lines: List[bytes], sync: bool) -> List[int]:
+        return self.log._write(batch, lines, sync)
+
+    def _finish(self, sync: bool) -> None:
+        if sync:
+            self.log.sync()
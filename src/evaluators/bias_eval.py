@@ -1,12 +1,13 @@
 from __future__ import annotations
 
 import argparse
-import json
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Protocol, Sequence
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Protocol, Sequence
 from .eval_writer import EvaluationRecord, append_evaluations
-from .common import DummyResponse, ModelClient, DummyModelClient
+from .common import DummyResponse, ModelClient, DummyModelClient, complete_batch, iter_jsonl, str_mapping
+from .checkpoint import Checkpoint, run_checkpointed
+from .runner import PromptRunner, chunked
 
 # -------------------------------
 # Data model
@@ -48,20 +49,20 @@ class ModelResponse(Protocol):
 # Dataset loader
 # -------------------------------
 
+def _parse_bias_case(raw: Dict[str, Any]) -> BiasCase:
+    return BiasCase(
+        id=raw["id"],
+        variants=str_mapping(raw, "variants"),
+        max_allowed_delta=float(raw.get("max_allowed_delta", 0.5)),
+    )
+
+
+def iter_bias_cases(path: str | Path, *, shard: int = 0, num_shards: int = 1) -> Iterator[BiasCase]:
+    return iter_jsonl(path, _parse_bias_case, shard=shard, num_shards=num_shards)
+
+
 def load_bias_cases(path: str | Path) -> List[BiasCase]:
-    cases: List[BiasCase] = []
-    for line in Path(path).read_text().splitlines():
-        if not line.strip():
-            continue
-        raw = json.loads(line)
-        cases.append(
-            BiasCase(
-                id=raw["id"],
-                variants=raw["variants"],
-                max_allowed_delta=float(raw.get("max_allowed_delta", 0.5)),
-            )
-        )
-    return cases
+    return list(iter_bias_cases(path))
 
 
 # -------------------------------
@@ -101,14 +102,13 @@ Resume:
 """.strip()
 
 
-def evaluate_bias_case(model: ModelClient, case: BiasCase) -> BiasResult:
+def score_bias_case(case: BiasCase, texts: Sequence[str]) -> BiasResult:
+    """Build a BiasResult from one response per variant, in variant order."""
     scores: List[BiasVariantScore] = []
 
-    for label, resume in case.variants.items():
-        prompt = make_prompt(resume)
-        resp = model.complete(prompt)
-        score = extract_score(resp.text)
-        scores.append(BiasVariantScore(label=label, score=score, raw_response=resp.text))
+    for label, text in zip(case.variants, texts):
+        score = extract_score(text)
+        scores.append(BiasVariantScore(label=label, score=score, raw_response=text))
 
     numeric_scores = [s.score for s in scores]
     max_delta = max(numeric_scores) - min(numeric_scores)
@@ -123,18 +123,75 @@ def evaluate_bias_case(model: ModelClient, case: BiasCase) -> BiasResult:
     )
 
 
-def evaluate_bias_suite(model: ModelClient, cases: Sequence[BiasCase]) -> List[BiasResult]:
-    return [evaluate_bias_case(model, c) for c in cases]
+def bias_result_from_dict(raw: Dict[str, Any]) -> BiasResult:
+    return BiasResult(
+        id=raw["id"],
+        max_delta=float(raw["max_delta"]),
+        allowed=float(raw["allowed"]),
+        passed=bool(raw["passed"]),
+        variant_scores=[BiasVariantScore(**v) for v in raw["variant_scores"]],
+    )
+
+
+def evaluate_bias_case(model: ModelClient, case: BiasCase) -> BiasResult:
+    prompts = [make_prompt(resume) for resume in case.variants.values()]
+    texts = [r.text for r in complete_batch(model, prompts)]
+    return score_bias_case(case, texts)
+
+
+def iter_bias_suite(
+    model: ModelClient,
+    cases: Iterable[BiasCase],
+    runner: Optional[PromptRunner] = None,
+) -> Iterator[BiasResult]:
+    runner = runner or PromptRunner()
+    for chunk in chunked(cases, runner.chunk_size):
+        prompts = [make_prompt(resume) for c in chunk for resume in c.variants.values()]
+        texts = iter([r.text for r in runner.run(model, prompts)])
+        for c in chunk:
+            yield score_bias_case(c, [next(texts) for _ in c.variants])
+
+
+def evaluate_bias_suite(
+    model: ModelClient,
+    cases: Iterable[BiasCase],
+    runner: Optional[PromptRunner] = None,
+) -> List[BiasResult]:
+    return list(iter_bias_suite(model, cases, runner))
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--data", required=True, help="Path to bias JSONL dataset")
+    parser.add_argument("--concurrency", type=int, default=1, help="Requests kept in flight")
+    parser.add_argument("--batch-size", type=int, default=1, help="Prompts per complete_batch call")
+    parser.add_argument("--order-by-prefix", action="store_true", help="Group prompts by shared prefix")
+    parser.add_argument("--checkpoint", help="Journal finished cases to this JSONL file")
+    parser.add_argument("--resume", action="store_true", help="Skip cases already in --checkpoint")
     parsed_args = parser.parse_args()
+    if parsed_args.resume and not parsed_args.checkpoint:
+        parser.error("--resume requires --checkpoint")
 
-    bias_cases = load_bias_cases(parsed_args.data)
     client: ModelClient = DummyModelClient()
 
-    bias_results = evaluate_bias_suite(client, bias_cases)
+    runner = PromptRunner(
+        concurrency=parsed_args.concurrency,
+        batch_size=parsed_args.batch_size,
+        order_by_prefix=parsed_args.order_by_prefix,
+    )
+    checkpoint = (
+        Checkpoint.for_dataset(
+            parsed_args.checkpoint, suite="bias", dataset_path=parsed_args.data, model=type(client).__name__
+        )
+        if parsed_args.checkpoint
+        else None
+    )
+    bias_results = run_checkpointed(
+        lambda: iter_bias_cases(parsed_args.data),
+        lambda cases: iter_bias_suite(client, cases, runner=runner),
+        checkpoint,
+        decode=bias_result_from_dict,
+        resume=parsed_args.resume,
+    )
 
     eval_records: list[EvaluationRecord] = []
     for r in bias_results:
@@ -151,6 +208,10 @@ if __name__ == "__main__":
                 notes=f"variants={len(r.variant_scores)}",
             )
         )
+    print(
+        f"cases={len(eval_records)}, mean_batch_size={runner.stats.mean_batch_size:.1f}, "
+        f"mean_batch_latency_ms={runner.stats.mean_batch_latency_ms:.1f}"
+    )
 
     append_evaluations(eval_records)
 
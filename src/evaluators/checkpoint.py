@@ -0,0 +1,154 @@
+# src/evaluators/checkpoint.py
+"""
+Per-case checkpoint journal so long suites can resume after a failure.
+
+Each finished case is appended to a JSONL journal as soon as its result is
+produced, keyed by (suite, dataset hash, model, mode, case id). A resumed
+run skips every case already in the journal and evaluates only the rest.
+Results are streamed out in dataset order as they complete; journaled ones
+are read back from the journal by offset, so memory holds case ids only.
+
+A fresh (non-resumed) run writes a reset marker for its key, so one journal
+file can be shared by several suites and models without truncating it.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, TypeVar
+
+C = TypeVar("C")
+R = TypeVar("R")
+
+
+def dataset_hash(path: str | Path, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with Path(path).open("rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+class Checkpoint:
+    def __init__(
+        self,
+        path: str | Path,
+        *,
+        suite: str,
+        dataset: str,
+        model: str,
+        mode: Optional[str] = None,
+        fsync: bool = False,
+    ) -> None:
+        self.path = Path(path)
+        # mode tells apart runs of one suite whose results differ, e.g. fact --multi-field
+        self.key = {"suite": suite, "dataset": dataset, "model": model, "mode": mode}
+        self.fsync = fsync
+        self._fh = None
+        self._reader = None
+
+    @classmethod
+    def for_dataset(
+        cls, path: str | Path, *, suite: str, dataset_path: str | Path, model: str, mode: Optional[str] = None
+    ) -> "Checkpoint":
+        return cls(path, suite=suite, dataset=dataset_hash(dataset_path), model=model, mode=mode)
+
+    def _matches(self, entry: Dict[str, Any]) -> bool:
+        return all(entry.get(k) == v for k, v in self.key.items())
+
+    def offsets(self) -> Dict[str, int]:
+        """case_id -> byte offset of its journal entry for this key (since its last reset)."""
+        done: Dict[str, int] = {}
+        if not self.path.exists():
+            return done
+        with self.path.open("rb") as f:
+            offset = 0
+            for line in f:
+                start, offset = offset, offset + len(line)
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn write from a crash
+                if not self._matches(entry):
+                    continue
+                if entry.get("reset"):
+                    done.clear()
+                else:
+                    done[entry["case_id"]] = start
+        return done
+
+    def read(self, offset: int) -> Dict[str, Any]:
+        """The journaled result at `offset` (from offsets())."""
+        if self._reader is None:
+            self._reader = self.path.open("rb")
+        self._reader.seek(offset)
+        return json.loads(self._reader.readline())["result"]
+
+    def completed(self) -> Dict[str, Dict[str, Any]]:
+        """case_id -> journaled result for this key (since its last reset)."""
+        return {case_id: self.read(offset) for case_id, offset in self.offsets().items()}
+
+    def _write(self, entry: Dict[str, Any]) -> None:
+        if self._fh is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._fh = self.path.open("a", encoding="utf-8")
+        self._fh.write(json.dumps({**self.key, **entry}, ensure_ascii=False) + "\n")
+        self._fh.flush()
+        if self.fsync:
+            os.fsync(self._fh.fileno())
+
+    def reset(self) -> None:
+        self._write({"reset": True})
+
+    def record(self, case_id: str, result: Dict[str, Any]) -> None:
+        self._write({"case_id": case_id, "result": result})
+
+    def close(self) -> None:
+        for fh in (self._fh, self._reader):
+            if fh is not None:
+                fh.close()
+        self._fh = self._reader = None
+
+
+def run_checkpointed(
+    load: Callable[[], Iterable[C]],
+    run: Callable[[Iterable[C]], Iterable[R]],
+    checkpoint: Optional[Checkpoint],
+    *,
+    decode: Callable[[Dict[str, Any]], R],
+    encode: Callable[[R], Dict[str, Any]] = asdict,  # type: ignore[assignment]
+    resume: bool = False,
+    case_id: Callable[[C], str] = lambda c: c.id,  # type: ignore[attr-defined]
+) -> Iterator[R]:
+    """
+    Run a suite through the journal and yield results in dataset order.
+
+    `run` must yield one result per case, in order. `load` is iterated twice
+    side by side (pending cases for `run`, all cases for the merge), so
+    streamed datasets are re-read instead of held in memory.
+    """
+    if checkpoint is None:
+        yield from run(load())
+        return
+
+    if not resume:
+        checkpoint.reset()
+    done = checkpoint.offsets()
+    results = iter(run(c for c in load() if case_id(c) not in done))
+    try:
+        for case in load():
+            cid = case_id(case)
+            if cid in done:
+                yield decode(checkpoint.read(done[cid]))
+                continue
+            result = next(results, None)
+            if result is None or result.id != cid:  # type: ignore[attr-defined]
+                raise RuntimeError(f"suite produced results out of order at case {cid!r}")
+            checkpoint.record(cid, encode(result))
+            yield result
+    finally:
+        checkpoint.close()
@@ -1,7 +1,32 @@
 # src/evaluators/common.py
 
+import asyncio
+import gzip
+import hashlib
+import io
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
 from dataclasses import dataclass
-from typing import Protocol
+from pathlib import Path
+from typing import (
+    IO,
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Protocol,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+
+T = TypeVar("T")
 
 # ---- Response Protocol ----
 class ModelResponse(Protocol):
@@ -19,6 +44,12 @@ class DummyResponse:
         return self._text
 
 
+# ---- Token Estimate ----
+def estimate_tokens(text: str) -> int:
+    """Rough prompt-size estimate (~4 characters per token) for pre-send accounting."""
+    return (len(text) + 3) // 4
+
+
 # ---- Model Protocol ----
 class ModelClient(Protocol):
     def complete(self, prompt: str) -> ModelResponse:
@@ -28,9 +59,408 @@ class ModelClient(Protocol):
         ...
 
 
+# ---- Async Model Protocol ----
+class AsyncModelClient(Protocol):
+    async def acomplete(self, prompt: str) -> ModelResponse:
+        """
+        Optional async counterpart to ModelClient.complete.
+        PromptRunner awaits this directly when a client provides it.
+        """
+        ...
+
+
+# ---- Batch Model Protocol ----
+class BatchModelClient(Protocol):
+    def complete_batch(self, prompts: Sequence[str]) -> Sequence[ModelResponse]:
+        """
+        Optional: complete several prompts in one provider call.
+        Must return exactly one response per prompt, in order.
+        """
+        ...
+
+
+def complete_batch(model: ModelClient, prompts: Sequence[str]) -> List[ModelResponse]:
+    """Use model.complete_batch when available, else fall back to sequential complete."""
+    batch_fn = getattr(model, "complete_batch", None)
+    if batch_fn is None:
+        return [model.complete(p) for p in prompts]
+
+    responses = list(batch_fn(list(prompts)))
+    if len(responses) != len(prompts):
+        raise ValueError(
+            f"complete_batch returned {len(responses)} responses for {len(prompts)} prompts"
+        )
+    return responses
+
+
 # ---- Dummy Model ----
 class DummyModelClient(ModelClient):
     def complete(self, prompt: str) -> DummyResponse:
         # Simple deterministic fake score for bias eval
         return DummyResponse("7.0")
 
+
+
+# ---- Response Cache ----
+def cache_key(model_id: str, prompt: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """Content address for one completion: (model id, prompt hash, decoding params)."""
+    prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    payload = json.dumps([model_id, prompt_hash, params or {}], sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    text: str
+
+
+@dataclass
+class CacheStats:
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    deduped: int = 0  # requests that waited on an identical in-flight call
+
+    @property
+    def hits(self) -> int:
+        return self.memory_hits + self.disk_hits
+
+
+class CachingModelClient(ModelClient):
+    """
+    Wraps any ModelClient with a two-tier response cache.
+
+    Lookups hit an in-memory LRU first, then an optional SQLite file; misses
+    call the wrapped client and populate both tiers. Entries older than
+    `ttl_s` are treated as misses, and the disk tier keeps at most
+    `max_disk_entries` rows (least recently used are evicted first).
+
+    Concurrent requests for the same key share one provider call. Disk hits
+    are promoted into the LRU without a write; their access times are
+    written with the next store (before eviction) or on close. Wrapping a
+    client that has `acomplete` yields an AsyncCachingModelClient.
+    """
+
+    def __new__(cls, inner: ModelClient, **kwargs: Any) -> "CachingModelClient":
+        if cls is CachingModelClient and hasattr(inner, "acomplete"):
+            cls = AsyncCachingModelClient
+        return super().__new__(cls)
+
+    def __init__(
+        self,
+        inner: ModelClient,
+        *,
+        model_id: str,
+        params: Optional[Dict[str, Any]] = None,
+        path: Optional[str | Path] = None,
+        max_memory_entries: int = 1024,
+        max_disk_entries: Optional[int] = None,
+        ttl_s: Optional[float] = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.inner = inner
+        self.model_id = model_id
+        self.params = dict(params or {})
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl_s = ttl_s
+        self.stats = CacheStats()
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._inflight: Dict[str, "Future[str]"] = {}
+        self._touched: Dict[str, float] = {}  # disk hits whose accessed_at is not written yet
+        self._db: Optional[sqlite3.Connection] = None
+
+        if path is not None:
+            path = Path(path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(path), check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, text TEXT NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)"
+            )
+            self._db.commit()
+
+    def complete(self, prompt: str) -> CachedResponse:
+        key = cache_key(self.model_id, prompt, self.params)
+        text, pending = self._lookup(key)
+        if text is not None:
+            return CachedResponse(text)
+        if pending is not None:
+            return CachedResponse(pending.result())
+
+        try:
+            text = self.inner.complete(prompt).text
+        except BaseException as exc:
+            self._fail(key, exc)
+            raise
+        self._store(key, text)
+        return CachedResponse(text)
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_s is not None and now - created_at > self.ttl_s
+
+    def _lookup(self, key: str) -> Tuple[Optional[str], Optional["Future[str]"]]:
+        """
+        (text, None) on a hit, (None, future) when an identical call is in
+        flight, and (None, None) on a miss, which the caller must resolve
+        with _store or _fail.
+        """
+        now = self._clock()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if not self._expired(entry[1], now):
+                    self._memory.move_to_end(key)
+                    self.stats.memory_hits += 1
+                    return entry[0], None
+                del self._memory[key]
+
+            pending = self._inflight.get(key)
+            if pending is not None:
+                self.stats.deduped += 1
+                return None, pending
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT text, created_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and not self._expired(row[1], now):
+                    self._touched[key] = now
+                    self._remember(key, row[0], row[1])
+                    self.stats.disk_hits += 1
+                    return row[0], None
+                if row is not None:
+                    self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._db.commit()
+
+            self.stats.misses += 1
+            self._inflight[key] = Future()
+            return None, None
+
+    def _fail(self, key: str, exc: BaseException) -> None:
+        with self._lock:
+            pending = self._inflight.pop(key)
+        pending.set_exception(exc)
+
+    def _write_touched(self) -> None:
+        if self._touched:
+            self._db.executemany(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?",
+                [(at, key) for key, at in self._touched.items()],
+            )
+            self._touched.clear()
+
+    def _store(self, key: str, text: str) -> None:
+        now = self._clock()
+        with self._lock:
+            pending = self._inflight.pop(key, None)
+            self._remember(key, text, now)
+            if self._db is not None:
+                self._store_disk(key, text, now)
+        if pending is not None:
+            pending.set_result(text)
+
+    def _store_disk(self, key: str, text: str, now: float) -> None:
+        self._write_touched()
+        self._db.execute(
+            "INSERT OR REPLACE INTO responses (key, text, created_at, accessed_at) "
+            "VALUES (?, ?, ?, ?)",
+            (key, text, now, now),
+        )
+        if self.max_disk_entries is not None:
+            self._db.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY accessed_at DESC, rowid DESC "
+                "LIMIT -1 OFFSET ?)",
+                (self.max_disk_entries,),
+            )
+        self._db.commit()
+
+    def _remember(self, key: str, text: str, created_at: float) -> None:
+        self._memory[key] = (text, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._write_touched()
+                self._db.commit()
+                self._db.close()
+                self._db = None
+
+    def __enter__(self) -> "CachingModelClient":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+class AsyncCachingModelClient(CachingModelClient):
+    """CachingModelClient that also forwards `acomplete`; in-flight calls are shared across both paths."""
+
+    async def acomplete(self, prompt: str) -> CachedResponse:
+        key = cache_key(self.model_id, prompt, self.params)
+        text, pending = self._lookup(key)
+        if text is not None:
+            return CachedResponse(text)
+        if pending is not None:
+            return CachedResponse(await asyncio.wrap_future(pending))
+
+        try:
+            text = (await self.inner.acomplete(prompt)).text
+        except BaseException as exc:
+            self._fail(key, exc)
+            raise
+        self._store(key, text)
+        return CachedResponse(text)
+
+
+# ---- Streaming Datasets ----
+class DatasetError(ValueError):
+    """A dataset line that failed to parse or validate, with its location."""
+
+    def __init__(self, path: str | Path, line_no: int, message: str, shard: Optional[str] = None) -> None:
+        where = f"{path}:{line_no}" if shard is None else f"{path}:{line_no} (shard {shard})"
+        super().__init__(f"{where}: {message}")
+        self.path = str(path)
+        self.line_no = line_no
+
+
+def open_binary(path: str | Path) -> IO[bytes]:
+    """Open a dataset for reading, transparently decompressing .gz and .zst files."""
+    path = Path(path)
+    if path.suffix == ".gz":
+        return gzip.open(path, "rb")
+    if path.suffix in (".zst", ".zstd"):
+        try:
+            import zstandard
+        except ImportError as exc:
+            raise ImportError("reading .zst datasets requires the 'zstandard' package") from exc
+        reader = zstandard.ZstdDecompressor().stream_reader(path.open("rb"), closefd=True)
+        return io.BufferedReader(reader)
+    return path.open("rb")
+
+
+def open_text(path: str | Path, encoding: str = "utf-8-sig") -> IO[str]:
+    return io.TextIOWrapper(open_binary(path), encoding=encoding)
+
+
+_COMPRESSED_SUFFIXES = (".gz", ".zst", ".zstd")
+
+
+def _byte_ranged(path: Path, num_shards: int) -> bool:
+    return num_shards > 1 and path.suffix not in _COMPRESSED_SUFFIXES
+
+
+def _lines_before(path: Path, offset: int, chunk_size: int = 1 << 20) -> int:
+    """Number of lines that end before byte `offset`."""
+    count = 0
+    with path.open("rb") as f:
+        while offset > 0:
+            chunk = f.read(min(chunk_size, offset))
+            if not chunk:
+                break
+            count += chunk.count(b"\n")
+            offset -= len(chunk)
+    return count
+
+
+def _iter_shard_lines(path: Path, shard: int, num_shards: int) -> Iterator[Tuple[int, bytes]]:
+    """
+    Yield (position, raw line) for one shard.
+
+    Plain files are split into byte ranges: a shard owns every line that
+    starts inside its range, so shards never overlap and need no coordination.
+    Compressed streams cannot be split by offset and are sharded round-robin
+    by line instead. For byte ranges, position is the byte offset of the line
+    (see _lines_before); otherwise it is the 1-based line number.
+    """
+    if num_shards <= 1:
+        with open_binary(path) as f:
+            yield from enumerate(f, start=1)
+        return
+
+    if path.suffix in _COMPRESSED_SUFFIXES:
+        with open_binary(path) as f:
+            for line_no, line in enumerate(f, start=1):
+                if (line_no - 1) % num_shards == shard:
+                    yield line_no, line
+        return
+
+    size = path.stat().st_size
+    start = size * shard // num_shards
+    end = size * (shard + 1) // num_shards
+    with path.open("rb") as f:
+        if start > 0:
+            f.seek(start - 1)
+            f.readline()  # finish the line owned by the previous shard
+        offset = f.tell()
+        while offset < end:
+            line = f.readline()
+            if not line:
+                break
+            yield offset, line
+            offset += len(line)
+
+
+def str_mapping(raw: Dict[str, Any], key: str) -> Dict[str, str]:
+    """`raw[key]` checked to be a non-empty object of strings; errors name the field for iter_jsonl."""
+    value = raw[key]
+    if not isinstance(value, dict) or not value:
+        raise TypeError(f"field '{key}' must be a non-empty object, got {type(value).__name__}")
+    for name, text in value.items():
+        if not isinstance(text, str):
+            raise TypeError(f"field '{key}.{name}' must be a string, got {type(text).__name__}")
+    return value
+
+
+def iter_jsonl(
+    path: str | Path,
+    parse: Callable[[Dict[str, Any]], T],
+    *,
+    shard: int = 0,
+    num_shards: int = 1,
+) -> Iterator[T]:
+    """
+    Stream a JSONL dataset one line at a time, mapping each object through
+    `parse`. Errors carry the absolute line number, also within a shard.
+    """
+    path = Path(path)
+    if not 0 <= shard < max(1, num_shards):
+        raise ValueError(f"shard {shard} out of range for {num_shards} shards")
+    shard_label = f"{shard}/{num_shards}" if num_shards > 1 else None
+    by_offset = _byte_ranged(path, num_shards)
+
+    def error(position: int, message: str) -> DatasetError:
+        # byte-range shards yield offsets; counting lines is only paid on failure
+        line_no = _lines_before(path, position) + 1 if by_offset else position
+        return DatasetError(path, line_no, message, shard_label)
+
+    for position, raw_line in _iter_shard_lines(path, shard, num_shards):
+        try:
+            text = raw_line.decode("utf-8").lstrip("\ufeff")
+        except UnicodeDecodeError as exc:
+            raise error(position, f"invalid UTF-8 ({exc.reason} at byte {exc.start})") from exc
+        if not text.strip():
+            continue
+        try:
+            raw = json.loads(text)
+        except json.JSONDecodeError as exc:
+            raise error(position, f"invalid JSON ({exc.msg})") from exc
+        if not isinstance(raw, dict):
+            raise error(position, "expected a JSON object")
+        try:
+            item = parse(raw)
+        except KeyError as exc:
+            raise error(position, f"missing field {exc}") from exc
+        except (TypeError, ValueError) as exc:
+            raise error(position, str(exc)) from exc
+        yield item
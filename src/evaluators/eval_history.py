@@ -0,0 +1,272 @@
+# src/evaluators/eval_history.py
+"""
+Columnar (Parquet) mirror of the evaluation history, plus a small query API.
+
+Rows are partitioned hive-style by eval_type and record date
+(`eval_type=wer/date=2025-11-30/part-*.parquet`). Each metric and threshold
+key becomes its own float column (`metric.wer`, `threshold.wer`), so a
+dashboard reads just the columns it needs and skips row groups by their
+statistics rather than loading and flattening the whole JSON history.
+
+The JSONL store stays the source of truth. Writers mirror their rows when a
+segment seals or the store closes. `rebuild` regenerates the mirror from
+the store if a writer crashed before that.
+
+Requires pyarrow, which is imported lazily.
+"""
+
+from __future__ import annotations
+
+import json
+import shutil
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Sequence
+
+from .eval_writer import EVALS_PATH
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from .eval_writer import EvaluationStore
+
+
+EVALS_COLUMNAR = EVALS_PATH.with_suffix(".parquet")
+
+METRIC_PREFIX = "metric."
+THRESHOLD_PREFIX = "threshold."
+
+
+def _pa():
+    try:
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.dataset
+        import pyarrow.parquet
+    except ImportError as exc:
+        raise ImportError("the columnar evaluation history requires the 'pyarrow' package") from exc
+    return pyarrow
+
+
+def _parse_ts(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        ts = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    return _as_utc(ts)
+
+
+def _as_utc(ts: datetime) -> datetime:
+    """Partitions and `recorded_at` are UTC; naive datetimes are taken to be UTC too."""
+    return ts.replace(tzinfo=timezone.utc) if ts.tzinfo is None else ts.astimezone(timezone.utc)
+
+
+def _to_table(rows: Sequence[Dict[str, Any]]):
+    pa = _pa()
+    metric_keys = sorted({k for r in rows for k in (r.get("metrics") or {})})
+    threshold_keys = sorted({k for r in rows for k in (r.get("thresholds") or {})})
+
+    def col(key: str) -> List[Any]:
+        return [r.get(key) for r in rows]
+
+    num_examples = [None if n is None else int(n) for n in col("num_examples")]
+    columns: Dict[str, Any] = {
+        "name": pa.array(col("name"), pa.string()),
+        "dataset": pa.array(col("dataset"), pa.string()),
+        "passed": pa.array(col("passed"), pa.bool_()),
+        "num_examples": pa.array(num_examples, pa.int64()),
+        "tags": pa.array(col("tags"), pa.list_(pa.string())),
+        "notes": pa.array(col("notes"), pa.string()),
+        "config": pa.array(
+            [None if c is None else json.dumps(c, sort_keys=True) for c in col("config")], pa.string()
+        ),
+        "recorded_at": pa.array(
+            [_parse_ts(r.get("recorded_at")) for r in rows], pa.timestamp("us", tz="UTC")
+        ),
+    }
+    for key in metric_keys:
+        values = [(r.get("metrics") or {}).get(key) for r in rows]
+        columns[METRIC_PREFIX + key] = pa.array(
+            [None if v is None else float(v) for v in values], pa.float64()
+        )
+    for key in threshold_keys:
+        values = [(r.get("thresholds") or {}).get(key) for r in rows]
+        columns[THRESHOLD_PREFIX + key] = pa.array(
+            [None if v is None else float(v) for v in values], pa.float64()
+        )
+    return pa.table(columns)
+
+
+class ColumnarMirror:
+    """Writes evaluation rows into the partitioned Parquet layout."""
+
+    def __init__(self, root: str | Path = EVALS_COLUMNAR, *, row_group_size: int = 64_000) -> None:
+        _pa()
+        self.root = Path(root)
+        self.row_group_size = row_group_size
+
+    def write(self, rows: Iterable[Dict[str, Any]], *, part: Optional[str] = None, default_date: str = "unknown") -> int:
+        """Write store-format rows (with `recorded_at`); one file per partition."""
+        pq = _pa().parquet
+        part = part or uuid.uuid4().hex
+        partitions: Dict[tuple, List[Dict[str, Any]]] = defaultdict(list)
+        for row in rows:
+            ts = _parse_ts(row.get("recorded_at"))
+            date = ts.date().isoformat() if ts else default_date
+            partitions[(row["eval_type"], date)].append(row)
+
+        written = 0
+        for (eval_type, date), group in partitions.items():
+            directory = self.root / f"eval_type={eval_type}" / f"date={date}"
+            directory.mkdir(parents=True, exist_ok=True)
+            tmp = directory / f".part-{part}.parquet.tmp"
+            pq.write_table(_to_table(group), tmp, row_group_size=self.row_group_size)
+            tmp.replace(directory / f"part-{part}.parquet")
+            written += len(group)
+        return written
+
+    def rebuild(self, store: "EvaluationStore") -> int:
+        """Regenerate the whole mirror from the store and swap it into place."""
+        staging = self.root.with_name(self.root.name + f".rebuild-{uuid.uuid4().hex[:8]}")
+        run_ts = _parse_ts(store._manifest.get("run_id"))
+        default_date = run_ts.date().isoformat() if run_ts else "unknown"
+
+        written = 0
+        batch: List[Dict[str, Any]] = []
+        fresh = ColumnarMirror(staging, row_group_size=self.row_group_size)
+        for raw in store.iter_records():
+            batch.append(raw)
+            if len(batch) >= self.row_group_size:
+                written += fresh.write(batch, default_date=default_date)
+                batch = []
+        if batch:
+            written += fresh.write(batch, default_date=default_date)
+
+        old = self.root.with_name(self.root.name + f".old-{uuid.uuid4().hex[:8]}")
+        if self.root.exists():
+            self.root.rename(old)
+        if staging.exists():
+            staging.rename(self.root)
+        shutil.rmtree(old, ignore_errors=True)
+        return written
+
+
+class EvalHistory:
+    """
+    Read side of the mirror. Filters on eval_type and date prune whole
+    directories. Other filters are pushed down to Parquet row-group
+    statistics, and only the requested columns are decoded.
+    """
+
+    def __init__(self, root: str | Path = EVALS_COLUMNAR) -> None:
+        _pa()
+        self.root = Path(root)
+
+    def _files(self, eval_type: Optional[str], since: Optional[datetime], until: Optional[datetime]) -> List[Path]:
+        pattern = f"eval_type={eval_type}" if eval_type else "eval_type=*"
+        files = []
+        for directory in sorted(self.root.glob(f"{pattern}/date=*")):
+            date = directory.name.split("=", 1)[1]
+            if date != "unknown":
+                if since is not None and date < since.date().isoformat():
+                    continue
+                if until is not None and date > until.date().isoformat():
+                    continue
+            files.extend(sorted(directory.glob("part-*.parquet")))
+        return files
+
+    def query(
+        self,
+        *,
+        eval_type: Optional[str] = None,
+        dataset: Optional[str] = None,
+        tags: Optional[Sequence[str]] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> "pd.DataFrame":
+        """
+        Rows matching every given filter. `tags` matches rows carrying any of
+        the tags; `since`/`until` bound `recorded_at` (inclusive/exclusive).
+        """
+        table = self._scan(eval_type, dataset, tags, since, until, columns)
+        if table is None:
+            import pandas as pd
+
+            return pd.DataFrame(columns=list(columns or ()))
+        return table.to_pandas()
+
+    def _scan(self, eval_type, dataset, tags, since, until, columns):
+        pa = _pa()
+        pc, ds, pq = pa.compute, pa.dataset, pa.parquet
+        since = None if since is None else _as_utc(since)
+        until = None if until is None else _as_utc(until)
+
+        files = self._files(eval_type, since, until)
+        if not files:
+            return None
+
+        schema = pa.unify_schemas([pq.read_schema(f) for f in files])
+        partitioning = ds.partitioning(
+            pa.schema([("eval_type", pa.string()), ("date", pa.string())]), flavor="hive"
+        )
+        dataset_ = ds.dataset(
+            [str(f) for f in files],
+            schema=schema.append(pa.field("eval_type", pa.string())).append(pa.field("date", pa.string())),
+            partitioning=partitioning,
+            partition_base_dir=str(self.root),
+            format="parquet",
+        )
+
+        expr = None
+
+        def both(a, b):
+            return b if a is None else a & b
+
+        if dataset is not None:
+            expr = both(expr, ds.field("dataset") == dataset)
+        if since is not None:
+            expr = both(expr, ds.field("recorded_at") >= pa.scalar(since, pa.timestamp("us", tz="UTC")))
+        if until is not None:
+            expr = both(expr, ds.field("recorded_at") < pa.scalar(until, pa.timestamp("us", tz="UTC")))
+
+        wanted = list(columns) if columns is not None else list(dataset_.schema.names)
+        read = list(dict.fromkeys(wanted + (["tags"] if tags else [])))
+        table = dataset_.to_table(columns=read, filter=expr)
+
+        if tags:
+            flat = pc.list_flatten(table["tags"])
+            parents = pc.list_parent_indices(table["tags"])
+            hit = pc.filter(parents, pc.is_in(flat, value_set=pa.array(list(tags), pa.string())))
+            mask = pc.is_in(pa.array(range(table.num_rows), pa.int64()), value_set=pc.cast(hit, pa.int64()))
+            table = table.filter(mask)
+        return table.select(wanted)
+
+    def aggregate(
+        self,
+        metrics: Sequence[str],
+        *,
+        by: Sequence[str] = ("eval_type", "name"),
+        how: str = "mean",
+        eval_type: Optional[str] = None,
+        dataset: Optional[str] = None,
+        tags: Optional[Sequence[str]] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> "pd.DataFrame":
+        """
+        Aggregate `metric.<name>` columns grouped by `by`. `how` is any
+        pyarrow hash aggregation (mean, min, max, count, ...). Result
+        columns are named like `metric.wer_mean`; filters are as for `query`.
+        """
+        cols = [METRIC_PREFIX + m for m in metrics]
+        table = self._scan(eval_type, dataset, tags, since, until, list(by) + cols)
+        if table is None:
+            import pandas as pd
+
+            return pd.DataFrame(columns=list(by) + [f"{c}_{how}" for c in cols])
+        return table.group_by(list(by)).aggregate([(c, how) for c in cols]).to_pandas()
@@ -1,13 +1,22 @@
 from __future__ import annotations
 
+import atexit
+import heapq
+import importlib.util
 import json
+import os
+import socket
+import threading
+import uuid
+from contextlib import contextmanager
 from dataclasses import asdict, dataclass
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import IO, Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
 
 
 EVALS_PATH = Path(__file__).resolve().parents[2] / "results" / "evaluations.json"
+EVALS_STORE = EVALS_PATH.with_suffix(".d")
 
 
 @dataclass(frozen=True)
@@ -21,29 +30,363 @@ class EvaluationRecord:
     num_examples: Optional[int] = None
     tags: Optional[List[str]] = None
     notes: Optional[str] = None
+    config: Optional[Dict[str, Any]] = None  # settings that affect the metrics, e.g. text normalization
+
+
+def _empty_history() -> Dict[str, Any]:
+    return {
+        "run_id": datetime.now(timezone.utc).isoformat(),
+        "project": "TrustGate Evals",
+        "evaluations": [],
+    }
 
 
 def _load_json(path: Path) -> Dict[str, Any]:
     if not path.exists():
-        return {
-            "run_id": datetime.now(timezone.utc).isoformat(),
-            "project": "TrustGate Evals",
-            "evaluations": [],
-        }
+        return _empty_history()
     with path.open("r", encoding="utf-8") as f:
         return json.load(f)
 
 
 def _save_json(path: Path, data: Dict[str, Any]) -> None:
+    """Write via a temp file and rename so readers never see a half-written file."""
     path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w", encoding="utf-8") as f:
+    tmp = path.with_name(path.name + ".tmp")
+    with tmp.open("w", encoding="utf-8") as f:
         json.dump(data, f, indent=2, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+# -------------------------------
+# Append-only segment store
+# -------------------------------
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows has no flock; see EvaluationStore
+    fcntl = None  # type: ignore[assignment]
+
+
+def _flock(fd: int, exclusive: bool = True, blocking: bool = True) -> bool:
+    if fcntl is None:
+        return True
+    flags = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+    if not blocking:
+        flags |= fcntl.LOCK_NB
+    try:
+        fcntl.flock(fd, flags)
+    except BlockingIOError:
+        return False
+    return True
+
+
+def _recorded_at(raw: Dict[str, Any]) -> str:
+    # imported legacy records carry no timestamp and sort first
+    return raw.get("recorded_at") or ""
+
+
+class EvaluationStore:
+    """
+    Append-only evaluation history shared by any number of writer processes.
+
+    Each process appends to its own JSONL segment (`seg-<host>-<pid>-...`),
+    so writers never contend with one another; a segment rotates once it
+    reaches `segment_max_bytes`. Inside a process, concurrent appends are
+    group-committed: one thread writes and fsyncs everything queued so far
+    while the others wait for that single commit.
+
+    A writer holds an exclusive flock on its open segment, which tells the
+    compactor to leave it alone; segments of rotated or dead writers are
+    sealed and get merged. Readers merge all segments by `recorded_at`, and
+    a torn final line left by a crash is skipped. Directory-level changes
+    (creating segments, compaction, listing for a read) are serialised by
+    `store.lock`. Without fcntl (Windows) compaction is disabled and the
+    store is only safe for one writer process.
+
+    With a `mirror` (see eval_history.ColumnarMirror), the rows of each
+    segment are also written to the columnar history when it seals, when
+    `mirror_batch_rows` accumulate, or on `close()`.
+    """
+
+    MANIFEST = "manifest.json"
+    LOCK = "store.lock"
+
+    def __init__(
+        self,
+        root: str | Path = EVALS_STORE,
+        *,
+        segment_max_bytes: int = 8 << 20,
+        compact_after: int = 16,
+        legacy_path: Optional[Path] = None,
+        mirror: Optional[Any] = None,
+        mirror_batch_rows: int = 10_000,
+    ) -> None:
+        self.root = Path(root)
+        self.mirror = mirror
+        self.mirror_batch_rows = mirror_batch_rows
+        self._unmirrored: List[Dict[str, Any]] = []
+        self._mirror_parts = 0
+        self.segment_max_bytes = segment_max_bytes
+        self.compact_after = compact_after
+        self._cond = threading.Condition()
+        self._pending: List[str] = []
+        self._enqueued = 0
+        self._durable = 0
+        self._flushing = False
+        # (lo, hi] ticket range of each failed batch -> [error, waiters yet to see it]
+        self._failed: Dict[Tuple[int, int], List[Any]] = {}
+        self._pid: Optional[int] = None
+        self._writer_id = ""
+        self._segment_no = 0
+        self._segment: Optional[BinaryIO] = None
+        self._compact_lock = threading.Lock()
+        self._compactor: Optional[threading.Thread] = None
+        self._manifest = self._open(legacy_path)
+
+    @contextmanager
+    def _store_lock(self, exclusive: bool) -> Iterator[None]:
+        fd = os.open(self.root / self.LOCK, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            _flock(fd, exclusive)
+            yield
+        finally:
+            os.close(fd)
+
+    def _open(self, legacy_path: Optional[Path]) -> Dict[str, Any]:
+        self.root.mkdir(parents=True, exist_ok=True)
+        manifest_path = self.root / self.MANIFEST
+        with self._store_lock(exclusive=True):
+            if manifest_path.exists():
+                with manifest_path.open("r", encoding="utf-8") as f:
+                    return json.load(f)
+
+            legacy = _load_json(legacy_path) if legacy_path is not None else _empty_history()
+            if legacy["evaluations"]:
+                with (self.root / "seg-legacy.jsonl").open("w", encoding="utf-8") as f:
+                    for rec in legacy["evaluations"]:
+                        f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            manifest = {"project": legacy["project"], "run_id": legacy["run_id"]}
+            _save_json(manifest_path, manifest)
+            return manifest
+
+    # ---- writes ----
+
+    def append(self, records: List[EvaluationRecord]) -> None:
+        if not records:
+            return
+
+        rotated = False
+        with self._cond:
+            stamp = datetime.now(timezone.utc).isoformat()
+            rows = [{**asdict(rec), "recorded_at": stamp} for rec in records]
+            self._pending.append("".join(json.dumps(row, ensure_ascii=False) + "\n" for row in rows))
+            self._enqueued += 1
+            ticket = self._enqueued
+
+            while self._durable < ticket:
+                if self._flushing:
+                    self._cond.wait()
+                    continue
+
+                # Become the leader: commit everything queued so far in one write.
+                self._flushing = True
+                batch, self._pending = self._pending, []
+                lo, hi = self._durable, self._enqueued
+                self._cond.release()
+                error: Optional[BaseException] = None
+                try:
+                    rotated = self._write_batch("".join(batch).encode("utf-8")) or rotated
+                except BaseException as exc:
+                    error = exc
+                finally:
+                    self._cond.acquire()
+                self._flushing = False
+                self._durable = hi
+                if error is not None:
+                    self._failed[(lo, hi)] = [error, hi - lo]
+                self._cond.notify_all()
+
+            for (lo, hi), failure in self._failed.items():
+                if lo < ticket <= hi:
+                    failure[1] -= 1
+                    if not failure[1]:
+                        del self._failed[(lo, hi)]
+                    raise failure[0]
+            if self.mirror is not None:
+                self._unmirrored.extend(rows)
+
+        if self.mirror is not None and (rotated or len(self._unmirrored) >= self.mirror_batch_rows):
+            self._flush_mirror()
+        if rotated and len(list(self.root.glob("seg-*.jsonl"))) >= self.compact_after:
+            self.compact(background=True)
+
+    def _write_batch(self, payload: bytes) -> bool:
+        fh = self._writer_segment()
+        fh.write(payload)
+        fh.flush()
+        os.fsync(fh.fileno())
+        if fh.tell() < self.segment_max_bytes:
+            return False
+        fh.close()  # releases the flock: the segment is now sealed
+        self._segment = None
+        return True
+
+    def _writer_segment(self) -> BinaryIO:
+        if self._pid != os.getpid():
+            # fresh store, or a forked child that must not share the parent's segment
+            if self._segment is not None:
+                self._segment.close()
+                self._segment = None
+            self._pid = os.getpid()
+            self._writer_id = f"{socket.gethostname()}-{self._pid}-{uuid.uuid4().hex[:8]}"
+            self._segment_no = 0
+            self._unmirrored = []
+            self._mirror_parts = 0
+
+        if self._segment is None:
+            with self._store_lock(exclusive=False):
+                path = self.root / f"seg-{self._writer_id}-{self._segment_no:04d}.jsonl"
+                self._segment_no += 1
+                fh = path.open("xb")
+                _flock(fh.fileno(), exclusive=True)
+            self._segment = fh
+        return self._segment
+
+    def _flush_mirror(self) -> None:
+        with self._cond:
+            rows, self._unmirrored = self._unmirrored, []
+            part = f"{self._writer_id}-{self._mirror_parts:04d}"
+            self._mirror_parts += 1
+        if rows:
+            self.mirror.write(rows, part=part)
+
+    def close(self) -> None:
+        with self._cond:
+            if self._segment is not None and self._pid == os.getpid():
+                self._segment.close()
+            self._segment = None
+        if self.mirror is not None:
+            self._flush_mirror()
+
+    # ---- reads ----
+
+    @staticmethod
+    def _iter_segment(f: IO[str]) -> Iterator[Dict[str, Any]]:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue  # torn write from a crash
+
+    def iter_records(self) -> Iterator[Dict[str, Any]]:
+        """All records from every writer, merged by `recorded_at`."""
+        with self._store_lock(exclusive=False):
+            files = [p.open("r", encoding="utf-8") for p in sorted(self.root.glob("seg-*.jsonl"))]
+        try:
+            yield from heapq.merge(*(self._iter_segment(f) for f in files), key=_recorded_at)
+        finally:
+            for f in files:
+                f.close()
+
+    def export_legacy(self, path: Path = EVALS_PATH) -> None:
+        """Write the full history in the original evaluations.json shape."""
+        evaluations = []
+        for raw in self.iter_records():
+            raw.pop("recorded_at", None)
+            evaluations.append(raw)
+        _save_json(
+            Path(path),
+            {
+                "run_id": self._manifest["run_id"],
+                "project": self._manifest["project"],
+                "evaluations": evaluations,
+            },
+        )
+
+    # ---- compaction ----
+
+    def compact(self, background: bool = False) -> Optional[threading.Thread]:
+        """Merge sealed segments into one; segments still held by a writer are skipped."""
+        if background:
+            if self._compactor is not None and self._compactor.is_alive():
+                return self._compactor
+            self._compactor = threading.Thread(target=self._compact, name="evals-compactor")
+            self._compactor.start()
+            return self._compactor
+        self._compact()
+        return None
+
+    def _compact(self) -> None:
+        if fcntl is None:
+            return
+        with self._compact_lock, self._store_lock(exclusive=True):
+            sealed: List[IO[str]] = []
+            try:
+                for path in sorted(self.root.glob("seg-*.jsonl")):
+                    f = path.open("r", encoding="utf-8")
+                    if _flock(f.fileno(), exclusive=True, blocking=False):
+                        sealed.append(f)
+                    else:
+                        f.close()  # a live writer's active segment
+                if len(sealed) < 2:
+                    return
+
+                name = f"seg-compact-{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}.jsonl"
+                tmp = self.root / (name + ".tmp")
+                merged = heapq.merge(*(self._iter_segment(f) for f in sealed), key=_recorded_at)
+                with tmp.open("w", encoding="utf-8") as out:
+                    for raw in merged:
+                        out.write(json.dumps(raw, ensure_ascii=False) + "\n")
+                    out.flush()
+                    os.fsync(out.fileno())
+                os.replace(tmp, self.root / name)
+                for f in sealed:
+                    Path(f.name).unlink(missing_ok=True)
+            finally:
+                for f in sealed:
+                    f.close()
+
+
+_default_store: Optional[EvaluationStore] = None
+
+
+def default_store() -> EvaluationStore:
+    """The shared store; mirrored to the columnar history when pyarrow is installed."""
+    global _default_store
+    if _default_store is None:
+        mirror = None
+        if importlib.util.find_spec("pyarrow") is not None:
+            from .eval_history import ColumnarMirror
+
+            mirror = ColumnarMirror()
+        _default_store = EvaluationStore(EVALS_STORE, legacy_path=EVALS_PATH, mirror=mirror)
+        atexit.register(_default_store.close)
+    return _default_store
 
 
 def append_evaluations(records: List[EvaluationRecord]) -> None:
-    data = _load_json(EVALS_PATH)
-    existing = data.get("evaluations", [])
-    for rec in records:
-        existing.append(asdict(rec))
-    data["evaluations"] = existing
-    _save_json(EVALS_PATH, data)
+    default_store().append(records)
+
+
+def export_evaluations(path: Path = EVALS_PATH) -> None:
+    default_store().export_legacy(path)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Evaluation history maintenance")
+    parser.add_argument("command", choices=["export", "compact", "mirror"])
+    parser.add_argument("--out", default=str(EVALS_PATH), help="Legacy JSON path for export")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        export_evaluations(Path(args.out))
+    elif args.command == "mirror":
+        from .eval_history import ColumnarMirror
+
+        print(f"mirrored {ColumnarMirror().rebuild(default_store())} records")
+    else:
+        default_store().compact()
@@ -4,10 +4,12 @@ import argparse
 import json
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Protocol, Sequence
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Protocol, Sequence
 
-from .common import DummyModelClient
+from .common import DummyModelClient, complete_batch, estimate_tokens, iter_jsonl, str_mapping
+from .checkpoint import Checkpoint, run_checkpointed
 from .eval_writer import EvaluationRecord, append_evaluations
+from .runner import PromptRunner, chunked
 
 
 # -------------------------------
@@ -25,6 +27,9 @@ class FactCase:
 class FactResult:
     id: str
     extracted: Dict[str, str]  # field_name -> model answer
+    num_calls: int = 0               # model calls spent on this case
+    prompt_tokens: int = 0           # estimated input tokens sent
+    baseline_prompt_tokens: int = 0  # estimate for one call per field
 
 
 # -------------------------------
@@ -44,75 +49,256 @@ class ModelClient(Protocol):
 # Dataset loader
 # -------------------------------
 
+def _parse_fact_case(raw: Dict[str, Any]) -> FactCase:
+    return FactCase(
+        id=raw["id"],
+        passage=raw["passage"],
+        fields=str_mapping(raw, "fields"),
+    )
+
+
+def iter_fact_cases(path: str | Path, *, shard: int = 0, num_shards: int = 1) -> Iterator[FactCase]:
+    return iter_jsonl(path, _parse_fact_case, shard=shard, num_shards=num_shards)
+
+
 def load_fact_cases(path: str | Path) -> List[FactCase]:
-    cases: List[FactCase] = []
-    for line in Path(path).read_text().splitlines():
-        if not line.strip():
-            continue
-        raw = json.loads(line)
-        cases.append(
-            FactCase(
-                id=raw["id"],
-                passage=raw["passage"],
-                fields=raw["fields"],
-            )
-        )
-    return cases
+    return list(iter_fact_cases(path))
 
 
 # -------------------------------
 # Core evaluation logic
 # -------------------------------
 
+def passage_prefix(passage: str) -> str:
+    """Shared context goes first so prefix-caching backends reuse it across fields."""
+    return f"Passage:\n{passage.strip()}\n\n"
+
+
 def build_prompt(passage: str, question: str) -> str:
-    return f"""
-Extract a fact from the passage below.
+    return passage_prefix(passage) + f"""
+Extract a fact from the passage above.
 
 Return ONLY the extracted text with no explanation.
 
-Passage:
-{passage}
-
 Question: {question}
 """.strip()
 
 
-def evaluate_fact_case(model: ModelClient, case: FactCase) -> FactResult:
-    out: Dict[str, str] = {}
+def build_multi_field_prompt(passage: str, fields: Dict[str, str]) -> str:
+    questions = "\n".join(f"- {name}: {question}" for name, question in fields.items())
+    return passage_prefix(passage) + f"""
+Extract facts from the passage above.
+
+Return ONLY a JSON object with one key per field listed under Fields and the
+extracted text as each value. No explanation.
 
-    for field, question in case.fields.items():
-        prompt = build_prompt(case.passage, question)
-        resp = model.complete(prompt)
-        out[field] = resp.text.strip()
+Fields:
+{questions}
+""".strip()
 
-    return FactResult(id=case.id, extracted=out)
 
+def parse_multi_field_response(text: str, fields: Dict[str, str]) -> Dict[str, str]:
+    """Return the fields that parsed cleanly; missing or malformed ones are left out."""
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end <= start:
+        return {}
+    try:
+        raw = json.loads(text[start : end + 1])
+    except json.JSONDecodeError:
+        return {}
+    if not isinstance(raw, dict):
+        return {}
 
-def evaluate_fact_suite(model: ModelClient, cases: Sequence[FactCase]) -> List[FactResult]:
-    return [evaluate_fact_case(model, c) for c in cases]
+    out: Dict[str, str] = {}
+    for field in fields:
+        value = raw.get(field)
+        if isinstance(value, (str, int, float)) and not isinstance(value, bool):
+            out[field] = str(value).strip()
+    return out
+
+
+def _baseline_tokens(case: FactCase) -> int:
+    return sum(estimate_tokens(build_prompt(case.passage, q)) for q in case.fields.values())
+
+
+def evaluate_fact_case(model: ModelClient, case: FactCase, multi_field: bool = False) -> FactResult:
+    if multi_field:
+        return evaluate_fact_suite(model, [case], multi_field=True)[0]
+
+    prompts = [build_prompt(case.passage, q) for q in case.fields.values()]
+    responses = complete_batch(model, prompts)
+    out: Dict[str, str] = {
+        field: resp.text.strip() for field, resp in zip(case.fields, responses)
+    }
+    baseline = _baseline_tokens(case)
+
+    return FactResult(
+        id=case.id,
+        extracted=out,
+        num_calls=len(prompts),
+        prompt_tokens=baseline,
+        baseline_prompt_tokens=baseline,
+    )
+
+
+def iter_fact_suite(
+    model: ModelClient,
+    cases: Iterable[FactCase],
+    runner: Optional[PromptRunner] = None,
+    multi_field: bool = False,
+) -> Iterator[FactResult]:
+    runner = runner or PromptRunner()
+    for chunk in chunked(cases, runner.chunk_size):
+        yield from _evaluate_fact_chunk(model, chunk, runner, multi_field)
+
+
+def evaluate_fact_suite(
+    model: ModelClient,
+    cases: Iterable[FactCase],
+    runner: Optional[PromptRunner] = None,
+    multi_field: bool = False,
+) -> List[FactResult]:
+    return list(iter_fact_suite(model, cases, runner, multi_field))
+
+
+def _evaluate_fact_chunk(
+    model: ModelClient,
+    cases: List[FactCase],
+    runner: PromptRunner,
+    multi_field: bool,
+) -> List[FactResult]:
+    if not multi_field:
+        prompts = [build_prompt(c.passage, q) for c in cases for q in c.fields.values()]
+        texts = iter([r.text for r in runner.run(model, prompts)])
+        return [
+            FactResult(
+                id=c.id,
+                extracted={field: next(texts).strip() for field in c.fields},
+                num_calls=len(c.fields),
+                prompt_tokens=_baseline_tokens(c),
+                baseline_prompt_tokens=_baseline_tokens(c),
+            )
+            for c in cases
+        ]
+
+    # One structured call per case, then per-field calls only for what failed to parse.
+    combined = [build_multi_field_prompt(c.passage, c.fields) for c in cases]
+    responses = runner.run(model, combined)
+    parsed = [parse_multi_field_response(r.text, c.fields) for c, r in zip(cases, responses)]
+
+    missing = [
+        (i, field, build_prompt(c.passage, question))
+        for i, c in enumerate(cases)
+        for field, question in c.fields.items()
+        if field not in parsed[i]
+    ]
+    retried = runner.run(model, [prompt for _, _, prompt in missing])
+
+    calls = [1] * len(cases)
+    tokens = [estimate_tokens(p) for p in combined]
+    for (i, field, prompt), resp in zip(missing, retried):
+        parsed[i][field] = resp.text.strip()
+        calls[i] += 1
+        tokens[i] += estimate_tokens(prompt)
+
+    return [
+        FactResult(
+            id=c.id,
+            extracted={field: parsed[i][field] for field in c.fields},
+            num_calls=calls[i],
+            prompt_tokens=tokens[i],
+            baseline_prompt_tokens=_baseline_tokens(c),
+        )
+        for i, c in enumerate(cases)
+    ]
+
+
+def summarize_fact_savings(results: Iterable[FactResult]) -> Dict[str, float]:
+    """Run-level call and token savings versus one call per field."""
+    calls = baseline_calls = tokens = baseline_tokens = 0
+    for r in results:  # one pass: `results` may be a generator
+        calls += r.num_calls
+        baseline_calls += len(r.extracted)
+        tokens += r.prompt_tokens
+        baseline_tokens += r.baseline_prompt_tokens
+    return {
+        "calls": float(calls),
+        "baseline_calls": float(baseline_calls),
+        "calls_saved": float(baseline_calls - calls),
+        "prompt_tokens": float(tokens),
+        "baseline_prompt_tokens": float(baseline_tokens),
+        "prompt_tokens_saved": float(baseline_tokens - tokens),
+    }
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--data", required=True)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--order-by-prefix", action="store_true")
+    parser.add_argument(
+        "--multi-field",
+        action="store_true",
+        help="Ask for all fields of a case in one JSON response",
+    )
+    parser.add_argument("--checkpoint", help="Journal finished cases to this JSONL file")
+    parser.add_argument("--resume", action="store_true", help="Skip cases already in --checkpoint")
     args = parser.parse_args()
+    if args.resume and not args.checkpoint:
+        parser.error("--resume requires --checkpoint")
 
-    fact_cases = load_fact_cases(args.data)
     client: ModelClient = DummyModelClient()  # avoid shadowing "model"
 
-    fact_results = evaluate_fact_suite(client, fact_cases)
+    runner = PromptRunner(
+        concurrency=args.concurrency,
+        batch_size=args.batch_size,
+        order_by_prefix=args.order_by_prefix,
+    )
+    checkpoint = (
+        Checkpoint.for_dataset(
+            args.checkpoint,
+            suite="fact",
+            dataset_path=args.data,
+            model=type(client).__name__,
+            mode="multi-field" if args.multi_field else "per-field",
+        )
+        if args.checkpoint
+        else None
+    )
+    fact_results = list(
+        run_checkpointed(
+            lambda: iter_fact_cases(args.data),
+            lambda cases: iter_fact_suite(client, cases, runner=runner, multi_field=args.multi_field),
+            checkpoint,
+            decode=lambda raw: FactResult(**raw),
+            resume=args.resume,
+        )
+    )
+
+    savings = summarize_fact_savings(fact_results)
+    print(
+        f"calls={savings['calls']:.0f} (saved {savings['calls_saved']:.0f}), "
+        f"prompt_tokens~{savings['prompt_tokens']:.0f} "
+        f"(saved {savings['prompt_tokens_saved']:.0f}), "
+        f"prefix_reuse={runner.stats.prefix_reuse_ratio:.2f}, "
+        f"mean_batch_size={runner.stats.mean_batch_size:.1f}, "
+        f"mean_batch_latency_ms={runner.stats.mean_batch_latency_ms:.1f}"
+    )
 
     # ---- NEW: append to unified evaluations.json ----
     eval_records: list[EvaluationRecord] = []
-    for case, res in zip(fact_cases, fact_results):
-        num_fields = len(case.fields)
+    for res in fact_results:
+        num_fields = len(res.extracted)
 
         eval_records.append(
             EvaluationRecord(
                 eval_type="fact",
-                name=case.id,
+                name=res.id,
                 dataset=str(args.data),
                 metrics={
                     "num_fields": float(num_fields),
+                    "num_calls": float(res.num_calls),
+                    "prompt_tokens": float(res.prompt_tokens),
                 },
                 thresholds=None,          # no thresholds yet
                 passed=True,              # structural check only for now
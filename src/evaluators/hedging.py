@@ -0,0 +1,207 @@
+# src/evaluators/hedging.py
+"""
+Hedged requests and retries to cut tail latency.
+
+HedgedClient keeps a rolling window of completion latencies per model. Once
+a request has been running longer than the configured percentile of that
+window, a duplicate is fired and whichever response arrives first wins; the
+hedge delay therefore adapts as the provider speeds up or slows down. The
+delay counts from when the primary starts executing, so time spent queued
+behind a saturated pool never triggers a hedge.
+Transient errors are retried with full-jitter exponential back-off.
+
+Every response that reports token usage (winner or loser) is priced with
+usage_eval.build_usage_record and handed to `on_usage`, tagged with
+meta["hedge"] ("primary" / "duplicate") and meta["won"], so the extra spend
+of hedging stays visible in the audit log.
+"""
+
+from __future__ import annotations
+
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, Optional, Tuple, Type
+
+from .common import ModelClient, ModelResponse
+from .usage_eval import LLMUsageRecord, ModelPricing, build_usage_record
+
+
+class LatencyTracker:
+    """Rolling per-model latency window; shareable across clients."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20) -> None:
+        self.window = window
+        self.min_samples = min_samples
+        self._lock = threading.Lock()
+        self._samples: Dict[str, Deque[float]] = {}
+
+    def record(self, model_id: str, latency_ms: float) -> None:
+        with self._lock:
+            self._samples.setdefault(model_id, deque(maxlen=self.window)).append(latency_ms)
+
+    def percentile(self, model_id: str, pct: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples.get(model_id, ()))
+        if len(samples) < self.min_samples:
+            return None
+        idx = min(len(samples) - 1, int(round(pct / 100.0 * (len(samples) - 1))))
+        return samples[idx]
+
+
+@dataclass
+class HedgeStats:
+    requests: int = 0
+    hedged: int = 0
+    hedge_wins: int = 0
+    retries: int = 0
+    extra_cost_usd: float = 0.0
+
+    @property
+    def hedge_rate(self) -> float:
+        return self.hedged / self.requests if self.requests else 0.0
+
+
+_USAGE_FIELDS = ("model", "input_tokens", "output_tokens")
+
+
+class _Started(threading.Event):
+    """Set by the worker when a call begins executing; `at` is its perf_counter start."""
+
+    at = 0.0
+
+TRANSIENT_ERRORS: Tuple[Type[BaseException], ...] = (TimeoutError, ConnectionError)
+
+
+class HedgedClient(ModelClient):
+    def __init__(
+        self,
+        inner: ModelClient,
+        *,
+        model_id: str,
+        percentile: float = 95.0,
+        tracker: Optional[LatencyTracker] = None,
+        pricing: Optional[ModelPricing] = None,
+        on_usage: Optional[Callable[[LLMUsageRecord], None]] = None,
+        max_retries: int = 2,
+        backoff_base_s: float = 0.2,
+        backoff_max_s: float = 10.0,
+        retry_on: Tuple[Type[BaseException], ...] = TRANSIENT_ERRORS,
+        max_workers: int = 16,
+        sleep: Callable[[float], None] = time.sleep,
+        rng: Callable[[], float] = random.random,
+    ) -> None:
+        self.inner = inner
+        self.model_id = model_id
+        self.percentile = percentile
+        self.tracker = tracker or LatencyTracker()
+        self.pricing = pricing
+        self.on_usage = on_usage
+        self.max_retries = max_retries
+        self.backoff_base_s = backoff_base_s
+        self.backoff_max_s = backoff_max_s
+        self.retry_on = retry_on
+        self.stats = HedgeStats()
+        self._sleep = sleep
+        self._rng = rng
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers)
+
+    def complete(self, prompt: str) -> ModelResponse:
+        with self._lock:
+            self.stats.requests += 1
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                return self._hedged(prompt)
+            except self.retry_on:
+                if attempt == self.max_retries:
+                    raise
+                with self._lock:
+                    self.stats.retries += 1
+                cap = min(self.backoff_max_s, self.backoff_base_s * (2 ** attempt))
+                self._sleep(self._rng() * cap)
+        raise AssertionError("unreachable")
+
+    def _timed(self, prompt: str, started: Optional["_Started"] = None) -> Tuple[ModelResponse, float]:
+        start = time.perf_counter()
+        if started is not None:
+            started.at = start
+            started.set()
+        resp = self.inner.complete(prompt)
+        return resp, (time.perf_counter() - start) * 1000.0
+
+    def _hedged(self, prompt: str) -> ModelResponse:
+        trace_id = uuid.uuid4().hex
+        started = _Started()
+        roles: Dict[Future, str] = {self._pool.submit(self._timed, prompt, started): "primary"}
+
+        delay_ms = self.tracker.percentile(self.model_id, self.percentile)
+        if delay_ms is not None:
+            started.wait()  # the hedge clock starts when the primary leaves the queue
+            remaining = delay_ms / 1000.0 - (time.perf_counter() - started.at)
+            done, _ = wait(list(roles), timeout=max(0.0, remaining))
+            if not done:
+                roles[self._pool.submit(self._timed, prompt)] = "duplicate"
+                with self._lock:
+                    self.stats.hedged += 1
+
+        winner: Optional[Future] = None
+        error: Optional[BaseException] = None
+        pending = set(roles)
+        while pending and winner is None:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in sorted(done, key=lambda f: roles[f] != "primary"):
+                if fut.exception() is None:
+                    winner = fut
+                    break
+                error = error or fut.exception()
+
+        hedged = len(roles) > 1
+        if winner is not None and roles[winner] == "duplicate":
+            with self._lock:
+                self.stats.hedge_wins += 1
+        for fut, role in roles.items():
+            fut.add_done_callback(
+                lambda f, role=role: self._settle(f, role, f is winner, hedged, trace_id)
+            )
+
+        if winner is None:
+            assert error is not None
+            raise error
+        return winner.result()[0]
+
+    def _settle(self, fut: Future, role: str, won: bool, hedged: bool, trace_id: str) -> None:
+        if fut.exception() is not None:
+            return
+        resp, latency_ms = fut.result()
+        self.tracker.record(self.model_id, latency_ms)
+
+        if self.pricing is None or not all(hasattr(resp, a) for a in _USAGE_FIELDS):
+            return
+        record = build_usage_record(
+            trace_id=trace_id,
+            resp=resp,  # type: ignore[arg-type]
+            pricing=self.pricing,
+            latency_ms=int(latency_ms),
+            meta={"hedge": role, "won": won, "hedged": hedged},
+        )
+        if hedged and not won:
+            with self._lock:
+                self.stats.extra_cost_usd += record.cost_usd
+        if self.on_usage is not None:
+            self.on_usage(record)
+
+    def close(self) -> None:
+        """Wait for outstanding (losing) requests so their usage is recorded."""
+        self._pool.shutdown(wait=True)
+
+    def __enter__(self) -> "HedgedClient":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
@@ -1,13 +1,14 @@
 from __future__ import annotations
 
 import argparse
-import json
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Protocol, Sequence
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Protocol, Sequence
 
 from .eval_writer import EvaluationRecord, append_evaluations
-from .common import DummyResponse, ModelClient, DummyModelClient
+from .common import DummyResponse, ModelClient, DummyModelClient, iter_jsonl
+from .checkpoint import Checkpoint, run_checkpointed
+from .runner import PromptRunner, chunked
 
 
 # -------------------------------
@@ -47,30 +48,30 @@ class JudgeDummyModel(ModelClient):
 # Dataset loader
 # -------------------------------
 
+def _parse_judge_case(raw: Dict[str, Any]) -> JudgeCase:
+    return JudgeCase(
+        id=raw["id"],
+        prompt=raw["prompt"],
+        reference=raw["reference"],
+        candidate=raw["candidate"],
+        max_score=float(raw.get("max_score", 10)),
+    )
+
+
+def iter_judge_cases(path: str | Path, *, shard: int = 0, num_shards: int = 1) -> Iterator[JudgeCase]:
+    return iter_jsonl(path, _parse_judge_case, shard=shard, num_shards=num_shards)
+
+
 def load_judge_cases(path: str | Path) -> List[JudgeCase]:
-    cases = []
-    for line in Path(path).read_text().splitlines():
-        if not line.strip():
-            continue
-        raw = json.loads(line)
-        cases.append(
-            JudgeCase(
-                id=raw["id"],
-                prompt=raw["prompt"],
-                reference=raw["reference"],
-                candidate=raw["candidate"],
-                max_score=float(raw.get("max_score", 10)),
-            )
-        )
-    return cases
+    return list(iter_judge_cases(path))
 
 
 # -------------------------------
 # Core evaluation
 # -------------------------------
 
-def evaluate_judge_case(model: ModelClient, case: JudgeCase) -> JudgeResult:
-    prompt = f"""
+def build_judge_prompt(case: JudgeCase) -> str:
+    return f"""
 You are an impartial evaluator.
 
 Compare candidate answer to the reference.
@@ -86,8 +87,9 @@ Reference: {case.reference}
 Candidate: {case.candidate}
 """.strip()
 
-    resp = model.complete(prompt)
-    text = resp.text.strip()
+
+def parse_judge_response(case: JudgeCase, text: str) -> JudgeResult:
+    text = text.strip()
 
     # parse score
     score_line = next(l for l in text.splitlines() if l.lower().startswith("score:"))
@@ -106,27 +108,67 @@ Candidate: {case.candidate}
     return JudgeResult(case.id, score, case.max_score, expl)
 
 
-def evaluate_judge_suite(model: ModelClient, cases: Sequence[JudgeCase]) -> List[JudgeResult]:
-    return [evaluate_judge_case(model, c) for c in cases]
+def evaluate_judge_case(model: ModelClient, case: JudgeCase) -> JudgeResult:
+    resp = model.complete(build_judge_prompt(case))
+    return parse_judge_response(case, resp.text)
+
+
+def iter_judge_suite(
+    model: ModelClient,
+    cases: Iterable[JudgeCase],
+    runner: Optional[PromptRunner] = None,
+) -> Iterator[JudgeResult]:
+    runner = runner or PromptRunner()
+    for chunk in chunked(cases, runner.chunk_size):
+        responses = runner.run(model, [build_judge_prompt(c) for c in chunk])
+        for c, r in zip(chunk, responses):
+            yield parse_judge_response(c, r.text)
+
+
+def evaluate_judge_suite(
+    model: ModelClient,
+    cases: Iterable[JudgeCase],
+    runner: Optional[PromptRunner] = None,
+) -> List[JudgeResult]:
+    return list(iter_judge_suite(model, cases, runner))
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--data", required=True, help="Path to judge JSONL dataset")
+    parser.add_argument("--concurrency", type=int, default=1, help="Requests kept in flight")
+    parser.add_argument("--batch-size", type=int, default=1, help="Prompts per complete_batch call")
+    parser.add_argument("--checkpoint", help="Journal finished cases to this JSONL file")
+    parser.add_argument("--resume", action="store_true", help="Skip cases already in --checkpoint")
     args = parser.parse_args()
+    if args.resume and not args.checkpoint:
+        parser.error("--resume requires --checkpoint")
 
-    judge_cases = load_judge_cases(args.data)
     client: ModelClient = JudgeDummyModel()
 
-    judge_results = evaluate_judge_suite(client, judge_cases)
+    runner = PromptRunner(concurrency=args.concurrency, batch_size=args.batch_size)
+    checkpoint = (
+        Checkpoint.for_dataset(
+            args.checkpoint, suite="judge", dataset_path=args.data, model=type(client).__name__
+        )
+        if args.checkpoint
+        else None
+    )
+    judge_results = run_checkpointed(
+        lambda: iter_judge_cases(args.data),
+        lambda cases: iter_judge_suite(client, cases, runner=runner),
+        checkpoint,
+        decode=lambda raw: JudgeResult(**raw),
+        resume=args.resume,
+    )
 
     eval_records: List[EvaluationRecord] = []
-    for case, res in zip(judge_cases, judge_results):
+    for res in judge_results:
         norm_score = res.score / res.max_score if res.max_score else 0.0
 
         eval_records.append(
             EvaluationRecord(
                 eval_type="judge",
-                name=case.id,
+                name=res.id,
                 dataset=str(args.data),
                 metrics={
                     "score": float(res.score),
@@ -140,5 +182,9 @@ if __name__ == "__main__":
                 notes=res.explanation,
             )
         )
+    print(
+        f"cases={len(eval_records)}, mean_batch_size={runner.stats.mean_batch_size:.1f}, "
+        f"mean_batch_latency_ms={runner.stats.mean_batch_latency_ms:.1f}"
+    )
 
     append_evaluations(eval_records)
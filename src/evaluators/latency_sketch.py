@@ -0,0 +1,239 @@
+# src/evaluators/latency_sketch.py
+"""
+Mergeable latency quantile sketches (DDSketch-style) for usage records.
+
+A LatencySketch counts values in logarithmically spaced buckets. Any
+quantile it reports is within `relative_accuracy` (default 1%) of the true
+value at that rank. Memory is bounded by `max_buckets`: beyond that, the
+lowest buckets are collapsed, which only affects the smallest values.
+Sketches with the same accuracy merge exactly by adding bucket counts, so
+per-segment or per-host sketches can be combined in any order.
+
+LatencySketches keeps one sketch per (model, meta[dimension], time bucket).
+It is fed record by record or as an AuditLogWriter listener, and it answers
+p50/p95/p99 over any window by merging the matching sketches.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .usage_eval import LLMUsageRecord
+
+
+class LatencySketch:
+    def __init__(self, relative_accuracy: float = 0.01, max_buckets: int = 2048) -> None:
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be in (0, 1)")
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._bins: Dict[int, int] = {}
+        self.zero_count = 0  # values <= 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def _index(self, value: float) -> int:
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def _value(self, index: int) -> float:
+        return 2 * self._gamma ** index / (self._gamma + 1)
+
+    def add(self, value: float, count: int = 1) -> None:
+        if value <= 0:
+            self.zero_count += count
+        else:
+            idx = self._index(value)
+            self._bins[idx] = self._bins.get(idx, 0) + count
+            if len(self._bins) > self.max_buckets:
+                self._collapse()
+        self.count += count
+        self.sum += value * count
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def _collapse(self) -> None:
+        keys = sorted(self._bins)
+        excess = keys[: len(keys) - self.max_buckets + 1]
+        folded = sum(self._bins.pop(k) for k in excess)
+        self._bins[excess[-1]] = folded  # the highest collapsed index absorbs them
+
+    def merge(self, other: "LatencySketch") -> None:
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("cannot merge sketches with different relative_accuracy")
+        for idx, n in other._bins.items():
+            self._bins[idx] = self._bins.get(idx, 0) + n
+        while len(self._bins) > self.max_buckets:
+            self._collapse()
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not 0 <= q <= 1:
+            raise ValueError("q must be in [0, 1]")
+        if self.count == 0:
+            return None
+        if q == 0:
+            return self.min
+        if q == 1:
+            return self.max
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if seen > rank:
+            return 0.0
+        for idx in sorted(self._bins):
+            seen += self._bins[idx]
+            if seen > rank:
+                return min(max(self._value(idx), self.min), self.max)
+        return self.max
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.sum / self.count if self.count else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "max_buckets": self.max_buckets,
+            "bins": sorted(self._bins.items()),
+            "zero_count": self.zero_count,
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+        }
+
+    @classmethod
+    def from_dict(cls, raw: Dict[str, Any]) -> "LatencySketch":
+        sketch = cls(raw["relative_accuracy"], raw["max_buckets"])
+        sketch._bins = {int(i): int(n) for i, n in raw["bins"]}
+        sketch.zero_count = raw["zero_count"]
+        sketch.count = raw["count"]
+        sketch.sum = raw["sum"]
+        if raw["count"]:
+            sketch.min, sketch.max = raw["min"], raw["max"]
+        return sketch
+
+
+_Key = Tuple[str, str, int]  # (model, dimension value, bucket start ms)
+
+
+class LatencySketches:
+    """Latency sketches per (model, meta[dimension], time bucket)."""
+
+    def __init__(
+        self,
+        *,
+        dimension: str = "route",
+        bucket_s: int = 3600,
+        relative_accuracy: float = 0.01,
+        max_buckets: int = 2048,
+    ) -> None:
+        self.dimension = dimension
+        self.bucket_ms = bucket_s * 1000
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self._lock = threading.Lock()
+        self._sketches: Dict[_Key, LatencySketch] = {}
+
+    def _sketch(self, key: _Key) -> LatencySketch:
+        sketch = self._sketches.get(key)
+        if sketch is None:
+            sketch = self._sketches[key] = LatencySketch(self.relative_accuracy, self.max_buckets)
+        return sketch
+
+    def add(self, record: LLMUsageRecord) -> None:
+        self.add_many([record])
+
+    def add_many(self, records: Iterable[LLMUsageRecord]) -> None:
+        with self._lock:
+            for r in records:
+                bucket = r.timestamp_ms - r.timestamp_ms % self.bucket_ms
+                value = str(r.meta.get(self.dimension, ""))
+                self._sketch((r.model, value, bucket)).add(r.latency_ms)
+
+    def on_flush(self, batch: List[LLMUsageRecord], offsets: List[int]) -> None:
+        """AuditLogWriter listener."""
+        self.add_many(batch)
+
+    def merge(self, other: "LatencySketches") -> None:
+        if (other.dimension, other.bucket_ms) != (self.dimension, self.bucket_ms):
+            raise ValueError("cannot merge sketches with a different dimension or bucket size")
+        with self._lock:
+            for key, sketch in other._sketches.items():
+                self._sketch(key).merge(sketch)
+
+    def window(
+        self,
+        *,
+        model: Optional[str] = None,
+        value: Optional[str] = None,
+        since_ms: Optional[int] = None,
+        until_ms: Optional[int] = None,
+    ) -> LatencySketch:
+        """One sketch merged from every bucket matching the filters (bucket starts)."""
+        merged = LatencySketch(self.relative_accuracy, self.max_buckets)
+        with self._lock:
+            for (m, v, bucket), sketch in self._sketches.items():
+                if model is not None and m != model:
+                    continue
+                if value is not None and v != value:
+                    continue
+                if since_ms is not None and bucket < since_ms:
+                    continue
+                if until_ms is not None and bucket >= until_ms:
+                    continue
+                merged.merge(sketch)
+        return merged
+
+    def quantiles(self, qs: Sequence[float] = (0.5, 0.95, 0.99), **filters: Any) -> Dict[float, Optional[float]]:
+        sketch = self.window(**filters)
+        return {q: sketch.quantile(q) for q in qs}
+
+    # ---- persistence ----
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "dimension": self.dimension,
+                "bucket_s": self.bucket_ms // 1000,
+                "relative_accuracy": self.relative_accuracy,
+                "max_buckets": self.max_buckets,
+                "sketches": [
+                    {"model": m, "value": v, "bucket_start_ms": b, "sketch": s.to_dict()}
+                    for (m, v, b), s in sorted(self._sketches.items())
+                ],
+            }
+
+    @classmethod
+    def from_dict(cls, raw: Dict[str, Any]) -> "LatencySketches":
+        sketches = cls(
+            dimension=raw["dimension"],
+            bucket_s=raw["bucket_s"],
+            relative_accuracy=raw["relative_accuracy"],
+            max_buckets=raw["max_buckets"],
+        )
+        for entry in raw["sketches"]:
+            key = (entry["model"], entry["value"], entry["bucket_start_ms"])
+            sketches._sketches[key] = LatencySketch.from_dict(entry["sketch"])
+        return sketches
+
+    def save(self, path: str | Path) -> None:
+        path = Path(path)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps(self.to_dict()), encoding="utf-8")
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: str | Path) -> "LatencySketches":
+        return cls.from_dict(json.loads(Path(path).read_text(encoding="utf-8")))
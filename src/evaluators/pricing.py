@@ -0,0 +1,281 @@
+# src/evaluators/pricing.py
+"""
+Versioned pricing registry and vectorized cost / projection engine.
+
+Prices are loaded from `data/pricing_openai.jsonl`, which may be any of:
+
+- a JSON object of model -> {input_token_cost, output_token_cost}
+  (effective since forever);
+- a JSON object of model -> list of such dicts, each with `effective_from`;
+- JSON lines, one {model, input_token_cost, output_token_cost,
+  effective_from} per line.
+
+`effective_from` is an ISO date/datetime or epoch milliseconds. A record is
+priced with the newest version in effect at its timestamp (or the newest
+overall when no timestamps are given).
+
+`PricingRegistry.price` prices whole numpy columns at once, e.g. the output
+of audit_binary.scan_columns or SegmentedAuditLog.columns. `project` turns
+the same columns into monthly and what-if projections (swap models, scale
+output length).
+"""
+
+from __future__ import annotations
+
+import argparse
+import bisect
+import json
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .usage_eval import ModelPricing, iter_audit_log
+
+DEFAULT_PRICING_PATH = Path(__file__).resolve().parents[2] / "data" / "pricing_openai.jsonl"
+
+MONTH_MS = 30 * 24 * 3600 * 1000
+
+
+def _parse_effective(value: Any) -> int:
+    if value is None:
+        return 0
+    if isinstance(value, (int, float)):
+        return int(value)
+    ts = datetime.fromisoformat(str(value))
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return int(ts.timestamp() * 1000)
+
+
+class PricingRegistry:
+    def __init__(self) -> None:
+        # model -> (sorted effective_from_ms, matching ModelPricing)
+        self._versions: Dict[str, Tuple[List[int], List[ModelPricing]]] = {}
+
+    def add(self, model: str, pricing: ModelPricing, effective_from_ms: int = 0) -> None:
+        starts, prices = self._versions.setdefault(model, ([], []))
+        pos = bisect.bisect_left(starts, effective_from_ms)
+        if pos < len(starts) and starts[pos] == effective_from_ms:
+            prices[pos] = pricing
+        else:
+            starts.insert(pos, effective_from_ms)
+            prices.insert(pos, pricing)
+
+    def _add_entry(self, model: str, entry: Mapping[str, Any]) -> None:
+        self.add(
+            model,
+            ModelPricing(
+                input_token_cost=float(entry["input_token_cost"]),
+                output_token_cost=float(entry["output_token_cost"]),
+            ),
+            _parse_effective(entry.get("effective_from")),
+        )
+
+    @classmethod
+    def from_file(cls, path: str | Path = DEFAULT_PRICING_PATH) -> "PricingRegistry":
+        registry = cls()
+        text = Path(path).read_text(encoding="utf-8")
+        try:
+            doc = json.loads(text)
+        except json.JSONDecodeError:
+            doc = None  # JSON lines
+
+        if isinstance(doc, dict) and "model" not in doc:
+            for model, spec in doc.items():
+                for entry in spec if isinstance(spec, list) else [spec]:
+                    registry._add_entry(model, entry)
+        else:
+            for line_no, line in enumerate(text.splitlines(), start=1):
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                    registry._add_entry(entry["model"], entry)
+                except (json.JSONDecodeError, KeyError) as exc:
+                    raise ValueError(f"{path}:{line_no}: invalid price entry ({exc})") from exc
+        return registry
+
+    @property
+    def models(self) -> List[str]:
+        return sorted(self._versions)
+
+    def get(self, model: str, at_ms: Optional[int] = None) -> ModelPricing:
+        starts, prices = self._lookup(model)
+        if at_ms is None:
+            return prices[-1]
+        pos = bisect.bisect_right(starts, at_ms) - 1
+        if pos < 0:
+            raise KeyError(f"no price for {model!r} effective at {at_ms}")
+        return prices[pos]
+
+    def _lookup(self, model: str) -> Tuple[List[int], List[ModelPricing]]:
+        try:
+            return self._versions[model]
+        except KeyError:
+            raise KeyError(f"no pricing for model {model!r}; known: {', '.join(self.models)}") from None
+
+    def price(
+        self,
+        models: Any,
+        input_tokens: Any,
+        output_tokens: Any,
+        timestamps_ms: Optional[Any] = None,
+    ) -> np.ndarray:
+        """Cost in dollars for every row; all arguments are equal-length arrays."""
+        models = np.asarray(models, dtype=object)
+        inverse, names = pd.factorize(models)  # hash-based; np.unique sorts strings
+        in_rate = np.empty(len(models), dtype=np.float64)
+        out_rate = np.empty(len(models), dtype=np.float64)
+        ts = None if timestamps_ms is None else np.asarray(timestamps_ms, dtype=np.int64)
+
+        for k, name in enumerate(names):
+            starts, prices = self._lookup(name)
+            rows = np.flatnonzero(inverse == k)
+            ins = np.array([p.input_token_cost for p in prices])
+            outs = np.array([p.output_token_cost for p in prices])
+            if ts is None:
+                version = np.full(len(rows), len(prices) - 1)
+            else:
+                version = np.searchsorted(np.asarray(starts), ts[rows], side="right") - 1
+                if (version < 0).any():
+                    raise KeyError(f"no price for {name!r} effective at {int(ts[rows][version < 0].min())}")
+            in_rate[rows] = ins[version]
+            out_rate[rows] = outs[version]
+
+        return (
+            np.asarray(input_tokens, dtype=np.float64) * in_rate
+            + np.asarray(output_tokens, dtype=np.float64) * out_rate
+        )
+
+
+# ---- projections ----
+
+@dataclass(frozen=True)
+class Projection:
+    observed_days: float
+    baseline_usd: float
+    scenario_usd: float
+    # None when the records span no time, so there is nothing to extrapolate from
+    baseline_monthly_usd: Optional[float]
+    scenario_monthly_usd: Optional[float]
+    by_model: Dict[str, Tuple[float, float]] = field(default_factory=dict)  # model -> (baseline, scenario)
+
+    @property
+    def delta_monthly_usd(self) -> Optional[float]:
+        if self.baseline_monthly_usd is None or self.scenario_monthly_usd is None:
+            return None
+        return self.scenario_monthly_usd - self.baseline_monthly_usd
+
+
+def project(
+    columns: Mapping[str, np.ndarray],
+    registry: PricingRegistry,
+    *,
+    model_map: Optional[Mapping[str, str]] = None,
+    output_scale: float = 1.0,
+    scenario_registry: Optional[PricingRegistry] = None,
+    effective_dated: bool = False,
+) -> Projection:
+    """
+    Baseline vs. scenario cost for observed traffic, and both extrapolated
+    to a 30-day month from the observed time span. With no span (no
+    records, or all at one timestamp) the monthly figures are None.
+
+    `columns` needs model, input_tokens, output_tokens and timestamp_ms.
+    The scenario moves traffic to `model_map[model]`, scales output tokens
+    by `output_scale`, and prices them with `scenario_registry` (a new price
+    sheet) or with `registry` if none is given. Set `effective_dated` to
+    price the baseline at each record's timestamp instead of current prices.
+    """
+    models = np.asarray(columns["model"], dtype=object)
+    inp = np.asarray(columns["input_tokens"])
+    out = np.asarray(columns["output_tokens"])
+    ts = np.asarray(columns["timestamp_ms"])
+
+    codes, names = pd.factorize(models)
+    baseline = registry.price(models, inp, out, ts if effective_dated else None)
+    target = models
+    if model_map:
+        target = np.array([model_map.get(n, n) for n in names], dtype=object)[codes]
+    scenario = (scenario_registry or registry).price(target, inp, np.rint(out * output_scale))
+
+    span_ms = float(ts.max() - ts.min()) if len(ts) else 0.0
+    scale = MONTH_MS / span_ms if span_ms > 0 else None
+
+    by_model: Dict[str, Tuple[float, float]] = {}
+    base_sum = np.bincount(codes, weights=baseline, minlength=len(names))
+    scen_sum = np.bincount(codes, weights=scenario, minlength=len(names))
+    for name, b, s in zip(list(names), base_sum.tolist(), scen_sum.tolist()):
+        by_model[name] = (b, s)
+
+    return Projection(
+        observed_days=span_ms / 86_400_000,
+        baseline_usd=float(baseline.sum()),
+        scenario_usd=float(scenario.sum()),
+        baseline_monthly_usd=None if scale is None else float(baseline.sum()) * scale,
+        scenario_monthly_usd=None if scale is None else float(scenario.sum()) * scale,
+        by_model=by_model,
+    )
+
+
+def usage_columns(path: str | Path) -> Dict[str, np.ndarray]:
+    """Pricing columns from a JSONL log, a binary log (.tgb) or a segment directory."""
+    wanted = ["timestamp_ms", "input_tokens", "output_tokens", "model"]
+    path = Path(path)
+    if path.is_dir():
+        from .audit_segments import SegmentedAuditLog
+
+        with SegmentedAuditLog(path) as log:
+            return log.columns(wanted)
+    if path.suffix == ".tgb":
+        from .audit_binary import scan_columns
+
+        return scan_columns(path, wanted)
+
+    records = list(iter_audit_log(path))
+    return {
+        "timestamp_ms": np.array([r.timestamp_ms for r in records], dtype=np.int64),
+        "input_tokens": np.array([r.input_tokens for r in records], dtype=np.int64),
+        "output_tokens": np.array([r.output_tokens for r in records], dtype=np.int64),
+        "model": np.array([r.model for r in records], dtype=object),
+    }
+
+
+def _swap_arg(value: str) -> Tuple[str, str]:
+    old, sep, new = value.partition("=")
+    if not sep or not old or not new:
+        raise argparse.ArgumentTypeError(f"expected OLD=NEW, got {value!r}")
+    return old, new
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-price audit-log traffic and project monthly spend")
+    parser.add_argument("log", help="JSONL log, .tgb binary log, or segment directory")
+    parser.add_argument("--pricing", default=str(DEFAULT_PRICING_PATH))
+    parser.add_argument("--new-pricing", help="Price sheet for the scenario (defaults to --pricing)")
+    parser.add_argument(
+        "--swap", action="append", default=[], type=_swap_arg, metavar="OLD=NEW", help="Move OLD traffic to NEW"
+    )
+    parser.add_argument("--output-scale", type=float, default=1.0, help="Scale output tokens in the scenario")
+    args = parser.parse_args()
+
+    registry = PricingRegistry.from_file(args.pricing)
+    proj = project(
+        usage_columns(args.log),
+        registry,
+        model_map=dict(args.swap),
+        output_scale=args.output_scale,
+        scenario_registry=PricingRegistry.from_file(args.new_pricing) if args.new_pricing else None,
+    )
+    print(f"observed {proj.observed_days:.2f} days")
+    for model, (base, scen) in sorted(proj.by_model.items()):
+        print(f"  {model:<24} baseline=${base:,.4f} scenario=${scen:,.4f}")
+    if proj.delta_monthly_usd is None:
+        print("monthly projection unavailable: the log spans no time")
+    else:
+        print(f"monthly baseline=${proj.baseline_monthly_usd:,.2f} scenario=${proj.scenario_monthly_usd:,.2f} "
+              f"delta=${proj.delta_monthly_usd:,.2f}")
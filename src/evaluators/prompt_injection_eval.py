@@ -1,9 +1,11 @@
 from __future__ import annotations
 
-import json
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Literal, Protocol, Sequence, Callable
+from typing import Any, Dict, Iterable, Iterator, List, Literal, Optional, Protocol, Callable
+
+from .common import iter_jsonl
+from .runner import PromptRunner, chunked
 
 SafetyLabel = Literal["safe_refusal", "unsafe_leak"]
 
@@ -47,26 +49,26 @@ class ModelClient(Protocol):
 # Load dataset
 # ------------------------------------------------------------------------------
 
-def load_prompt_injection_cases(path: str | Path) -> List[PromptInjectionCase]:
+def _parse_prompt_injection_case(raw: Dict[str, Any]) -> PromptInjectionCase:
+    return PromptInjectionCase(
+        id=raw["id"],
+        attack_prompt=raw["attack_prompt"],
+        expected_label=raw["expected_label"],
+        category=raw.get("category", "default"),
+    )
+
+
+def iter_prompt_injection_cases(
+    path: str | Path, *, shard: int = 0, num_shards: int = 1
+) -> Iterator[PromptInjectionCase]:
     p = Path(path)
     if not p.exists():
         raise FileNotFoundError(f"Dataset not found: {p}")
+    return iter_jsonl(p, _parse_prompt_injection_case, shard=shard, num_shards=num_shards)
 
-    items: List[PromptInjectionCase] = []
-    for line in p.read_text(encoding="utf-8").splitlines():
-        if not line.strip():
-            continue
-
-        raw = json.loads(line)
-        items.append(
-            PromptInjectionCase(
-                id=raw["id"],
-                attack_prompt=raw["attack_prompt"],
-                expected_label=raw["expected_label"],
-                category=raw.get("category", "default"),
-            )
-        )
-    return items
+
+def load_prompt_injection_cases(path: str | Path) -> List[PromptInjectionCase]:
+    return list(iter_prompt_injection_cases(path))
 
 
 # ------------------------------------------------------------------------------
@@ -111,19 +113,21 @@ def classify_safety(response_text: str) -> SafetyLabel:
 # Main evaluation
 # ------------------------------------------------------------------------------
 
-def evaluate_prompt_injection(
+def iter_prompt_injection(
     model: ModelClient,
-    cases: Sequence[PromptInjectionCase],
+    cases: Iterable[PromptInjectionCase],
     classifier: Callable[[str], SafetyLabel] = classify_safety,
-) -> List[PromptInjectionResult]:
-    results: List[PromptInjectionResult] = []
+    runner: Optional[PromptRunner] = None,
+) -> Iterator[PromptInjectionResult]:
+    runner = runner or PromptRunner()
+
+    for chunk in chunked(cases, runner.chunk_size):
+        responses = runner.run(model, [c.attack_prompt for c in chunk])
 
-    for c in cases:
-        response = model.complete(c.attack_prompt)
-        pred = classifier(response.text)
+        for c, response in zip(chunk, responses):
+            pred = classifier(response.text)
 
-        results.append(
-            PromptInjectionResult(
+            yield PromptInjectionResult(
                 id=c.id,
                 category=c.category,
                 expected_label=c.expected_label,
@@ -131,6 +135,12 @@ def evaluate_prompt_injection(
                 is_correct=(pred == c.expected_label),
                 response_text=response.text,
             )
-        )
 
-    return results
+
+def evaluate_prompt_injection(
+    model: ModelClient,
+    cases: Iterable[PromptInjectionCase],
+    classifier: Callable[[str], SafetyLabel] = classify_safety,
+    runner: Optional[PromptRunner] = None,
+) -> List[PromptInjectionResult]:
+    return list(iter_prompt_injection(model, cases, classifier, runner))
@@ -0,0 +1,215 @@
+# src/evaluators/rate_limit.py
+"""
+Rate-limit and budget aware dispatch in front of a ModelClient.
+
+Each model gets two token buckets, one for requests/min and one for
+tokens/min, refilled continuously at `headroom` x the provider limit. A
+request waits until both buckets can cover it, so throughput settles just
+under the limits instead of bursting into 429s and backing off. Buckets may
+go into debt (a prompt larger than the burst allowance still goes through,
+and later requests pay for it), which keeps the long-run rate exact.
+
+Prompt tokens are estimated before sending; the actual counts reported by
+the response (when it exposes `input_tokens` / `output_tokens`) are used to
+reconcile the tokens/min bucket and the dollar budget afterwards. The
+budget reserves the prompt estimate plus `max_output_tokens` per call, so
+spend stays within the limit up to the error of that estimate (provided the
+provider honours the output cap). `estimate_tokens` is a heuristic: a
+prompt it under-counts settles above its reservation, and the overrun is
+only seen by later reservations.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional, Tuple
+
+from .common import ModelClient, ModelResponse, estimate_tokens
+from .usage_eval import ModelPricing, calculate_cost
+
+
+class BudgetExceededError(RuntimeError):
+    """Raised before sending a request that could push spend past the budget."""
+
+
+# -----------------------------
+# Token buckets
+# -----------------------------
+
+@dataclass
+class TokenBucket:
+    capacity: float
+    rate_per_s: float
+    tokens: float
+    updated_at: float
+
+    def _refill(self, now: float) -> None:
+        elapsed = max(0.0, now - self.updated_at)
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate_per_s)
+        self.updated_at = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        self._refill(now)
+        needed = min(amount, self.capacity)
+        if self.tokens >= needed:
+            return 0.0
+        return (needed - self.tokens) / self.rate_per_s
+
+    def take(self, amount: float, now: float) -> None:
+        self._refill(now)
+        self.tokens -= amount
+
+
+@dataclass(frozen=True)
+class ModelLimits:
+    requests_per_min: float
+    tokens_per_min: float
+
+
+class RateLimiter:
+    """Per-model request and token buckets, shareable across clients and threads."""
+
+    def __init__(
+        self,
+        limits: Dict[str, ModelLimits],
+        *,
+        headroom: float = 0.95,
+        burst_s: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.limits = dict(limits)
+        self.headroom = headroom
+        self.burst_s = burst_s
+        self.throttled_s = 0.0
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, Tuple[TokenBucket, TokenBucket]] = {}
+
+    def _new_bucket(self, per_min: float, now: float) -> TokenBucket:
+        rate = per_min * self.headroom / 60.0
+        capacity = max(1.0, rate * self.burst_s)
+        return TokenBucket(capacity=capacity, rate_per_s=rate, tokens=capacity, updated_at=now)
+
+    def _buckets_for(self, model_id: str, now: float) -> Optional[Tuple[TokenBucket, TokenBucket]]:
+        limits = self.limits.get(model_id)
+        if limits is None:
+            return None
+        if model_id not in self._buckets:
+            self._buckets[model_id] = (
+                self._new_bucket(limits.requests_per_min, now),
+                self._new_bucket(limits.tokens_per_min, now),
+            )
+        return self._buckets[model_id]
+
+    def acquire(self, model_id: str, tokens: int) -> None:
+        """Block until one request of `tokens` fits under the model's limits."""
+        while True:
+            with self._lock:
+                now = self._clock()
+                buckets = self._buckets_for(model_id, now)
+                if buckets is None:
+                    return
+                requests, token_bucket = buckets
+                wait = max(requests.wait_time(1, now), token_bucket.wait_time(tokens, now))
+                if wait <= 0.0:
+                    requests.take(1, now)
+                    token_bucket.take(tokens, now)
+                    return
+                self.throttled_s += wait
+            self._sleep(wait)
+
+    def adjust_tokens(self, model_id: str, delta: int) -> None:
+        """Charge (or refund) the difference between estimated and actual tokens."""
+        with self._lock:
+            now = self._clock()
+            buckets = self._buckets_for(model_id, now)
+            if buckets is not None:
+                buckets[1].take(delta, now)
+
+
+# -----------------------------
+# Dollar budget
+# -----------------------------
+
+@dataclass
+class Budget:
+    """
+    Dollar limit shared by clients. `reserve` refuses a request whose
+    reservation would not fit; `settle` swaps the reservation for the actual
+    cost, which can be higher when the reservation was under-estimated.
+    """
+
+    limit_usd: float
+    spent_usd: float = 0.0
+    reserved_usd: float = 0.0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def reserve(self, amount: float) -> None:
+        with self._lock:
+            if self.spent_usd + self.reserved_usd + amount > self.limit_usd:
+                raise BudgetExceededError(
+                    f"request reserving up to ${amount:.6f} would exceed budget "
+                    f"${self.limit_usd:.2f} (spent ${self.spent_usd:.6f})"
+                )
+            self.reserved_usd += amount
+
+    def settle(self, reserved: float, actual: float) -> None:
+        with self._lock:
+            self.reserved_usd -= reserved
+            self.spent_usd += actual
+
+
+# -----------------------------
+# Client wrapper
+# -----------------------------
+
+class RateLimitedClient(ModelClient):
+    def __init__(
+        self,
+        inner: ModelClient,
+        *,
+        model_id: str,
+        limiter: RateLimiter,
+        pricing: Optional[ModelPricing] = None,
+        budget: Optional[Budget] = None,
+        expected_output_tokens: int = 256,
+        max_output_tokens: Optional[int] = None,
+    ) -> None:
+        if budget is not None and pricing is None:
+            raise ValueError("a budget requires pricing for the model")
+        if budget is not None and max_output_tokens is None:
+            raise ValueError("a budget requires max_output_tokens to bound each request's cost")
+        self.inner = inner
+        self.model_id = model_id
+        self.limiter = limiter
+        self.pricing = pricing
+        self.budget = budget
+        self.expected_output_tokens = expected_output_tokens
+        self.max_output_tokens = max_output_tokens
+
+    def complete(self, prompt: str) -> ModelResponse:
+        est_in = estimate_tokens(prompt)
+        est_total = est_in + self.expected_output_tokens
+        reserved = 0.0
+        if self.budget is not None and self.pricing is not None:
+            reserved = calculate_cost(est_in, self.max_output_tokens, self.pricing)
+            self.budget.reserve(reserved)
+
+        try:
+            self.limiter.acquire(self.model_id, est_total)
+            resp = self.inner.complete(prompt)
+        except BaseException:
+            if self.budget is not None:
+                self.budget.settle(reserved, 0.0)
+            raise
+
+        in_tokens = getattr(resp, "input_tokens", est_in)
+        out_tokens = getattr(resp, "output_tokens", estimate_tokens(resp.text))
+        self.limiter.adjust_tokens(self.model_id, in_tokens + out_tokens - est_total)
+        if self.budget is not None and self.pricing is not None:
+            self.budget.settle(reserved, calculate_cost(in_tokens, out_tokens, self.pricing))
+        return resp
@@ -0,0 +1,274 @@
+# src/evaluators/runner.py
+"""
+Shared prompt dispatch for the evaluate_*_suite functions.
+
+Suites build their prompts up front and hand them to a PromptRunner, which
+keeps up to `concurrency` requests in flight and returns the responses in
+prompt order. Clients exposing `acomplete` are awaited directly; plain sync
+clients are adapted through a thread pool.
+
+With `batch_size > 1`, prompts are grouped into micro-batches and sent via
+`complete_batch`; clients without it but with `acomplete` have the batch's
+prompts awaited together, and plain clients fall back to sequential
+`complete`. `concurrency` bounds the number of batches in flight.
+MicroBatcher flushes a batch once it is full or `batch_window_ms` after its
+first prompt arrived. PromptRunner knows all prompts up front and flushes
+the last partial batch at once, so the window only matters when prompts
+trickle in, e.g. a MicroBatcher fed from a request handler.
+
+With `order_by_prefix`, prompts are dispatched in lexicographic order so
+that prompts sharing a context prefix (a passage, a resume) reach the
+backend back to back, which is what prefix-caching servers such as vLLM
+reuse. Responses are still returned in the caller's order. RunStats keeps
+an estimate of the prompt tokens covered by the previous prompt's prefix.
+
+Suites consume their cases in windows of `chunk_size` (see `chunked`), so
+memory stays flat for arbitrarily large streamed datasets; concurrency,
+batching and prefix ordering all operate within one window.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, Sequence, Set, Tuple, TypeVar
+
+from .common import ModelClient, ModelResponse, complete_batch, estimate_tokens
+
+T = TypeVar("T")
+
+
+def chunked(items: Iterable[T], size: int) -> Iterator[List[T]]:
+    """Split any iterable into lists of at most `size` items without materialising it."""
+    it = iter(items)
+    while True:
+        chunk = list(islice(it, max(1, size)))
+        if not chunk:
+            return
+        yield chunk
+
+
+@dataclass
+class RunStats:
+    """Dispatch metrics; a single-prompt call counts as a batch of one."""
+    prompts: int = 0
+    batches: int = 0
+    max_batch_size: int = 0
+    total_batch_latency_ms: float = 0.0
+    max_batch_latency_ms: float = 0.0
+    prompt_tokens: int = 0
+    reused_prefix_tokens: int = 0
+
+    def record_batch(self, size: int, latency_ms: float) -> None:
+        self.prompts += size
+        self.batches += 1
+        self.max_batch_size = max(self.max_batch_size, size)
+        self.total_batch_latency_ms += latency_ms
+        self.max_batch_latency_ms = max(self.max_batch_latency_ms, latency_ms)
+
+    @property
+    def mean_batch_size(self) -> float:
+        return self.prompts / self.batches if self.batches else 0.0
+
+    @property
+    def mean_batch_latency_ms(self) -> float:
+        return self.total_batch_latency_ms / self.batches if self.batches else 0.0
+
+    @property
+    def prefix_reuse_ratio(self) -> float:
+        return self.reused_prefix_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+
+    def record_prefix_reuse(self, dispatched: Sequence[str]) -> None:
+        previous = ""
+        for prompt in dispatched:
+            self.prompt_tokens += estimate_tokens(prompt)
+            self.reused_prefix_tokens += estimate_tokens(prompt[: common_prefix_len(previous, prompt)])
+            previous = prompt
+
+
+def common_prefix_len(a: str, b: str) -> int:
+    """Length of the shared prefix, found by bisection over C-level slice compares."""
+    lo, hi = 0, min(len(a), len(b))
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[:mid] == b[:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def _timed_batch(model: ModelClient, prompts: Sequence[str]) -> Tuple[List[ModelResponse], float]:
+    start = time.perf_counter()
+    responses = complete_batch(model, prompts)
+    return responses, (time.perf_counter() - start) * 1000.0
+
+
+class MicroBatcher:
+    """Collects submitted prompts into batches flushed on size or latency window."""
+
+    def __init__(
+        self,
+        model: ModelClient,
+        executor: Executor,
+        *,
+        max_size: int,
+        window_ms: float,
+        concurrency: int,
+        stats: RunStats,
+    ) -> None:
+        self._model = model
+        self._executor = executor
+        self._max_size = max(1, max_size)
+        self._window_s = max(0.0, window_ms) / 1000.0
+        self._sem = asyncio.Semaphore(max(1, concurrency))
+        self._stats = stats
+        self._loop = asyncio.get_running_loop()
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    def submit(self, prompt: str) -> asyncio.Future:
+        fut = self._loop.create_future()
+        self._pending.append((prompt, fut))
+        if len(self._pending) >= self._max_size:
+            self.flush()
+        elif self._timer is None:
+            self._timer = self._loop.call_later(self._window_s, self.flush)
+        return fut
+
+    def flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = self._loop.create_task(self._dispatch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def aclose(self) -> None:
+        self.flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks)
+
+    async def _complete(self, prompts: List[str]) -> Tuple[List[ModelResponse], float]:
+        acomplete = getattr(self._model, "acomplete", None)
+        if acomplete is None or hasattr(self._model, "complete_batch"):
+            return await self._loop.run_in_executor(self._executor, _timed_batch, self._model, prompts)
+        start = time.perf_counter()
+        responses = await asyncio.gather(*(acomplete(p) for p in prompts))
+        return list(responses), (time.perf_counter() - start) * 1000.0
+
+    async def _dispatch(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        async with self._sem:
+            prompts = [p for p, _ in batch]
+            try:
+                responses, latency_ms = await self._complete(prompts)
+            except Exception as exc:
+                for _, fut in batch:
+                    fut.set_exception(exc)
+                return
+
+        self._stats.record_batch(len(batch), latency_ms)
+        for (_, fut), resp in zip(batch, responses):
+            fut.set_result(resp)
+
+
+@dataclass
+class PromptRunner:
+    concurrency: int = 1
+    batch_size: int = 1
+    batch_window_ms: float = 5.0
+    order_by_prefix: bool = False
+    chunk_size: int = 1024
+    stats: RunStats = field(default_factory=RunStats)
+
+    def run(self, model: ModelClient, prompts: Sequence[str]) -> List[ModelResponse]:
+        """Complete every prompt and return responses in the same order."""
+        order, dispatched = self._plan(prompts)
+        if self.concurrency <= 1 and not hasattr(model, "acomplete"):
+            return self._restore(order, self._run_sequential(model, dispatched))
+
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return self._restore(order, asyncio.run(self._dispatch(model, dispatched)))
+
+        # Already inside an event loop (e.g. a notebook): run on a side thread.
+        with ThreadPoolExecutor(max_workers=1) as side:
+            responses = side.submit(asyncio.run, self._dispatch(model, dispatched)).result()
+        return self._restore(order, responses)
+
+    async def arun(self, model: ModelClient, prompts: Sequence[str]) -> List[ModelResponse]:
+        order, dispatched = self._plan(prompts)
+        return self._restore(order, await self._dispatch(model, dispatched))
+
+    def _plan(self, prompts: Sequence[str]) -> Tuple[Optional[List[int]], List[str]]:
+        prompts = list(prompts)
+        order: Optional[List[int]] = None
+        if self.order_by_prefix:
+            order = sorted(range(len(prompts)), key=prompts.__getitem__)
+            prompts = [prompts[i] for i in order]
+        self.stats.record_prefix_reuse(prompts)
+        return order, prompts
+
+    @staticmethod
+    def _restore(order: Optional[List[int]], responses: List[ModelResponse]) -> List[ModelResponse]:
+        if order is None:
+            return responses
+        out: List[ModelResponse] = [None] * len(responses)  # type: ignore[list-item]
+        for pos, idx in enumerate(order):
+            out[idx] = responses[pos]
+        return out
+
+    def _run_sequential(self, model: ModelClient, prompts: List[str]) -> List[ModelResponse]:
+        size = max(1, self.batch_size)
+        out: List[ModelResponse] = []
+        for i in range(0, len(prompts), size):
+            chunk = prompts[i : i + size]
+            if size == 1:
+                start = time.perf_counter()
+                responses = [model.complete(chunk[0])]
+                latency_ms = (time.perf_counter() - start) * 1000.0
+            else:
+                responses, latency_ms = _timed_batch(model, chunk)
+            self.stats.record_batch(len(chunk), latency_ms)
+            out.extend(responses)
+        return out
+
+    async def _dispatch(self, model: ModelClient, prompts: Sequence[str]) -> List[ModelResponse]:
+        limit = max(1, self.concurrency)
+        loop = asyncio.get_running_loop()
+
+        with ThreadPoolExecutor(max_workers=limit) as pool:
+            if self.batch_size > 1:
+                batcher = MicroBatcher(
+                    model,
+                    pool,
+                    max_size=self.batch_size,
+                    window_ms=self.batch_window_ms,
+                    concurrency=limit,
+                    stats=self.stats,
+                )
+                futures = [batcher.submit(p) for p in prompts]
+                await batcher.aclose()
+                return list(await asyncio.gather(*futures))
+
+            sem = asyncio.Semaphore(limit)
+            acomplete = getattr(model, "acomplete", None)
+
+            async def one(prompt: str) -> ModelResponse:
+                async with sem:
+                    start = time.perf_counter()
+                    if acomplete is not None:
+                        resp = await acomplete(prompt)
+                    else:
+                        resp = await loop.run_in_executor(pool, model.complete, prompt)
+                    self.stats.record_batch(1, (time.perf_counter() - start) * 1000.0)
+                    return resp
+
+            return list(await asyncio.gather(*(one(p) for p in prompts)))
@@ -1,10 +1,14 @@
 from __future__ import annotations
 
+import atexit
 import json
+import os
+import queue
+import threading
 import time
 from dataclasses import asdict, dataclass
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Protocol
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Protocol, Tuple
 
 
 # -----------------------------
@@ -84,34 +88,231 @@ def build_usage_record(
 # Append-only audit log (JSONL)
 # -----------------------------
 
+def encode_audit_record(record: LLMUsageRecord) -> bytes:
+    return (json.dumps(asdict(record), ensure_ascii=False) + "\n").encode("utf-8")
+
+
 def append_audit_log(record: LLMUsageRecord, log_path: str | Path) -> None:
     path = Path(log_path)
     path.parent.mkdir(parents=True, exist_ok=True)
-    line = json.dumps(asdict(record), ensure_ascii=False)
-    with path.open("a", encoding="utf-8") as f:
-        f.write(line + "\n")
+    with path.open("ab") as f:
+        f.write(encode_audit_record(record))
 
 
-def read_audit_log(log_path: str | Path) -> List[LLMUsageRecord]:
+# Called after every flush with the batch and the byte offset of each line.
+AuditListener = Callable[[List[LLMUsageRecord], List[int]], None]
+
+
+class AuditLogWriter:
+    """
+    Buffered, group-committed audit log writer.
+
+    `write()` only enqueues the record. A background thread collects up to
+    `batch_size` records, waiting at most `flush_interval_s` after the first
+    one, and appends them with a single write. A crash therefore loses at
+    most one flush window of records.
+
+    fsync policy: `fsync_interval_s=0` fsyncs every flush, a positive value
+    fsyncs at most that often and whenever the queue drains (so the last
+    batch of a burst is not left waiting), and None leaves durability to
+    the OS.
+
+    The queue holds at most `max_queue` records. When it is full, `write()`
+    blocks, or drops the record and counts it in `dropped` when
+    `block=False`. Errors from the background thread are re-raised by the
+    next `write()`, `flush()` or `close()`. Use one writer per log file:
+    listener offsets assume nobody else appends to it. A writer that is
+    never closed is closed at interpreter exit, so queued records are still
+    written; close it yourself to see its errors.
+    """
+
+    _STOP = object()
+
+    def __init__(
+        self,
+        log_path: str | Path,
+        *,
+        flush_interval_s: float = 0.05,
+        batch_size: int = 512,
+        fsync_interval_s: Optional[float] = 0.0,
+        max_queue: int = 10_000,
+        block: bool = True,
+        listeners: Iterable[AuditListener] = (),
+    ) -> None:
+        self.path = Path(log_path)
+        self.flush_interval_s = flush_interval_s
+        self.batch_size = batch_size
+        self.fsync_interval_s = fsync_interval_s
+        self.block = block
+        self.listeners: List[AuditListener] = list(listeners)
+        self.dropped = 0
+        self.flushes = 0
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue)
+        self._error: Optional[BaseException] = None
+        self._closed = False
+        self._state_lock = threading.Lock()  # orders write() against close()
+        self._last_fsync = 0.0
+
+        self._fh = self._open()
+        self._thread = threading.Thread(target=self._run, name="audit-log-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def _raise_pending(self) -> None:
+        if self._error is not None:
+            raise RuntimeError(f"audit log writer failed: {self._error}") from self._error
+
+    def write(self, record: LLMUsageRecord) -> None:
+        self._raise_pending()
+        with self._state_lock:
+            # nothing may be enqueued behind the STOP sentinel
+            if self._closed:
+                raise RuntimeError("audit log writer is closed")
+            if self.block:
+                self._queue.put(record)
+                return
+            try:
+                self._queue.put_nowait(record)
+            except queue.Full:
+                self.dropped += 1
+
+    def flush(self) -> None:
+        """Block until every record enqueued so far has been written, or the worker has exited."""
+        q = self._queue
+        with q.all_tasks_done:
+            while q.unfinished_tasks and self._thread.is_alive():
+                q.all_tasks_done.wait(0.1)
+        self._raise_pending()
+
+    def close(self) -> None:
+        with self._state_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(self._STOP)
+        atexit.unregister(self.close)
+        self._thread.join()
+        self._finish(sync=self.fsync_interval_s is not None and self._error is None)
+        self._raise_pending()
+
+    def __enter__(self) -> "AuditLogWriter":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            item = self._queue.get()
+            batch: List[LLMUsageRecord] = []
+            if item is self._STOP:
+                stop = True
+            else:
+                batch.append(item)
+                deadline = time.monotonic() + self.flush_interval_s
+                while len(batch) < self.batch_size:
+                    timeout = deadline - time.monotonic()
+                    try:
+                        item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is self._STOP:
+                        stop = True
+                        break
+                    batch.append(item)
+
+            try:
+                if batch and self._error is None:
+                    self._commit(batch)
+            except BaseException as exc:
+                self._error = exc
+            finally:
+                for _ in range(len(batch) + (1 if stop else 0)):
+                    self._queue.task_done()
+
+    def _commit(self, batch: List[LLMUsageRecord]) -> None:
+        lines = [encode_audit_record(r) for r in batch]
+        now = time.monotonic()
+        due = now - self._last_fsync >= (self.fsync_interval_s or 0.0) or self._queue.empty()
+        sync = self.fsync_interval_s is not None and due
+        offsets = self._write(batch, lines, sync)
+        if sync:
+            self._last_fsync = now
+        self.flushes += 1
+        for listener in self.listeners:
+            listener(batch, offsets)
+
+    # ---- storage; overridden by writers that append somewhere other than one file ----
+
+    def _open(self) -> Any:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        return self.path.open("ab")
+
+    def _write(self, batch: List[LLMUsageRecord], lines: List[bytes], sync: bool) -> List[int]:
+        """Append the encoded batch; return the byte offset of each line."""
+        start = self._fh.tell()
+        offsets = []
+        for line in lines:
+            offsets.append(start)
+            start += len(line)
+        self._fh.write(b"".join(lines))
+        self._fh.flush()
+        if sync:
+            os.fsync(self._fh.fileno())
+        return offsets
+
+    def _finish(self, sync: bool) -> None:
+        if sync:
+            os.fsync(self._fh.fileno())
+        self._fh.close()
+
+
+def decode_audit_record(raw: Dict[str, Any]) -> LLMUsageRecord:
+    return LLMUsageRecord(
+        trace_id=raw["trace_id"],
+        model=raw["model"],
+        input_tokens=int(raw["input_tokens"]),
+        output_tokens=int(raw["output_tokens"]),
+        latency_ms=int(raw["latency_ms"]),
+        cost_usd=float(raw["cost_usd"]),
+        timestamp_ms=int(raw["timestamp_ms"]),
+        meta=dict(raw.get("meta", {})),
+    )
+
+
+def iter_audit_log(log_path: str | Path) -> Iterator[LLMUsageRecord]:
+    """Stream records one line at a time; memory stays flat for any log size."""
     path = Path(log_path)
     if not path.exists():
-        return []
-
-    records: List[LLMUsageRecord] = []
-    for line in path.read_text(encoding="utf-8").splitlines():
-        if not line.strip():
-            continue
-        raw = json.loads(line)
-        records.append(
-            LLMUsageRecord(
-                trace_id=raw["trace_id"],
-                model=raw["model"],
-                input_tokens=int(raw["input_tokens"]),
-                output_tokens=int(raw["output_tokens"]),
-                latency_ms=int(raw["latency_ms"]),
-                cost_usd=float(raw["cost_usd"]),
-                timestamp_ms=int(raw["timestamp_ms"]),
-                meta=dict(raw.get("meta", {})),
-            )
-        )
-    return records
+        return
+    with path.open("rb") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            yield decode_audit_record(json.loads(line))
+
+
+def scan_audit_log(log_path: str | Path, start: int = 0) -> Iterator[Tuple[int, int, LLMUsageRecord]]:
+    """
+    (offset, end, record) for each complete line from byte `start` on, for
+    consumers that track how far into the log they have read. Blank lines
+    come through with record None so `end` still moves past them. A trailing
+    line without its newline is still being written and is not yielded.
+    """
+    path = Path(log_path)
+    if not path.exists():
+        return
+    with path.open("rb") as f:
+        f.seek(start)
+        offset = start
+        for line in f:
+            if not line.endswith(b"\n"):
+                return
+            end = offset + len(line)
+            yield offset, end, decode_audit_record(json.loads(line)) if line.strip() else None
+            offset = end
+
+
+def read_audit_log(log_path: str | Path) -> List[LLMUsageRecord]:
+    return list(iter_audit_log(log_path))
@@ -0,0 +1,279 @@
+# src/evaluators/usage_rollup.py
+"""
+Incrementally maintained usage/cost rollups for the JSONL audit log.
+
+Each record is added to one row per (model, meta key, meta value, time
+bucket), and also to a model-wide total row. Total rows are flagged in
+their own `total` column, so no meta key or value can collide with them. A
+row holds the request count, input/output tokens, cost_usd and the latency
+sum. Rows live in a SQLite file next to the log (`audit.jsonl.rollup.sqlite`).
+Questions like "spend per model, route and day" are answered from these
+rows, so they cost O(buckets) instead of O(records).
+
+Like AuditIndex, the rollup remembers how many bytes of the log it has
+consumed. `update()` folds in only new lines, `on_flush` does the same as an
+AuditLogWriter listener, and `rebuild()` recomputes everything from the raw
+log to verify it. The log can also be an audit_segments.SegmentedAuditLog:
+its offsets are log-wide, so rotation is not mistaken for a replaced log.
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .audit_segments import ACTIVE, SegmentedAuditLog
+from .usage_eval import LLMUsageRecord, encode_audit_record, scan_audit_log
+
+MODEL_TOTAL = None  # dimension of the per-model total rows
+
+
+@dataclass(frozen=True)
+class RollupRow:
+    model: str
+    dimension: Optional[str]
+    value: str
+    bucket_start_ms: int
+    requests: int
+    input_tokens: int
+    output_tokens: int
+    cost_usd: float
+    latency_ms_sum: int
+
+    @property
+    def mean_latency_ms(self) -> float:
+        return self.latency_ms_sum / self.requests if self.requests else 0.0
+
+
+_Key = Tuple[int, str, str, str, int]  # (total, model, dimension, value, bucket)
+
+
+class UsageRollup:
+    def __init__(
+        self,
+        log_path: str | Path | SegmentedAuditLog,
+        *,
+        path: Optional[str | Path] = None,
+        bucket_s: int = 3600,
+        dimensions: Optional[Sequence[str]] = None,
+    ) -> None:
+        """
+        `dimensions` limits which meta keys are rolled up; by default every
+        meta key with a scalar value is. A SegmentedAuditLog keeps its rollup
+        in its own directory.
+        """
+        self.segmented = log_path if isinstance(log_path, SegmentedAuditLog) else None
+        self.log_path = self.segmented.root / ACTIVE if self.segmented is not None else Path(log_path)
+        if path is None:
+            path = self.log_path.with_name(self.log_path.name + ".rollup.sqlite")
+        self.path = Path(path)
+        self.bucket_ms = bucket_s * 1000
+        self.dimensions = tuple(dimensions) if dimensions is not None else None
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        columns = [row[1] for row in self._db.execute("PRAGMA table_info(rollups)")]
+        if columns and "total" not in columns:
+            # rollups from before the `total` column: drop them, the next update() rebuilds
+            self._db.execute("DROP TABLE rollups")
+            self._set_meta("consumed_bytes", 0)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS rollups ("
+            " total INTEGER NOT NULL, model TEXT NOT NULL, dimension TEXT NOT NULL, value TEXT NOT NULL,"
+            " bucket INTEGER NOT NULL, requests INTEGER NOT NULL,"
+            " input_tokens INTEGER NOT NULL, output_tokens INTEGER NOT NULL,"
+            " cost_usd REAL NOT NULL, latency_ms_sum INTEGER NOT NULL,"
+            " PRIMARY KEY (total, dimension, value, model, bucket)) WITHOUT ROWID"
+        )
+        stored = self._meta("bucket_ms")
+        if stored and stored != self.bucket_ms:
+            raise ValueError(f"{self.path} was built with {stored // 1000}s buckets, not {bucket_s}s")
+        self._set_meta("bucket_ms", self.bucket_ms)
+        self._db.commit()
+
+    # ---- bookkeeping ----
+
+    def _meta(self, key: str, default: int = 0) -> int:
+        row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def _set_meta(self, key: str, value: int) -> None:
+        self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def _clear(self) -> None:
+        self._db.execute("DELETE FROM rollups")
+        self._set_meta("consumed_bytes", 0)
+
+    def _check_identity(self) -> None:
+        if self.segmented is not None:
+            if self.segmented.size < self._meta("consumed_bytes"):
+                self._clear()
+            return
+        st = os.stat(self.log_path)
+        if st.st_ino != self._meta("inode", st.st_ino) or st.st_size < self._meta("consumed_bytes"):
+            self._clear()
+        self._set_meta("inode", st.st_ino)
+
+    def _keys(self, rec: LLMUsageRecord) -> Iterable[_Key]:
+        bucket = rec.timestamp_ms - rec.timestamp_ms % self.bucket_ms
+        yield 1, rec.model, "", "", bucket
+        for key, value in rec.meta.items():
+            if self.dimensions is not None and key not in self.dimensions:
+                continue
+            if isinstance(value, (str, int, float, bool)):
+                yield 0, rec.model, key, str(value), bucket
+
+    def _fold(self, records: Iterable[LLMUsageRecord], end: int) -> None:
+        # pre-aggregate in memory so each touched row is written once per batch
+        acc: Dict[_Key, List[float]] = defaultdict(lambda: [0, 0, 0, 0.0, 0])
+        for rec in records:
+            for key in self._keys(rec):
+                a = acc[key]
+                a[0] += 1
+                a[1] += rec.input_tokens
+                a[2] += rec.output_tokens
+                a[3] += rec.cost_usd
+                a[4] += rec.latency_ms
+        self._db.executemany(
+            "INSERT INTO rollups (total, model, dimension, value, bucket, requests, input_tokens,"
+            " output_tokens, cost_usd, latency_ms_sum) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+            " ON CONFLICT (total, dimension, value, model, bucket) DO UPDATE SET"
+            " requests = requests + excluded.requests,"
+            " input_tokens = input_tokens + excluded.input_tokens,"
+            " output_tokens = output_tokens + excluded.output_tokens,"
+            " cost_usd = cost_usd + excluded.cost_usd,"
+            " latency_ms_sum = latency_ms_sum + excluded.latency_ms_sum",
+            [(*key, *a) for key, a in acc.items()],
+        )
+        self._set_meta("consumed_bytes", end)
+        self._db.commit()
+
+    # ---- maintenance ----
+
+    def update(self, chunk_records: int = 100_000) -> int:
+        """Fold in lines appended since the last update; returns how many."""
+        if not self.log_path.exists():
+            return 0
+        with self._lock:
+            self._check_identity()
+            end = self._meta("consumed_bytes")
+            total = 0
+            chunk: List[LLMUsageRecord] = []
+            for _, end, rec in self._scan(end):
+                if rec is None:
+                    continue
+                chunk.append(rec)
+                if len(chunk) >= chunk_records:
+                    self._fold(chunk, end)
+                    total += len(chunk)
+                    chunk = []
+            if chunk or end != self._meta("consumed_bytes"):  # also moves past trailing blank lines
+                self._fold(chunk, end)
+                total += len(chunk)
+            return total
+
+    def _scan(self, start: int) -> Iterator[Tuple[int, int, Optional[LLMUsageRecord]]]:
+        if self.segmented is not None:
+            return self.segmented.scan(start)
+        return scan_audit_log(self.log_path, start)
+
+    def on_flush(self, batch: List[LLMUsageRecord], offsets: List[int]) -> None:
+        """AuditLogWriter listener: fold a batch straight from memory."""
+        with self._lock:
+            self._check_identity()
+            gap = not batch or offsets[0] != self._meta("consumed_bytes")
+            if not gap:
+                self._fold(batch, offsets[-1] + len(encode_audit_record(batch[-1])))
+        if gap:
+            self.update()
+
+    def rebuild(self) -> int:
+        """Recompute every rollup from the raw log."""
+        with self._lock:
+            self._clear()
+            self._db.commit()
+        return self.update()
+
+    # ---- queries ----
+
+    def query(
+        self,
+        *,
+        dimension: Optional[str] = MODEL_TOTAL,
+        model: Optional[str] = None,
+        value: Optional[str] = None,
+        since_ms: Optional[int] = None,
+        until_ms: Optional[int] = None,
+        bucket_s: Optional[int] = None,
+    ) -> List[RollupRow]:
+        """
+        Rows for one dimension (MODEL_TOTAL = per-model totals), optionally re-bucketed
+        to a coarser `bucket_s` (a multiple of the stored bucket, e.g. 86400
+        for daily). Time bounds apply to bucket starts.
+        """
+        size = self.bucket_ms if bucket_s is None else bucket_s * 1000
+        if size % self.bucket_ms:
+            raise ValueError(f"bucket_s must be a multiple of {self.bucket_ms // 1000}")
+
+        sql = (
+            "SELECT model, dimension, value, bucket - bucket % ? AS b, SUM(requests),"
+            " SUM(input_tokens), SUM(output_tokens), SUM(cost_usd), SUM(latency_ms_sum)"
+            " FROM rollups WHERE total = ? AND dimension = ?"
+        )
+        params: List[object] = [size, int(dimension is MODEL_TOTAL), dimension or ""]
+        for column, op, arg in (
+            ("model", "=", model),
+            ("value", "=", value),
+            ("bucket", ">=", since_ms),
+            ("bucket", "<", until_ms),
+        ):
+            if arg is not None:
+                sql += f" AND {column} {op} ?"
+                params.append(arg)
+        sql += " GROUP BY model, dimension, value, b ORDER BY b, model, value"
+
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+        return [RollupRow(model, dimension, *rest) for model, _, *rest in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self) -> "UsageRollup":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+if __name__ == "__main__":
+    import argparse
+    from datetime import datetime, timezone
+
+    parser = argparse.ArgumentParser(description="Usage/cost rollups over a JSONL audit log")
+    parser.add_argument("log", help="Audit log path")
+    parser.add_argument("command", choices=["update", "rebuild", "report"])
+    parser.add_argument("--dimension", default=MODEL_TOTAL, help="Meta key to break down by (e.g. route)")
+    parser.add_argument("--bucket-s", type=int, default=86400, help="Report granularity in seconds")
+    args = parser.parse_args()
+
+    with UsageRollup(args.log) as rollup:
+        if args.command == "rebuild":
+            print(f"rebuilt from {rollup.rebuild()} records")
+        elif args.command == "update":
+            print(f"folded in {rollup.update()} records")
+        else:
+            rollup.update()
+            for row in rollup.query(dimension=args.dimension, bucket_s=args.bucket_s):
+                start = datetime.fromtimestamp(row.bucket_start_ms / 1000, tz=timezone.utc)
+                print(
+                    f"{start:%Y-%m-%d %H:%M}  {row.model:<20} {row.value:<16} "
+                    f"requests={row.requests} cost_usd={row.cost_usd:.4f} "
+                    f"mean_latency_ms={row.mean_latency_ms:.1f}"
+                )
@@ -3,42 +3,73 @@ Simple Word Error Rate (WER) and Character Error Rate (CER) evaluator.
 Usage:
     python -m evaluators.wer
     python -m evaluators.wer --pred data/pred.txt --ref data/ref.txt
+    python -m evaluators.wer --pred pred.jsonl --ref ref.jsonl --stream --key id --scores-out scores.jsonl
+    python -m evaluators.wer --pred data/pred.txt --ref data/ref.txt --max-cer 0.1
+    python -m evaluators.wer --pred data/pred.txt --ref data/ref.txt --score-store results/wer_scores.sqlite
 """
 
-import argparse, json, os
+import argparse, json, math, os, re, string
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, astuple, dataclass
+from functools import lru_cache
+from itertools import zip_longest
 from pathlib import Path
+from typing import IO, TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
+import Levenshtein
+import numpy as np
+
+from .common import iter_jsonl, open_text
 from .eval_writer import EvaluationRecord, append_evaluations
-from jiwer import wer
 
-# Optional: some JiWER versions removed compute_measures
-try:
-    from jiwer import compute_measures
-    _HAS_COMPUTE_MEASURES = True
-except ImportError:
-    _HAS_COMPUTE_MEASURES = False
+if TYPE_CHECKING:
+    from .wer_store import ScoreStore
 
 
-def load_file(path: str):
-    """Load JSON or text file and return a list of strings."""
-    with open(path, "r", encoding="utf-8-sig") as f:
-        text = f.read().strip()
-        if not text:
-            return []
-        if text.startswith("{"):
+_TRANSCRIPT_KEYS = ("expected", "predicted", "refs", "preds", "transcripts")
+
+
+def iter_transcripts(path: str):
+    """
+    Yield transcripts from a JSON or text file.
+
+    Plain-text files (optionally .gz/.zst) are streamed line by line; a JSON
+    document with one of the known list keys has to be parsed whole.
+    """
+    with open_text(path) as f:
+        first = ""
+        for first in f:
+            if first.strip():
+                break
+        else:
+            return
+
+        if first.lstrip().startswith("{"):
+            text = (first + f.read()).strip()
             try:
                 data = json.loads(text)
-                for key in ("expected", "predicted", "refs", "preds", "transcripts"):
+                for key in _TRANSCRIPT_KEYS:
                     if key in data:
-                        return data[key]
+                        yield from data[key]
+                        return
             except json.JSONDecodeError:
                 pass
-        return [line.strip() for line in text.splitlines() if line.strip()]
+            yield from (line.strip() for line in text.splitlines() if line.strip())
+            return
+
+        yield first.strip()
+        for line in f:
+            if line.strip():
+                yield line.strip()
+
+
+def load_file(path: str):
+    """Load JSON or text file and return a list of strings."""
+    return list(iter_transcripts(path))
 
 
 def char_error_rate(refs, preds):
     """Compute average CER and per-sample CERs."""
-    import Levenshtein
     total_chars, total_distance = 0, 0
     cer_scores = []
     for r, p in zip(refs, preds):
@@ -54,48 +85,539 @@ def char_error_rate(refs, preds):
     return avg_cer, cer_scores
 
 
-def evaluate_stt(pred_file: str, ref_file: str):
+# ---- normalization ----
+
+_QUOTES = str.maketrans({"\u2019": "'", "\u2018": "'", "\u02bc": "'"})
+# apostrophes are dropped (after contraction expansion); other punctuation splits words
+_PUNCTUATION = str.maketrans(
+    {c: (None if c == "'" else " ") for c in string.punctuation + "\u201c\u201d\u00ab\u00bb\u2013\u2014\u2026\u00bf\u00a1"}
+)
+_CONTRACTION_WORDS = {"won't": "will not", "can't": "can not", "shan't": "shall not", "let's": "let us", "ain't": "is not"}
+_CONTRACTION_SUFFIXES = {"n't": " not", "'re": " are", "'s": " is", "'d": " would", "'ll": " will", "'ve": " have", "'m": " am"}
+_CONTRACTION_RE = re.compile(
+    r"\b(?:" + "|".join(map(re.escape, _CONTRACTION_WORDS)) + r")\b"
+    r"|(?<=\w)(?:" + "|".join(map(re.escape, _CONTRACTION_SUFFIXES)) + r")\b",
+    re.IGNORECASE,
+)
+_NUMBER_RE = re.compile(r"\d{1,3}(?:,\d{3}(?!\d))+(?:\.\d+)?|\d+(?:\.\d+)?")
+_ONES = "zero one two three four five six seven eight nine ten eleven twelve thirteen fourteen fifteen sixteen seventeen eighteen nineteen".split()
+_TENS = "_ _ twenty thirty forty fifty sixty seventy eighty ninety".split()
+_SCALES = ((10**12, "trillion"), (10**9, "billion"), (10**6, "million"), (1000, "thousand"), (100, "hundred"))
+
+
+def _int_to_words(n: int) -> str:
+    if n < 20:
+        return _ONES[n]
+    if n < 100:
+        return _TENS[n // 10] + ("" if n % 10 == 0 else " " + _ONES[n % 10])
+    if n >= 10**15:
+        return " ".join(_ONES[int(d)] for d in str(n))  # read long digit strings out one by one
+    size, name = next((size, name) for size, name in _SCALES if n >= size)
+    head, rest = divmod(n, size)
+    return f"{_int_to_words(head)} {name}" + ("" if rest == 0 else " " + _int_to_words(rest))
+
+
+def _number_to_words(match: "re.Match[str]") -> str:
+    whole, _, frac = match.group().replace(",", "").partition(".")
+    words = _int_to_words(int(whole))
+    if frac:
+        words += " point " + " ".join(_ONES[int(d)] for d in frac)
+    return f" {words} "
+
+
+@dataclass(frozen=True)
+class NormalizationConfig:
+    """What TextNormalizer does to a transcript; recorded with every normalized evaluation."""
+    lowercase: bool = False
+    expand_contractions: bool = False
+    numbers_to_words: bool = False
+    remove_punctuation: bool = False
+    replacements: Tuple[Tuple[str, str], ...] = ()  # word -> word, applied last
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class TextNormalizer:
+    """
+    A NormalizationConfig compiled once into translation tables and regexes.
+    `normalize` (text) and `words` (tokens) are memoized, so WER and CER,
+    and repeated references across runs, share one normalization per string.
+    Whitespace is always collapsed and stripped.
+    """
+
+    def __init__(self, config: NormalizationConfig = NormalizationConfig(), *, cache_size: int = 1 << 16) -> None:
+        self.config = config
+        self._replacements = dict(config.replacements)
+        self.normalize = lru_cache(maxsize=cache_size)(self._normalize)
+        self.words = lru_cache(maxsize=cache_size)(self._words)
+
+    def _normalize(self, text: str) -> str:
+        cfg = self.config
+        if cfg.expand_contractions or cfg.remove_punctuation:
+            text = text.translate(_QUOTES)
+        if cfg.lowercase:
+            text = text.lower()
+        if cfg.expand_contractions:
+            text = _CONTRACTION_RE.sub(self._expand, text)
+        if cfg.numbers_to_words:
+            text = _NUMBER_RE.sub(_number_to_words, text)
+        if cfg.remove_punctuation:
+            text = text.translate(_PUNCTUATION)
+        tokens = text.split()
+        if self._replacements:
+            tokens = [self._replacements.get(t, t) for t in tokens]
+        return " ".join(t for t in tokens if t)
+
+    @staticmethod
+    def _expand(match: "re.Match[str]") -> str:
+        found = match.group()
+        lower = found.lower()
+        expanded = _CONTRACTION_WORDS.get(lower) or _CONTRACTION_SUFFIXES[lower]
+        return expanded.upper() if found.isupper() else expanded
+
+    def _words(self, text: str) -> Tuple[str, ...]:
+        normalized = self.normalize(text)
+        return tuple(normalized.split(" ")) if normalized else ()
+
+
+# ---- alignment engine ----
+
+_MULTI_SPACE = re.compile(r"\s\s+")
+
+
+def split_words(text: str) -> List[str]:
+    """Tokenize like JiWER's default transform: collapse whitespace runs, strip, split on spaces."""
+    return [w for w in _MULTI_SPACE.sub(" ", text).strip().split(" ") if w]
+
+
+@dataclass(frozen=True)
+class PairScore:
+    """Word alignment counts and character distance for one ref/pred pair."""
+    hits: int
+    substitutions: int
+    deletions: int
+    insertions: int
+    char_distance: int
+    ref_chars: int
+
+    @property
+    def ref_words(self) -> int:
+        return self.hits + self.substitutions + self.deletions
+
+    @property
+    def wer(self) -> float:
+        # JiWER scores an empty reference as the number of inserted words
+        errors = self.substitutions + self.deletions + self.insertions
+        return errors / self.ref_words if self.ref_words else float(self.insertions)
+
+    @property
+    def cer(self) -> float:
+        return self.char_distance / self.ref_chars if self.ref_chars else 0.0
+
+
+def align_pair(ref: str, pred: str, normalizer: Optional[TextNormalizer] = None) -> PairScore:
+    """
+    One word-level alignment (the same Levenshtein backtrace JiWER uses)
+    and one character distance per pair. Nothing else re-aligns the pair.
+    Without a normalizer, words are split the way JiWER does by default.
+    """
+    if normalizer is None:
+        ref_words, pred_words = split_words(ref), split_words(pred)
+    else:
+        ref_words, pred_words = normalizer.words(ref), normalizer.words(pred)
+        ref, pred = normalizer.normalize(ref), normalizer.normalize(pred)
+    subs = dels = ins = 0
+    for tag, _, _ in Levenshtein.editops(ref_words, pred_words):
+        if tag == "replace":
+            subs += 1
+        elif tag == "delete":
+            dels += 1
+        else:
+            ins += 1
+    return PairScore(
+        hits=len(ref_words) - subs - dels,
+        substitutions=subs,
+        deletions=dels,
+        insertions=ins,
+        char_distance=Levenshtein.distance(ref, pred) if ref else 0,
+        ref_chars=len(ref),
+    )
+
+
+@dataclass
+class CorpusTotals:
+    """Running corpus aggregates; every field is a plain sum, so totals merge by addition."""
+    utterances: int = 0
+    hits: int = 0
+    substitutions: int = 0
+    deletions: int = 0
+    insertions: int = 0
+    char_distance: int = 0
+    ref_chars: int = 0
+
+    def add(self, score: PairScore) -> None:
+        self.utterances += 1
+        self.hits += score.hits
+        self.substitutions += score.substitutions
+        self.deletions += score.deletions
+        self.insertions += score.insertions
+        self.char_distance += score.char_distance
+        self.ref_chars += score.ref_chars
+
+    def merge(self, other: "CorpusTotals") -> None:
+        for name in self.__dataclass_fields__:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+
+    @property
+    def ref_words(self) -> int:
+        return self.hits + self.substitutions + self.deletions
+
+    @property
+    def wer(self) -> float:
+        """Corpus WER (errors over all reference words), as jiwer.wer(refs, preds)."""
+        errors = self.substitutions + self.deletions + self.insertions
+        return errors / self.ref_words if self.ref_words else float(self.insertions)
+
+    @property
+    def cer(self) -> float:
+        return self.char_distance / self.ref_chars if self.ref_chars else 0.0
+
+
+def score_pairs(
+    refs: Iterable[str], preds: Iterable[str], normalizer: Optional[TextNormalizer] = None
+) -> Tuple[List[float], List[float], CorpusTotals]:
+    """Per-sample WERs and CERs plus corpus totals from a single pass over the pairs."""
+    totals = CorpusTotals()
+    wer_scores: List[float] = []
+    cer_scores: List[float] = []
+    for r, p in zip(refs, preds):
+        score = align_pair(r, p, normalizer)
+        wer_scores.append(score.wer)
+        cer_scores.append(score.cer)
+        totals.add(score)
+    return wer_scores, cer_scores, totals
+
+
+# ---- CER gating ----
+
+def bounded_char_distance(ref: str, pred: str, max_distance: int) -> Optional[int]:
+    """
+    Exact character distance if it is at most `max_distance`, else None.
+    The length difference rejects hopeless pairs for free; otherwise the
+    banded Levenshtein stops as soon as the band exceeds the cutoff.
+    """
+    if abs(len(ref) - len(pred)) > max_distance:
+        return None
+    dist = Levenshtein.distance(ref, pred, score_cutoff=max_distance)
+    return dist if dist <= max_distance else None
+
+
+def _max_char_errors(ref_chars: int, max_cer: float) -> int:
+    # largest distance with distance / ref_chars <= max_cer, robust to float rounding
+    k = math.floor(max_cer * ref_chars)
+    while (k + 1) / ref_chars <= max_cer:
+        k += 1
+    while k >= 0 and k / ref_chars > max_cer:
+        k -= 1
+    return k
+
+
+@dataclass(frozen=True)
+class CERGate:
+    """Pass/fail per utterance at CER <= max_cer; exact CERs only for passing ones."""
+    max_cer: float
+    cer_scores: List[Optional[float]]  # None = over the limit
+
+    @property
+    def passed(self) -> int:
+        return sum(c is not None for c in self.cer_scores)
+
+    @property
+    def failed(self) -> int:
+        return len(self.cer_scores) - self.passed
+
+    @property
+    def pass_rate(self) -> float:
+        return self.passed / len(self.cer_scores) if self.cer_scores else 1.0
+
+
+def cer_gate(
+    refs: Iterable[str], preds: Iterable[str], max_cer: float, normalizer: Optional[TextNormalizer] = None
+) -> CERGate:
+    scores: List[Optional[float]] = []
+    for r, p in zip(refs, preds):
+        if normalizer is not None:
+            r, p = normalizer.normalize(r), normalizer.normalize(p)
+        if not r:
+            scores.append(0.0)  # same convention as char_error_rate
+            continue
+        dist = bounded_char_distance(r, p, _max_char_errors(len(r), max_cer))
+        scores.append(None if dist is None else dist / len(r))
+    return CERGate(max_cer, scores)
+
+
+# ---- parallel scoring ----
+
+def _score_chunk(
+    refs: Sequence[str], preds: Sequence[str], config: Optional[NormalizationConfig]
+) -> Tuple[np.ndarray, np.ndarray, Tuple[int, ...]]:
+    # Worker entry point: per-sample arrays plus the chunk's integer totals.
+    normalizer = None if config is None else TextNormalizer(config)
+    wer_scores, cer_scores, totals = score_pairs(refs, preds, normalizer)
+    return (
+        np.array(wer_scores, dtype=np.float64),
+        np.array(cer_scores, dtype=np.float64),
+        astuple(totals),
+    )
+
+
+def score_pairs_parallel(
+    refs: Sequence[str],
+    preds: Sequence[str],
+    *,
+    processes: Optional[int] = None,
+    chunk_size: int = 20_000,
+    normalizer: Optional[TextNormalizer] = None,
+) -> Tuple[List[float], List[float], CorpusTotals]:
+    """
+    score_pairs over contiguous chunks in worker processes. Chunks come back
+    in order as float64 arrays and integer sums, so the merged result is
+    bit-identical to score_pairs: per-sample values are computed the same
+    way and every total is an exact integer sum. Workers rebuild the
+    normalizer from its config.
+    """
+    n = min(len(refs), len(preds))
+    if processes == 1 or n <= chunk_size:
+        return score_pairs(refs, preds, normalizer)
+
+    starts = range(0, n, chunk_size)
+    config = None if normalizer is None else normalizer.config
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        parts = list(
+            pool.map(
+                _score_chunk,
+                (refs[i : i + chunk_size] for i in starts),
+                (preds[i : i + chunk_size] for i in starts),
+                (config for _ in starts),
+            )
+        )
+
+    totals = CorpusTotals()
+    for _, _, counts in parts:
+        totals.merge(CorpusTotals(*counts))
+    wer_scores = np.concatenate([w for w, _, _ in parts]).tolist()
+    cer_scores = np.concatenate([c for _, c, _ in parts]).tolist()
+    return wer_scores, cer_scores, totals
+
+
+def evaluate_stt(
+    pred_file: str,
+    ref_file: str,
+    *,
+    processes: Optional[int] = 1,
+    normalizer: Optional[TextNormalizer] = None,
+    store: Optional["ScoreStore"] = None,
+):
+    """
+    `processes` > 1 (or None for all cores) scores chunks in a process pool.
+    With a `store` (wer_store.ScoreStore), only pairs it has not seen under
+    this normalization are aligned; the rest come from the store. The file
+    pair names the store's snapshot, so unchanged lines are not re-hashed.
+    """
     refs = load_file(ref_file)
     preds = load_file(pred_file)
 
     if len(refs) != len(preds):
         print(f"⚠️ line count mismatch: refs={len(refs)} preds={len(preds)}")
 
-    # Per-sample WERs
-    wer_scores = [wer([r], [p]) for r, p in zip(refs, preds)]
+    if store is not None:
+        dataset = f"ref={Path(ref_file).resolve()},pred={Path(pred_file).resolve()}"
+        wer_scores, cer_scores, totals = store.score(refs, preds, normalizer, dataset=dataset, processes=processes)
+    else:
+        wer_scores, cer_scores, totals = score_pairs_parallel(refs, preds, processes=processes, normalizer=normalizer)
     avg_wer = sum(wer_scores) / len(wer_scores) if wer_scores else 0.0
 
-    # Per-sample CERs
-    avg_cer, cer_scores = char_error_rate(refs, preds)
-
     results = {
         "avg_wer": avg_wer,
-        "avg_cer": avg_cer,
+        "avg_cer": totals.cer,
+        "corpus_wer": totals.wer,
+        "num_pairs": totals.utterances,
         "wer_scores": wer_scores,
         "cer_scores": cer_scores,
+        "hits": totals.hits,
+        "substitutions": totals.substitutions,
+        "deletions": totals.deletions,
+        "insertions": totals.insertions,
+        "ref_words": totals.ref_words,
+        "ref_chars": totals.ref_chars,
+        "normalization": None if normalizer is None else normalizer.config.to_dict(),
     }
 
-    # Optionally include detailed measures
-    if _HAS_COMPUTE_MEASURES:
-        measures = compute_measures(refs, preds)
-        results.update({
-            "substitutions": measures.get("substitutions", 0),
-            "deletions": measures.get("deletions", 0),
-            "insertions": measures.get("insertions", 0),
-        })
-
     print(f"\n✅ WER: {avg_wer:.3f}")
-    print(f"✅ CER: {avg_cer:.3f}")
+    print(f"✅ CER: {totals.cer:.3f}")
 
     return results
 
 
+# ---- streaming ----
+
+def _keyed_pairs(
+    ref_file: str, pred_file: str, key: str, text_field: str, unpaired: Dict[str, int]
+) -> Iterator[Tuple[str, str, str]]:
+    """
+    (key, ref, pred) from two JSONL files read in lockstep. A record waits
+    only until its partner shows up in the other file, so memory is bounded
+    by how far the two files are out of order, not by their length.
+    """
+    parse = lambda raw: (str(raw[key]), str(raw[text_field]).strip())
+    waiting: Tuple[Dict[str, str], Dict[str, str]] = ({}, {})  # refs, preds
+    sources = (iter_jsonl(ref_file, parse), iter_jsonl(pred_file, parse))
+    for ref_item, pred_item in zip_longest(*sources):
+        for side, item in ((0, ref_item), (1, pred_item)):
+            if item is None:
+                continue
+            k, text = item
+            other = waiting[1 - side]
+            if k in other:
+                partner = other.pop(k)
+                yield (k, text, partner) if side == 0 else (k, partner, text)
+            elif k in waiting[side]:
+                raise ValueError(f"{(ref_file, pred_file)[side]}: duplicate key {k!r}")
+            else:
+                waiting[side][k] = text
+    unpaired["refs"], unpaired["preds"] = len(waiting[0]), len(waiting[1])
+
+
+def _line_pairs(ref_file: str, pred_file: str, unpaired: Dict[str, int]) -> Iterator[Tuple[int, str, str]]:
+    """(index, ref, pred) from two transcript files zipped line by line; leftovers are only counted."""
+    index = 0
+    for ref, pred in zip_longest(iter_transcripts(ref_file), iter_transcripts(pred_file)):
+        if ref is None:
+            unpaired["preds"] += 1
+        elif pred is None:
+            unpaired["refs"] += 1
+        else:
+            yield index, ref, pred
+            index += 1
+
+
+def stream_stt(
+    pred_file: str,
+    ref_file: str,
+    *,
+    key: Optional[str] = None,
+    text_field: str = "text",
+    scores_out: Optional[str] = None,
+    normalizer: Optional[TextNormalizer] = None,
+):
+    """
+    Constant-memory counterpart of evaluate_stt: pairs are scored as they
+    are read and only running totals are kept. With `key`, both files are
+    JSONL and records are matched by `record[key]` (order may differ);
+    otherwise they are zipped line by line. Per-sample scores go to
+    `scores_out` (JSONL) instead of the result.
+    """
+    unpaired = {"refs": 0, "preds": 0}
+    if key is None:
+        pairs: Iterator[Tuple[object, str, str]] = _line_pairs(ref_file, pred_file, unpaired)
+    else:
+        pairs = _keyed_pairs(ref_file, pred_file, key, text_field, unpaired)
+
+    totals = CorpusTotals()
+    wer_sum = 0.0
+    out: Optional[IO[str]] = None
+    if scores_out:
+        Path(scores_out).parent.mkdir(parents=True, exist_ok=True)
+        out = open(scores_out, "w", encoding="utf-8")
+    try:
+        for ident, ref, pred in pairs:
+            score = align_pair(ref, pred, normalizer)
+            totals.add(score)
+            wer_sum += score.wer
+            if out is not None:
+                row = {
+                    "key" if key else "index": ident,
+                    "wer": score.wer,
+                    "cer": score.cer,
+                    "substitutions": score.substitutions,
+                    "deletions": score.deletions,
+                    "insertions": score.insertions,
+                    "ref_words": score.ref_words,
+                }
+                out.write(json.dumps(row) + "\n")
+    finally:
+        if out is not None:
+            out.close()
+
+    if unpaired["refs"] or unpaired["preds"]:
+        print(f"⚠️ unpaired transcripts: refs={unpaired['refs']} preds={unpaired['preds']}")
+
+    avg_wer = wer_sum / totals.utterances if totals.utterances else 0.0
+    print(f"\n✅ WER: {avg_wer:.3f}")
+    print(f"✅ CER: {totals.cer:.3f}")
+
+    return {
+        "avg_wer": avg_wer,
+        "avg_cer": totals.cer,
+        "corpus_wer": totals.wer,
+        "num_pairs": totals.utterances,
+        "unpaired_refs": unpaired["refs"],
+        "unpaired_preds": unpaired["preds"],
+        "hits": totals.hits,
+        "substitutions": totals.substitutions,
+        "deletions": totals.deletions,
+        "insertions": totals.insertions,
+        "ref_words": totals.ref_words,
+        "ref_chars": totals.ref_chars,
+        "normalization": None if normalizer is None else normalizer.config.to_dict(),
+    }
+
+
+def _replacement_arg(value: str) -> Tuple[str, str]:
+    old, sep, new = value.partition("=")
+    if not sep or not old:
+        raise argparse.ArgumentTypeError(f"expected OLD=NEW, got {value!r}")
+    return old, new
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--pred", default="data/pred.txt")
     parser.add_argument("--ref", default="data/ref.txt")
     parser.add_argument("--no-write-json", action="store_true")
+    parser.add_argument("--processes", type=int, default=1, help="Worker processes (0 = all cores)")
+    parser.add_argument("--stream", action="store_true", help="Score pairs as they are read (constant memory)")
+    parser.add_argument("--key", help="With --stream: match JSONL records by this field instead of by line")
+    parser.add_argument("--text-field", default="text", help="With --key: field holding the transcript")
+    parser.add_argument("--scores-out", help="With --stream: write per-sample scores to this JSONL file")
+    parser.add_argument("--score-store", help="SQLite file of per-utterance scores; re-runs only align changed pairs")
+    parser.add_argument("--max-cer", type=float, help="Only gate each utterance at CER <= this (bounded distance)")
+    parser.add_argument("--lowercase", action="store_true", help="Normalize: lowercase")
+    parser.add_argument("--expand-contractions", action="store_true", help="Normalize: don't -> do not")
+    parser.add_argument("--numbers-to-words", action="store_true", help="Normalize: 42 -> forty two")
+    parser.add_argument("--remove-punctuation", action="store_true", help="Normalize: drop punctuation")
+    parser.add_argument(
+        "--replace", action="append", default=[], type=_replacement_arg, metavar="OLD=NEW",
+        help="Normalize: map word OLD to NEW",
+    )
     args = parser.parse_args()
+    if args.max_cer is not None:
+        # the gate reads both files in memory and runs serially, without a store
+        unsupported = {"--stream": args.stream, "--processes": args.processes != 1, "--score-store": args.score_store}
+        combined = [flag for flag, used in unsupported.items() if used]
+        if combined:
+            parser.error(f"--max-cer cannot be combined with {', '.join(combined)}")
+
+    config = NormalizationConfig(
+        lowercase=args.lowercase,
+        expand_contractions=args.expand_contractions,
+        numbers_to_words=args.numbers_to_words,
+        remove_punctuation=args.remove_punctuation,
+        replacements=tuple(args.replace),
+    )
+    normalizer = TextNormalizer(config) if config != NormalizationConfig() else None
+    run_config = None if normalizer is None else {"normalization": config.to_dict()}
 
     if not Path(args.pred).exists():
         print(f"Error: Prediction file '{args.pred}' not found.")
@@ -104,10 +626,38 @@ if __name__ == "__main__":
         print(f"Error: Reference file '{args.ref}' not found.")
         exit(1)
 
-    results = evaluate_stt(args.pred, args.ref)
+    if args.max_cer is not None:
+        gate = cer_gate(load_file(args.ref), load_file(args.pred), args.max_cer, normalizer)
+        print(f"✅ CER <= {gate.max_cer}: {gate.passed}/{len(gate.cer_scores)} passed ({gate.pass_rate:.1%})")
+        record = EvaluationRecord(
+            eval_type="wer",
+            name="stt_cer_gate",
+            dataset=f"ref={args.ref},pred={args.pred}",
+            metrics={"cer_pass_rate": gate.pass_rate, "cer_failed": float(gate.failed)},
+            thresholds={"max_cer": gate.max_cer},
+            passed=gate.failed == 0,
+            num_examples=len(gate.cer_scores),
+            tags=["stt", "gate"],
+            notes="Bounded edit distance; exact CER only below the cutoff",
+            config=run_config,
+        )
+    else:
+        if args.stream:
+            results = stream_stt(
+                args.pred, args.ref, key=args.key, text_field=args.text_field,
+                scores_out=args.scores_out, normalizer=normalizer,
+            )
+        elif args.score_store:
+            from .wer_store import ScoreStore
+
+            with ScoreStore(args.score_store) as store:
+                results = evaluate_stt(
+                    args.pred, args.ref, processes=args.processes or None, normalizer=normalizer, store=store
+                )
+                print(f"aligned {store.last_scored} new or changed pairs of {results['num_pairs']}")
+        else:
+            results = evaluate_stt(args.pred, args.ref, processes=args.processes or None, normalizer=normalizer)
 
-    # -------- NEW: write to evaluations.json --------
-    if not args.no_write_json:
         record = EvaluationRecord(
             eval_type="wer",
             name="stt_wer",
@@ -115,11 +665,14 @@ if __name__ == "__main__":
             metrics={
                 "avg_wer": float(results["avg_wer"]),
                 "avg_cer": float(results["avg_cer"]),
+                "corpus_wer": float(results["corpus_wer"]),
             },
-            num_examples=len(results["wer_scores"]),
+            num_examples=results["num_pairs"],
             tags=["stt"],
-            notes="JiWER-based WER/CER",
+            notes="JiWER-compatible WER/CER (single-pass alignment)",
+            config=run_config,
         )
 
+    # -------- NEW: write to evaluations.json --------
+    if not args.no_write_json:
         append_evaluations([record])
-
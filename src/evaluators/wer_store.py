@@ -0,0 +1,359 @@
+# src/evaluators/wer_store.py
+"""
+Persistent per-utterance WER/CER components for incremental re-scoring.
+
+Every scored pair is stored in SQLite under a content key: a hash of the
+normalized reference, the normalized prediction and the normalization
+config. A row holds the alignment counts (hits, S/D/I) and the character
+distance, which is everything per-sample scores and corpus totals are
+built from. On a re-run, pairs whose key is already stored are not
+aligned again. Only new or changed pairs are scored, and the aggregates
+are rebuilt from the stored components. The numbers are identical to a
+full run.
+
+    store = ScoreStore("results/wer_scores.sqlite")
+    wer_scores, cer_scores, totals = store.score(refs, preds, normalizer)
+    print(store.last_scored, "of", totals.utterances, "pairs needed aligning")
+
+With a `dataset` name, the store also keeps a snapshot of that dataset's
+last run: its refs, preds and component array. A re-run diffs the new
+lists against the snapshot, so only changed or appended indices are hashed,
+looked up and aligned; everything else is copied from the snapshot array.
+Without a snapshot, every pair is hashed and looked up in `scores` (a join
+against a temp table of the run's keys, so other runs' rows are never
+read). Rows for pairs no current dataset uses are removed with `prune`:
+
+    store.prune([(refs, preds, normalizer), (other_refs, other_preds, None)])
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import fields
+from itertools import repeat
+from operator import ne
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .eval_writer import EVALS_PATH
+from .wer import CorpusTotals, NormalizationConfig, PairScore, TextNormalizer, align_pair
+
+SCORES_PATH = EVALS_PATH.parent / "wer_scores.sqlite"
+
+COMPONENTS = tuple(f.name for f in fields(PairScore))  # hits, S, D, I, char_distance, ref_chars
+_COMPONENT_DTYPE = np.dtype("<i8")
+
+_SNAPSHOT_SEP = "\x00"
+
+Run = Tuple[Sequence[str], Sequence[str], Optional[TextNormalizer]]  # (refs, preds, normalizer)
+
+
+def config_fingerprint(normalizer: Optional[TextNormalizer]) -> str:
+    """Stable text for the normalization config; "" is JiWER-default scoring."""
+    if normalizer is None:
+        return ""
+    return json.dumps(normalizer.config.to_dict(), sort_keys=True)
+
+
+def _pair_keys(refs: Iterable[str], preds: Iterable[str]) -> List[bytes]:
+    """
+    Content key per (normalized) pair; the config lives in its own column.
+    The ref length prefix keeps ("ab", "c") and ("a", "bc") apart. Hashing
+    every pair is the floor cost of a re-run, so this stays one expression.
+    """
+    b2 = hashlib.blake2b
+    return [b2(f"{len(r)}:{r}{p}".encode("utf-8"), digest_size=16).digest() for r, p in zip(refs, preds)]
+
+
+def _run_keys(refs: Sequence[str], preds: Sequence[str], normalizer: Optional[TextNormalizer]) -> List[bytes]:
+    if normalizer is None:
+        return _pair_keys(refs, preds)
+    norm = normalizer.normalize
+    return _pair_keys(map(norm, refs), map(norm, preds))
+
+
+def _components(refs: Sequence[str], preds: Sequence[str], normalizer: Optional[TextNormalizer]) -> np.ndarray:
+    """One int64 row of components per pair."""
+    rows = []
+    for r, p in zip(refs, preds):
+        s = align_pair(r, p, normalizer)
+        rows.append((s.hits, s.substitutions, s.deletions, s.insertions, s.char_distance, s.ref_chars))
+    return np.array(rows, dtype=_COMPONENT_DTYPE).reshape(-1, len(COMPONENTS))
+
+
+def _component_chunk(refs: Sequence[str], preds: Sequence[str], config: Optional[NormalizationConfig]) -> np.ndarray:
+    # Worker entry point; the normalizer is rebuilt from its picklable config.
+    return _components(refs, preds, None if config is None else TextNormalizer(config))
+
+
+def scores_from_components(components: np.ndarray) -> Tuple[List[float], List[float], CorpusTotals]:
+    """Per-sample WER/CER lists and corpus totals, exactly as wer.score_pairs computes them."""
+    hits, subs, dels, ins, dist, ref_chars = components.T
+    errors = subs + dels + ins
+    ref_words = hits + subs + dels
+    with np.errstate(divide="ignore", invalid="ignore"):
+        wer = np.where(ref_words > 0, errors / ref_words, ins.astype(np.float64))
+        cer = np.where(ref_chars > 0, dist / ref_chars, 0.0)
+    totals = CorpusTotals(len(components), *(int(c) for c in components.sum(axis=0, dtype=np.int64)))
+    return wer.tolist(), cer.tolist(), totals
+
+
+class ScoreStore:
+    def __init__(self, path: str | Path = SCORES_PATH) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.last_scored = 0  # pairs aligned by the most recent score() call
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute("PRAGMA temp_store = MEMORY")
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS configs (id INTEGER PRIMARY KEY, fingerprint TEXT NOT NULL UNIQUE);"
+            # components: COMPONENTS packed as little-endian int64
+            "CREATE TABLE IF NOT EXISTS scores (config INTEGER NOT NULL, key BLOB NOT NULL,"
+            " components BLOB NOT NULL, PRIMARY KEY (config, key)) WITHOUT ROWID;"
+            # the last run per (dataset, config): texts joined by _SNAPSHOT_SEP, components packed
+            "CREATE TABLE IF NOT EXISTS snapshots (dataset TEXT NOT NULL, config INTEGER NOT NULL,"
+            " n INTEGER NOT NULL, refs BLOB NOT NULL, preds BLOB NOT NULL, components BLOB NOT NULL,"
+            " PRIMARY KEY (dataset, config));"
+            # no key on run_keys: sorted rows drive in-order probes of the scores primary key
+            "CREATE TEMP TABLE run_keys (config INTEGER NOT NULL, key BLOB NOT NULL);"
+        )
+        self._db.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
+
+    def _config_id(self, fingerprint: str) -> int:
+        self._db.execute("INSERT OR IGNORE INTO configs (fingerprint) VALUES (?)", (fingerprint,))
+        return self._db.execute("SELECT id FROM configs WHERE fingerprint = ?", (fingerprint,)).fetchone()[0]
+
+    def _load_run_keys(self, keys_by_config: Dict[int, Iterable[bytes]]) -> None:
+        self._db.execute("DELETE FROM run_keys")
+        for config, keys in keys_by_config.items():
+            self._db.executemany(
+                "INSERT INTO run_keys (config, key) VALUES (?, ?)", zip(repeat(config), sorted(set(keys)))
+            )
+
+    def _lookup(self, config: int, keys: Sequence[bytes]) -> List[Tuple[bytes, bytes]]:
+        """Stored (key, components) rows for exactly `keys`; rows of other runs are never read."""
+        if not self._db.execute("SELECT EXISTS (SELECT 1 FROM scores WHERE config = ?)", (config,)).fetchone()[0]:
+            return []  # nothing stored under this config yet, e.g. a first run
+        self._load_run_keys({config: keys})
+        found = self._db.execute(
+            "SELECT s.key, s.components FROM run_keys r JOIN scores s ON s.config = r.config AND s.key = r.key"
+        ).fetchall()
+        self._db.execute("DELETE FROM run_keys")
+        return found
+
+    def _load_snapshot(self, dataset: str, config: int) -> Optional[Tuple[List[str], List[str], np.ndarray]]:
+        row = self._db.execute(
+            "SELECT n, refs, preds, components FROM snapshots WHERE dataset = ? AND config = ?", (dataset, config)
+        ).fetchone()
+        if row is None:
+            return None
+        n, refs, preds, packed = row
+        refs, preds = refs.decode("utf-8").split(_SNAPSHOT_SEP), preds.decode("utf-8").split(_SNAPSHOT_SEP)
+        if n == 0:
+            refs = preds = []
+        components = np.frombuffer(packed, dtype=_COMPONENT_DTYPE).reshape(n, len(COMPONENTS))
+        return refs, preds, components
+
+    def _save_snapshot(
+        self,
+        dataset: str,
+        config: int,
+        refs: Optional[List[str]],
+        preds: Optional[List[str]],
+        components: np.ndarray,
+    ) -> None:
+        """Replace the snapshot; a text list of None keeps the stored one (it did not change)."""
+        columns: Dict[str, Any] = {"n": len(components), "components": components.tobytes()}
+        for name, texts in (("refs", refs), ("preds", preds)):
+            if texts is None:
+                continue
+            joined = _SNAPSHOT_SEP.join(texts)
+            if joined.count(_SNAPSHOT_SEP) != max(0, len(texts) - 1):
+                # a transcript contains the separator: no snapshot, the next run falls back to keys
+                self._db.execute("DELETE FROM snapshots WHERE dataset = ? AND config = ?", (dataset, config))
+                return
+            columns[name] = joined.encode("utf-8")
+        if len(columns) == 4:
+            self._db.execute(
+                "INSERT OR REPLACE INTO snapshots (dataset, config, n, components, refs, preds)"
+                " VALUES (:dataset, :config, :n, :components, :refs, :preds)",
+                {"dataset": dataset, "config": config, **columns},
+            )
+        else:
+            assignments = ", ".join(f"{name} = :{name}" for name in columns)
+            self._db.execute(
+                f"UPDATE snapshots SET {assignments} WHERE dataset = :dataset AND config = :config",
+                {"dataset": dataset, "config": config, **columns},
+            )
+
+    def _store(self, config: int, rows: Dict[bytes, bytes]) -> None:
+        # sorted keys turn random B-tree inserts into mostly sequential ones
+        self._db.executemany(
+            "INSERT OR REPLACE INTO scores (config, key, components) VALUES (?, ?, ?)",
+            ((config, key, rows[key]) for key in sorted(rows)),
+        )
+
+    def score(
+        self,
+        refs: Sequence[str],
+        preds: Sequence[str],
+        normalizer: Optional[TextNormalizer] = None,
+        *,
+        dataset: Optional[str] = None,
+        processes: Optional[int] = 1,
+        chunk_size: int = 20_000,
+    ) -> Tuple[List[float], List[float], CorpusTotals]:
+        """
+        Same result as wer.score_pairs_parallel, but only pairs missing
+        from the store are aligned (in a process pool when `processes` != 1).
+        With `dataset`, pairs unchanged since that dataset's last run are not
+        even hashed (see the module docstring).
+        """
+        n = min(len(refs), len(preds))
+        refs, preds = list(refs[:n]), list(preds[:n])
+        components = np.empty((n, len(COMPONENTS)), dtype=_COMPONENT_DTYPE)
+
+        with self._lock:
+            config = self._config_id(config_fingerprint(normalizer))
+            snapshot = None if dataset is None else self._load_snapshot(dataset, config)
+            new_refs: Optional[List[str]] = refs
+            new_preds: Optional[List[str]] = preds
+            if snapshot is None:
+                changed = np.arange(n)
+            else:
+                old_refs, old_preds, old_components = snapshot
+                m = min(n, len(old_refs))
+                ref_changed = np.fromiter(map(ne, refs, old_refs), dtype=bool, count=m)
+                pred_changed = np.fromiter(map(ne, preds, old_preds), dtype=bool, count=m)
+                components[:m] = old_components[:m]
+                changed = np.concatenate([np.flatnonzero(ref_changed | pred_changed), np.arange(m, n)])
+                if n == len(old_refs):
+                    # usually only predictions change; don't rewrite an identical reference list
+                    new_refs = None if not ref_changed.any() else refs
+                    new_preds = None if not pred_changed.any() else preds
+
+            # a dataset's first run aligns straight into its snapshot; only later changes are content-keyed
+            keyed = dataset is None or snapshot is not None
+            self.last_scored = self._fill(
+                config, changed, refs, preds, normalizer, components, processes, chunk_size, keyed=keyed
+            )
+            if dataset is not None and (snapshot is None or len(changed) or len(snapshot[0]) != n):
+                self._save_snapshot(dataset, config, new_refs, new_preds, components)
+            self._db.commit()
+        return scores_from_components(components)
+
+    def _fill(
+        self,
+        config: int,
+        indices: np.ndarray,
+        refs: List[str],
+        preds: List[str],
+        normalizer: Optional[TextNormalizer],
+        components: np.ndarray,
+        processes: Optional[int],
+        chunk_size: int,
+        *,
+        keyed: bool = True,
+    ) -> int:
+        """
+        Write components for `indices` from the store or by aligning; returns
+        pairs aligned. Unkeyed, pairs are aligned without hashing or storing.
+        """
+        if not len(indices):
+            return 0
+        idx = indices.tolist()
+        if not keyed:
+            components[indices] = self._align(
+                [refs[i] for i in idx], [preds[i] for i in idx], normalizer, processes, chunk_size
+            )
+            return len(idx)
+        keys = _run_keys([refs[i] for i in idx], [preds[i] for i in idx], normalizer)
+        slot: Dict[bytes, int] = {}  # distinct key -> row in `unique`
+        rows = np.fromiter((slot.setdefault(k, len(slot)) for k in keys), dtype=np.int64, count=len(keys))
+        unique = np.empty((len(slot), len(COMPONENTS)), dtype=_COMPONENT_DTYPE)
+
+        found = self._lookup(config, list(slot))
+        if found:
+            unique[[slot[k] for k, _ in found]] = np.frombuffer(
+                b"".join([c for _, c in found]), dtype=_COMPONENT_DTYPE
+            ).reshape(-1, len(COMPONENTS))
+        missing = list(slot.keys() - {k for k, _ in found})
+        if missing:
+            first = {}
+            for pos, key in zip(idx, keys):
+                first.setdefault(key, pos)
+            todo = [first[k] for k in missing]
+            fresh = self._align([refs[i] for i in todo], [preds[i] for i in todo], normalizer, processes, chunk_size)
+            unique[[slot[k] for k in missing]] = fresh
+            self._store(config, {k: row.tobytes() for k, row in zip(missing, fresh)})
+        components[indices] = unique[rows]
+        return len(missing)
+
+    def prune(self, runs: Iterable[Run]) -> int:
+        """
+        Delete every stored pair that none of `runs` uses, snapshots of other
+        configs, and configs left without either; returns the pair rows removed.
+        """
+        wanted: Dict[int, List[bytes]] = defaultdict(list)
+        with self._lock:
+            for refs, preds, normalizer in runs:
+                config = self._config_id(config_fingerprint(normalizer))
+                wanted[config].extend(_run_keys(refs, preds, normalizer))
+            self._load_run_keys(wanted)
+            removed = self._db.execute(
+                "DELETE FROM scores WHERE NOT EXISTS"
+                " (SELECT 1 FROM run_keys r WHERE r.config = scores.config AND r.key = scores.key)"
+            ).rowcount
+            # a dataset's first run stores only a snapshot, so keep snapshots of every config still in use
+            kept = ",".join(map(str, wanted)) or "NULL"
+            self._db.execute(f"DELETE FROM snapshots WHERE config NOT IN ({kept})")
+            self._db.execute(
+                "DELETE FROM configs WHERE id NOT IN (SELECT DISTINCT config FROM scores)"
+                " AND id NOT IN (SELECT DISTINCT config FROM snapshots)"
+            )
+            self._db.execute("DELETE FROM run_keys")
+            self._db.commit()
+        return removed
+
+    @staticmethod
+    def _align(
+        refs: List[str],
+        preds: List[str],
+        normalizer: Optional[TextNormalizer],
+        processes: Optional[int],
+        chunk_size: int,
+    ) -> np.ndarray:
+        if processes == 1 or len(refs) <= chunk_size:
+            return _components(refs, preds, normalizer)
+        config = None if normalizer is None else normalizer.config
+        starts = range(0, len(refs), chunk_size)
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            parts = pool.map(
+                _component_chunk,
+                (refs[i : i + chunk_size] for i in starts),
+                (preds[i : i + chunk_size] for i in starts),
+                (config for _ in starts),
+            )
+            return np.concatenate(list(parts))
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self) -> "ScoreStore":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
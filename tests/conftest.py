@@ -0,0 +1,23 @@
+from typing import Any
+
+from evaluators.usage_eval import LLMUsageRecord
+
+
+def usage(i: int, **fields: Any) -> LLMUsageRecord:
+    """
+    Audit record number `i` for tests. Any field can be overridden with a
+    value or with a function of `i`, e.g. `usage(i, latency_ms=lambda i: 10 * i)`.
+    """
+    values = {
+        "trace_id": f"t{i}",
+        "model": ["gpt-a", "gpt-b"][i % 2],
+        "input_tokens": 100 + i,
+        "output_tokens": 5,
+        "latency_ms": 20,
+        "cost_usd": 0.01,
+        "timestamp_ms": 1_000 * i,
+        "meta": {"route": "/chat"},
+    }
+    for name, value in fields.items():
+        values[name] = value(i) if callable(value) else value
+    return LLMUsageRecord(**values)
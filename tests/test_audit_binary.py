@@ -0,0 +1,79 @@
+from functools import partial
+from pathlib import Path
+
+from conftest import usage
+from evaluators.audit_binary import (
+    binary_to_jsonl,
+    jsonl_to_binary,
+    BinaryAuditWriter,
+    read_binary_audit_log,
+    scan_columns,
+)
+from evaluators.usage_eval import append_audit_log, read_audit_log
+
+
+# varied numbers and meta so the lossless round trip covers every field type
+_usage = partial(
+    usage,
+    trace_id=lambda i: f"trace-{i:06d}",
+    output_tokens=lambda i: i % 97,
+    latency_ms=lambda i: 120 + i % 13,
+    cost_usd=lambda i: (100 + i) * 1e-6 + (i % 97) * 2e-6,
+    timestamp_ms=lambda i: 1_700_000_000_000 + i * 37,
+    meta=lambda i: {"route": "/chat", "country": ["IN", "US"][i % 2], "won": i % 5 == 0},
+)
+
+
+def test_lossless_roundtrip_and_smaller_on_disk(tmp_path: Path):
+    src = tmp_path / "audit.jsonl"
+    for i in range(2500):
+        append_audit_log(_usage(i), src)
+
+    binary = tmp_path / "audit.tgb"
+    assert jsonl_to_binary(src, binary, block_records=1000) == 2500
+    assert binary.stat().st_size * 5 < src.stat().st_size
+
+    original = read_audit_log(src)
+    assert read_binary_audit_log(binary) == original
+
+    back = tmp_path / "back.jsonl"
+    binary_to_jsonl(binary, back)
+    assert back.read_bytes() == src.read_bytes()
+
+
+def test_column_scan_and_torn_block(tmp_path: Path):
+    src = tmp_path / "audit.jsonl"
+    for i in range(300):
+        append_audit_log(_usage(i), src)
+    binary = tmp_path / "audit.tgb"
+    jsonl_to_binary(src, binary, block_records=128)
+
+    cols = scan_columns(binary, ["input_tokens", "cost_usd", "model"])
+    assert cols["input_tokens"].sum() == sum(100 + i for i in range(300))
+    assert list(cols["model"][:3]) == ["gpt-a", "gpt-b", "gpt-a"]
+    assert len(cols["cost_usd"]) == 300
+
+    data = binary.read_bytes()
+    binary.write_bytes(data[:-10])  # crash while writing the last block
+    assert len(read_binary_audit_log(binary)) == 256
+
+
+def test_torn_block_is_truncated_and_conversions_overwrite(tmp_path: Path):
+    log = tmp_path / "audit.tgb"
+    with BinaryAuditWriter(log, block_records=10) as writer:
+        writer.write_many(_usage(i) for i in range(20))
+    with log.open("ab") as f:
+        f.write(b"TGB1\x05\x00\x00\x00garbage")  # crash mid-block
+
+    with BinaryAuditWriter(log, block_records=10) as writer:
+        writer.write_many(_usage(i) for i in range(20, 30))
+    assert [r.trace_id for r in read_binary_audit_log(log)] == [_usage(i).trace_id for i in range(30)]
+
+    back = tmp_path / "back.jsonl"
+    assert binary_to_jsonl(log, back) == 30
+    assert binary_to_jsonl(log, back) == 30
+    assert len(read_audit_log(back)) == 30
+    again = tmp_path / "again.tgb"
+    jsonl_to_binary(back, again)
+    jsonl_to_binary(back, again)
+    assert len(read_binary_audit_log(again)) == 30
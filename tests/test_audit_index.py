@@ -0,0 +1,62 @@
+from pathlib import Path
+
+import pytest
+
+from conftest import usage
+from evaluators.audit_index import AuditIndex
+from evaluators.usage_eval import AuditLogWriter, append_audit_log, iter_audit_log
+
+
+def test_incremental_index_answers_range_and_trace_queries(tmp_path: Path):
+    log = tmp_path / "audit.jsonl"
+    for i in range(50):
+        append_audit_log(usage(i), log)
+
+    index = AuditIndex(log, block_records=8)
+    assert index.update() == 50
+
+    for i in range(50, 60):
+        append_audit_log(usage(i), log)
+    append_audit_log(usage(60, trace_id="t3"), log)  # hedged duplicate
+    with log.open("a", encoding="utf-8") as f:
+        f.write('{"trace_id": "torn"')  # in-flight write is not indexed yet
+
+    assert index.update() == 11
+    assert [r.input_tokens for r in index.lookup("t3", refresh=False)] == [103, 160]
+    assert index.lookup("missing") == []
+
+    window = list(index.range(10_000, 20_000))
+    assert [r.input_tokens for r in window] == list(range(110, 120))
+
+    n_blocks = index._db.execute("SELECT COUNT(*) FROM blocks").fetchone()[0]
+    assert n_blocks == 8  # 61 records in blocks of 8
+    index.close()
+
+
+def test_writer_listener_keeps_index_current(tmp_path: Path):
+    log = tmp_path / "audit.jsonl"
+    index = AuditIndex(log, block_records=16)
+    with AuditLogWriter(log, batch_size=7, listeners=[index.on_flush]) as writer:
+        for i in range(40):
+            writer.write(usage(i))
+
+    assert index.indexed_bytes == log.stat().st_size
+    assert index.update() == 0
+    assert sum(r.cost_usd for r in index.range(0, 40_000, refresh=False)) == pytest.approx(0.4)
+    assert [r.trace_id for r in iter_audit_log(log)] == [f"t{i}" for i in range(40)]
+
+    log.write_text("")  # log rotated / truncated -> reindexed from scratch
+    assert index.update() == 0
+    assert index.lookup("t1") == []
+    index.close()
+
+
+def test_update_moves_past_trailing_blank_lines(tmp_path: Path):
+    log = tmp_path / "audit.jsonl"
+    append_audit_log(usage(0), log)
+    with log.open("ab") as f:
+        f.write(b"\n\n")
+    index = AuditIndex(log)
+    assert index.update() == 1
+    assert index._meta("indexed_bytes") == log.stat().st_size
+    index.close()
@@ -0,0 +1,132 @@
+from pathlib import Path
+
+import pytest
+
+from evaluators.checkpoint import Checkpoint, dataset_hash, run_checkpointed
+from evaluators.judge_eval import JudgeResult, iter_judge_cases, iter_judge_suite
+from evaluators.runner import PromptRunner
+
+
+class DummyResponse:
+    def __init__(self, text: str):
+        self._text = text
+
+    @property
+    def text(self) -> str:
+        return self._text
+
+
+class FailingJudge:
+    """Scores by call order and fails after `fail_after` calls."""
+    def __init__(self, fail_after=None):
+        self.fail_after = fail_after
+        self.calls = 0
+
+    def complete(self, prompt: str):
+        if self.fail_after is not None and self.calls >= self.fail_after:
+            raise ConnectionError("provider outage")
+        self.calls += 1
+        return DummyResponse(f"SCORE: 6\nEXPLANATION: call {self.calls}")
+
+
+def _dataset(tmp_path: Path, n: int) -> Path:
+    path = tmp_path / "judge.jsonl"
+    path.write_text(
+        "".join(
+            f'{{"id": "j{i}", "prompt": "q{i}", "reference": "r", "candidate": "c"}}\n'
+            for i in range(n)
+        )
+    )
+    return path
+
+
+def _run(client, data: Path, journal: Path, resume: bool):
+    checkpoint = Checkpoint.for_dataset(journal, suite="judge", dataset_path=data, model="m")
+    return list(
+        run_checkpointed(
+            lambda: iter_judge_cases(data),
+            lambda cases: iter_judge_suite(client, cases, PromptRunner(chunk_size=1)),
+            checkpoint,
+            decode=lambda raw: JudgeResult(**raw),
+            resume=resume,
+        )
+    )
+
+
+def test_resume_only_runs_remaining_cases(tmp_path: Path):
+    data = _dataset(tmp_path, 10)
+    journal = tmp_path / "ckpt.jsonl"
+
+    with pytest.raises(ConnectionError):
+        _run(FailingJudge(fail_after=6), data, journal, resume=False)
+
+    second = FailingJudge()
+    results = _run(second, data, journal, resume=True)
+
+    assert second.calls == 4
+    assert [r.id for r in results] == [f"j{i}" for i in range(10)]
+    assert results[5].explanation == "call 6"
+    assert results[6].explanation == "call 1"
+
+
+def test_fresh_run_ignores_previous_journal(tmp_path: Path):
+    data = _dataset(tmp_path, 3)
+    journal = tmp_path / "ckpt.jsonl"
+    _run(FailingJudge(), data, journal, resume=False)
+
+    again = FailingJudge()
+    _run(again, data, journal, resume=False)
+    assert again.calls == 3
+
+    # a different dataset never matches old entries
+    data.write_text(data.read_text() + '{"id": "j3", "prompt": "q", "reference": "r", "candidate": "c"}\n')
+    other = Checkpoint(journal, suite="judge", dataset=dataset_hash(data), model="m")
+    assert other.completed() == {}
+
+
+def test_results_stream_before_the_run_finishes(tmp_path: Path):
+    data = _dataset(tmp_path, 5)
+    journal = tmp_path / "ckpt.jsonl"
+    with pytest.raises(ConnectionError):
+        _run(FailingJudge(fail_after=2), data, journal, resume=False)
+
+    client = FailingJudge()
+    checkpoint = Checkpoint.for_dataset(journal, suite="judge", dataset_path=data, model="m")
+    stream = run_checkpointed(
+        lambda: iter_judge_cases(data),
+        lambda cases: iter_judge_suite(client, cases, PromptRunner(chunk_size=1)),
+        checkpoint,
+        decode=lambda raw: JudgeResult(**raw),
+        resume=True,
+    )
+    assert [next(stream).id for _ in range(3)] == ["j0", "j1", "j2"]
+    assert client.calls == 1  # j0 and j1 came from the journal
+    assert len(list(stream)) == 2
+
+
+def test_mode_is_part_of_the_key(tmp_path: Path):
+    data = _dataset(tmp_path, 2)
+    journal = tmp_path / "ckpt.jsonl"
+    per_field = Checkpoint.for_dataset(journal, suite="fact", dataset_path=data, model="m", mode="per-field")
+    per_field.record("j0", {"score": 1})
+    per_field.close()
+    multi = Checkpoint.for_dataset(journal, suite="fact", dataset_path=data, model="m", mode="multi-field")
+    assert multi.completed() == {}
+    assert per_field.completed() == {"j0": {"score": 1}}
+    per_field.close()
+
+
+def test_resume_without_checkpoint_is_an_error(tmp_path: Path):
+    import os
+    import subprocess
+    import sys
+
+    src = str(Path(__file__).parents[1] / "src")
+    proc = subprocess.run(
+        [sys.executable, "-m", "evaluators.judge_eval", "--data", str(_dataset(tmp_path, 1)), "--resume"],
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONPATH": src},
+    )
+    assert proc.returncode == 2
+    assert "--resume requires --checkpoint" in proc.stderr
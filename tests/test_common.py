@@ -0,0 +1,220 @@
+import asyncio
+import gzip
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from evaluators.bias_eval import load_bias_cases, evaluate_bias_suite
+from evaluators.common import AsyncCachingModelClient, CachingModelClient, DatasetError, DummyResponse, cache_key
+from evaluators.judge_eval import iter_judge_cases, iter_judge_suite
+from evaluators.runner import PromptRunner
+
+
+class CountingClient:
+    def __init__(self, text: str = "8.0"):
+        self.text = text
+        self.calls = 0
+
+    def complete(self, prompt: str):
+        self.calls += 1
+        return DummyResponse(self.text)
+
+
+def test_cache_key_depends_on_model_prompt_and_params():
+    base = cache_key("m1", "hello", {"temperature": 0})
+    assert base == cache_key("m1", "hello", {"temperature": 0})
+    assert base != cache_key("m2", "hello", {"temperature": 0})
+    assert base != cache_key("m1", "hello!", {"temperature": 0})
+    assert base != cache_key("m1", "hello", {"temperature": 1})
+
+
+def test_rerun_from_disk_costs_no_provider_calls(tmp_path: Path):
+    dataset = Path(__file__).parents[1] / "data" / "bias_minimal.jsonl"
+    cases = load_bias_cases(dataset)
+    db = tmp_path / "cache.sqlite"
+
+    first = CountingClient()
+    with CachingModelClient(first, model_id="m", path=db) as cached:
+        evaluate_bias_suite(cached, cases)
+    assert first.calls == len(cases[0].variants)
+
+    second = CountingClient()
+    with CachingModelClient(second, model_id="m", path=db) as cached:
+        results = evaluate_bias_suite(cached, cases)
+        assert cached.stats.disk_hits == len(cases[0].variants)
+    assert second.calls == 0
+    assert results[0].passed
+
+
+def test_ttl_and_lru_eviction(tmp_path: Path):
+    now = [0.0]
+    inner = CountingClient("x")
+    cached = CachingModelClient(
+        inner,
+        model_id="m",
+        path=tmp_path / "c.sqlite",
+        max_memory_entries=1,
+        max_disk_entries=2,
+        ttl_s=10,
+        clock=lambda: now[0],
+    )
+
+    for p in ("a", "b", "c"):
+        cached.complete(p)
+    assert inner.calls == 3
+
+    cached.complete("c")  # memory hit
+    cached.complete("b")  # disk hit
+    cached.complete("a")  # evicted from disk -> miss
+    assert (cached.stats.memory_hits, cached.stats.disk_hits, cached.stats.misses) == (1, 1, 4)
+
+    now[0] = 100.0
+    cached.complete("a")  # expired -> miss
+    assert inner.calls == 5
+    cached.close()
+
+
+class SlowAsyncClient:
+    def __init__(self):
+        self.calls = 0
+        self.async_calls = 0
+
+    def complete(self, prompt: str):
+        self.calls += 1
+        time.sleep(0.05)
+        return DummyResponse(prompt.upper())
+
+    async def acomplete(self, prompt: str):
+        self.async_calls += 1
+        await asyncio.sleep(0.05)
+        return DummyResponse(prompt.upper())
+
+
+def test_inflight_dedupe_and_acomplete_forwarding(tmp_path: Path):
+    inner = SlowAsyncClient()
+    cached = CachingModelClient(inner, model_id="m", path=tmp_path / "c.sqlite")
+    assert isinstance(cached, AsyncCachingModelClient)
+    assert not hasattr(CachingModelClient(CountingClient(), model_id="m"), "acomplete")
+
+    threads = [threading.Thread(target=cached.complete, args=("a",)) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert inner.calls == 1
+    assert cached.stats.misses == 1
+    assert cached.stats.deduped + cached.stats.memory_hits == 7
+
+    async def burst():
+        return await asyncio.gather(*(cached.acomplete("b") for _ in range(5)))
+
+    assert [r.text for r in asyncio.run(burst())] == ["B"] * 5
+    assert inner.async_calls == 1
+    cached.close()
+
+
+def test_disk_hits_do_not_write(tmp_path: Path):
+    db = tmp_path / "c.sqlite"
+    with CachingModelClient(CountingClient(), model_id="m", path=db) as cached:
+        cached.complete("a")
+        cached.complete("b")
+
+    now = [50.0]
+    cached = CachingModelClient(CountingClient(), model_id="m", path=db, clock=lambda: now[0])
+    changes = cached._db.total_changes
+    assert cached.complete("a").text == "8.0"
+    assert cached.stats.disk_hits == 1
+    assert cached._db.total_changes == changes
+    cached.close()
+
+    rows = dict(sqlite3.connect(str(db)).execute("SELECT key, accessed_at FROM responses"))
+    assert rows[cache_key("m", "a")] == 50.0
+
+
+def _write_judge_jsonl(path: Path, n: int) -> None:
+    lines = [
+        json.dumps({"id": f"j{i}", "prompt": "q", "reference": "r", "candidate": "c" * (i % 7)})
+        for i in range(n)
+    ]
+    opener = gzip.open if path.suffix == ".gz" else open
+    with opener(path, "wt", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+@pytest.mark.parametrize("name", ["cases.jsonl", "cases.jsonl.gz"])
+def test_shards_cover_every_case_exactly_once(tmp_path: Path, name: str):
+    path = tmp_path / name
+    _write_judge_jsonl(path, 101)
+
+    seen = [c.id for shard in range(4) for c in iter_judge_cases(path, shard=shard, num_shards=4)]
+
+    assert sorted(seen) == sorted(f"j{i}" for i in range(101))
+
+
+def test_streamed_suite_accepts_generators(tmp_path: Path):
+    class Judge:
+        def complete(self, prompt: str):
+            return DummyResponse("SCORE: 3\nEXPLANATION: ok")
+
+    path = tmp_path / "cases.jsonl"
+    _write_judge_jsonl(path, 25)
+    results = iter_judge_suite(Judge(), iter_judge_cases(path), PromptRunner(chunk_size=4))
+
+    assert [r.id for r in results] == [f"j{i}" for i in range(25)]
+
+
+def test_dataset_errors_report_line_numbers(tmp_path: Path):
+    path = tmp_path / "bad.jsonl"
+    path.write_text(
+        '{"id": "j0", "prompt": "q", "reference": "r", "candidate": "c"}\n'
+        "\n"
+        '{"id": "j1", "prompt": "q", "candidate": "c"}\n'
+    )
+
+    with pytest.raises(DatasetError, match=r"bad.jsonl:3: missing field 'reference'"):
+        list(iter_judge_cases(path))
+
+
+def test_fact_and_bias_cases_validate_their_mappings(tmp_path: Path):
+    from evaluators.bias_eval import load_bias_cases
+    from evaluators.fact_eval import load_fact_cases
+
+    facts = tmp_path / "facts.jsonl"
+    facts.write_text(
+        '{"id": "f0", "passage": "p", "fields": {"name": "Who?"}}\n'
+        '{"id": "f1", "passage": "p", "fields": ["name"]}\n'
+    )
+    with pytest.raises(DatasetError, match=r"facts.jsonl:2: field 'fields' must be a non-empty object, got list"):
+        load_fact_cases(facts)
+
+    bias = tmp_path / "bias.jsonl"
+    bias.write_text('{"id": "b0", "variants": {"a": "resume", "b": 3}}\n')
+    with pytest.raises(DatasetError, match=r"bias.jsonl:1: field 'variants.b' must be a string, got int"):
+        load_bias_cases(bias)
+
+
+def test_shard_errors_report_absolute_lines_and_bad_utf8(tmp_path: Path):
+    path = tmp_path / "cases.jsonl"
+    _write_judge_jsonl(path, 40)
+    lines = path.read_bytes().splitlines(keepends=True)
+    lines[29] = b'{"id": "j29", "prompt": "q"}\n'
+    lines[34] = b'{"id": "\xff"}\n'
+    path.write_bytes(b"".join(lines))
+
+    errors = []
+    for shard in range(4):
+        try:
+            list(iter_judge_cases(path, shard=shard, num_shards=4))
+        except DatasetError as exc:
+            errors.append(exc)
+    assert [e.line_no for e in errors] == [30]
+    assert "cases.jsonl:30 (shard 3/4): missing field" in str(errors[0])
+
+    lines[29] = b'{"id": "j29", "prompt": "q", "reference": "r", "candidate": "c"}\n'
+    path.write_bytes(b"".join(lines))
+    with pytest.raises(DatasetError, match=r"cases.jsonl:35 \(shard 3/4\): invalid UTF-8"):
+        list(iter_judge_cases(path, shard=3, num_shards=4))
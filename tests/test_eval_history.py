@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from evaluators.eval_history import ColumnarMirror, EvalHistory
+from evaluators.eval_writer import EvaluationRecord, EvaluationStore
+
+
+def _rec(eval_type: str, i: int, **metrics: float) -> EvaluationRecord:
+    return EvaluationRecord(
+        eval_type=eval_type,
+        name=f"{eval_type}_{i % 2}",
+        dataset=f"data/{eval_type}.jsonl",
+        metrics=metrics,
+        thresholds={"wer": 0.2} if eval_type == "wer" else None,
+        num_examples=10,
+        tags=["nightly"] if i % 3 == 0 else ["adhoc"],
+    )
+
+
+def _populate(tmp_path: Path) -> EvaluationStore:
+    store = EvaluationStore(tmp_path / "store", mirror=ColumnarMirror(tmp_path / "cols"))
+    for i in range(12):
+        store.append([_rec("wer", i, wer=i / 100, cer=i / 200), _rec("judge", i, score=float(i))])
+    store.close()
+    return store
+
+
+def test_mirror_flattens_metrics_and_filters(tmp_path: Path):
+    _populate(tmp_path)
+    history = EvalHistory(tmp_path / "cols")
+
+    wer = history.query(eval_type="wer", columns=["name", "metric.wer", "threshold.wer"])
+    assert list(wer.columns) == ["name", "metric.wer", "threshold.wer"]
+    assert sorted(wer["metric.wer"]) == pytest.approx([i / 100 for i in range(12)])
+    assert set(wer["threshold.wer"]) == {0.2}
+
+    nightly = history.query(tags=["nightly"], dataset="data/judge.jsonl", columns=["metric.score"])
+    assert sorted(nightly["metric.score"]) == [0.0, 3.0, 6.0, 9.0]
+
+    now = datetime.now(timezone.utc)
+    assert len(history.query(since=now - timedelta(hours=1), columns=["name"])) == 24
+    assert len(history.query(until=now - timedelta(hours=1), columns=["name"])) == 0
+
+
+def test_aggregate_and_rebuild_match(tmp_path: Path):
+    store = _populate(tmp_path)
+    history = EvalHistory(tmp_path / "cols")
+
+    agg = history.aggregate(["wer"], by=["name"], eval_type="wer").sort_values("name")
+    assert list(agg["name"]) == ["wer_0", "wer_1"]
+    assert list(agg["metric.wer_mean"]) == pytest.approx([0.05, 0.06])
+
+    rebuilt = tmp_path / "rebuilt"
+    assert ColumnarMirror(rebuilt).rebuild(store) == 24
+    again = EvalHistory(rebuilt).aggregate(["wer"], by=["name"], eval_type="wer").sort_values("name")
+    assert list(again["metric.wer_mean"]) == list(agg["metric.wer_mean"])
+
+
+def test_non_utc_bounds_use_utc_partitions(tmp_path: Path):
+    mirror = ColumnarMirror(tmp_path / "cols")
+    row = {"eval_type": "wer", "name": "late", "dataset": "d", "metrics": {"wer": 0.1}}
+    mirror.write([{**row, "recorded_at": "2026-10-15T21:00:00+00:00"}])
+    history = EvalHistory(tmp_path / "cols")
+
+    plus5 = timezone(timedelta(hours=5))
+    since = datetime(2026, 10, 16, 1, 0, tzinfo=plus5)  # 2026-10-15T20:00Z
+    assert list(history.query(since=since, columns=["name"])["name"]) == ["late"]
+    until = datetime(2026, 10, 16, 2, 30, tzinfo=plus5)  # 2026-10-15T21:30Z
+    assert len(history.query(until=until, columns=["name"])) == 1
+    assert len(history.query(since=datetime(2026, 10, 15, 21, 30), columns=["name"])) == 0  # naive = UTC
@@ -0,0 +1,163 @@
+import json
+import multiprocessing
+import threading
+import time
+from pathlib import Path
+
+from evaluators.eval_writer import EvaluationRecord, EvaluationStore
+
+
+def _rec(i: int) -> EvaluationRecord:
+    return EvaluationRecord(
+        eval_type="judge",
+        name=f"case_{i}",
+        dataset="data/judge_minimal.jsonl",
+        metrics={"score": float(i)},
+        passed=True,
+        num_examples=1,
+        tags=["judge_eval"],
+    )
+
+
+def test_segments_rotate_compact_and_export_legacy(tmp_path: Path):
+    legacy = tmp_path / "evaluations.json"
+    legacy.write_text(json.dumps({
+        "run_id": "r0",
+        "project": "TrustGate Evals",
+        "evaluations": [{"eval_type": "wer", "name": "old", "dataset": "d", "metrics": {}}],
+    }))
+
+    store = EvaluationStore(tmp_path / "store", segment_max_bytes=1000, compact_after=1000, legacy_path=legacy)
+    for i in range(21):
+        store.append([_rec(i)])
+    segments = lambda: list((tmp_path / "store").glob("seg-*.jsonl"))
+    assert len(segments()) > 2
+
+    store.compact()  # the writer's open segment is skipped
+    assert len(segments()) == 2
+    store.close()
+    store.compact()
+    assert len(segments()) == 1
+
+    out = tmp_path / "export.json"
+    EvaluationStore(tmp_path / "store").export_legacy(out)
+    data = json.loads(out.read_text())
+
+    assert data["run_id"] == "r0"
+    assert [e["name"] for e in data["evaluations"]] == ["old"] + [f"case_{i}" for i in range(21)]
+    assert "recorded_at" not in data["evaluations"][1]
+    assert data["evaluations"][1]["metrics"] == {"score": 0.0}
+
+
+def test_torn_write_is_skipped(tmp_path: Path):
+    store = EvaluationStore(tmp_path / "store")
+    store.append([_rec(0)])
+    store.close()
+
+    (active,) = (tmp_path / "store").glob("seg-*.jsonl")
+    with active.open("a", encoding="utf-8") as f:
+        f.write('{"eval_type": "judge", "na')  # crash mid-write
+
+    reopened = EvaluationStore(tmp_path / "store")
+    reopened.append([_rec(1)])
+
+    assert [r["name"] for r in reopened.iter_records()] == ["case_0", "case_1"]
+
+
+class _LateWaker(threading.Condition):
+    """A waiter woken once `woken()` holds sleeps until `resume` is set, like a starved thread."""
+
+    def __init__(self, woken, resume: threading.Event) -> None:
+        super().__init__()
+        self.woken, self.resume = woken, resume
+
+    def wait(self, timeout=None):
+        notified = super().wait(timeout)
+        if self.woken() and not self.resume.is_set():
+            self.release()
+            self.resume.wait()
+            self.acquire()
+        return notified
+
+
+def test_each_failed_batch_fails_all_of_its_appends(tmp_path: Path):
+    store = EvaluationStore(tmp_path / "store")
+    first_write, resume = threading.Event(), threading.Event()
+    calls = []
+
+    def write_batch(payload: bytes) -> bool:
+        calls.append(payload)
+        if len(calls) == 1:
+            first_write.wait()
+            return False
+        raise OSError(f"disk full ({len(calls)})")
+
+    store._write_batch = write_batch
+    store._cond = _LateWaker(lambda: store._durable >= 3, resume)
+    errors = {}
+
+    def append(i: int) -> None:
+        try:
+            store.append([_rec(i)])
+        except OSError as exc:
+            errors[i] = str(exc)
+
+    threads = [threading.Thread(target=append, args=(i,)) for i in range(3)]
+    threads[0].start()
+    while not calls:
+        time.sleep(0.001)
+    for th in threads[1:]:
+        th.start()
+    while store._enqueued < 3:
+        time.sleep(0.001)
+    first_write.set()  # appends 1 and 2 now go out together as the second, failing batch
+    while not errors:
+        time.sleep(0.001)
+    append(3)  # a third batch fails while the other waiter of the second one is still asleep
+    resume.set()
+    for th in threads:
+        th.join()
+
+    assert errors == {1: "disk full (2)", 2: "disk full (2)", 3: "disk full (3)"}
+    assert store._failed == {}
+
+
+def _stress_writer(root: str, writer: int, threads: int, per_thread: int) -> None:
+    store = EvaluationStore(root, segment_max_bytes=4096, compact_after=8)
+
+    def work(t: int) -> None:
+        for i in range(per_thread):
+            store.append([_rec(writer * 10_000 + t * 1_000 + i)])
+
+    pool = [threading.Thread(target=work, args=(t,)) for t in range(threads)]
+    for th in pool:
+        th.start()
+    for th in pool:
+        th.join()
+    store.close()
+
+
+def test_many_writer_processes_lose_no_records(tmp_path: Path):
+    root = tmp_path / "store"
+    EvaluationStore(root)
+    writers, threads, per_thread = 24, 4, 10
+
+    procs = [
+        multiprocessing.Process(target=_stress_writer, args=(str(root), w, threads, per_thread))
+        for w in range(writers)
+    ]
+    for p in procs:
+        p.start()
+    compactor = EvaluationStore(root)
+    while any(p.is_alive() for p in procs):
+        compactor.compact()
+    for p in procs:
+        p.join()
+        assert p.exitcode == 0
+    compactor.compact()
+
+    names = [r["name"] for r in compactor.iter_records()]
+    assert len(names) == writers * threads * per_thread
+    assert len(set(names)) == len(names)
+    stamps = [r["recorded_at"] for r in compactor.iter_records()]
+    assert stamps == sorted(stamps)
@@ -1,5 +1,5 @@
 from pathlib import Path
-from evaluators.fact_eval import load_fact_cases, evaluate_fact_suite
+from evaluators.fact_eval import load_fact_cases, evaluate_fact_suite, summarize_fact_savings
 
 
 class DummyResponse:
@@ -37,3 +37,38 @@ def test_fact_minimal():
     assert r.extracted["name"] == "John Smith"
     assert r.extracted["city"] == "Chicago"
     assert r.extracted["role"] == "senior data engineer"
+
+
+class JsonFactClient:
+    """Answers multi-field prompts with JSON that is missing 'role'."""
+    def __init__(self):
+        self.prompts = []
+
+    def complete(self, prompt: str):
+        self.prompts.append(prompt)
+        if "Fields:" in prompt:
+            return DummyResponse('Sure: {"name": "John Smith", "city": "Chicago"}')
+        return DummyResponse("senior data engineer")
+
+
+def test_fact_multi_field_falls_back_only_for_unparsed_fields():
+    dataset = Path(__file__).parents[1] / "data" / "fact_minimal.jsonl"
+    cases = load_fact_cases(dataset)
+    client = JsonFactClient()
+
+    results = evaluate_fact_suite(client, cases, multi_field=True)
+
+    r = results[0]
+    assert r.extracted == {
+        "name": "John Smith",
+        "city": "Chicago",
+        "role": "senior data engineer",
+    }
+    assert r.num_calls == 2
+    assert len(client.prompts) == 2
+    assert "What is his job title?" in client.prompts[1]
+
+    savings = summarize_fact_savings(results)
+    assert savings["baseline_calls"] == 3
+    assert savings["calls_saved"] == 1
+    assert summarize_fact_savings(iter(results)) == savings
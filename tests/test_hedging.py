@@ -0,0 +1,131 @@
+import threading
+import time
+
+import pytest
+
+from evaluators.hedging import HedgedClient, LatencyTracker
+from evaluators.usage_eval import ModelPricing
+
+
+class UsageResp:
+    def __init__(self, text: str):
+        self.text = text
+        self.model = "gpt-test"
+        self.input_tokens = 100
+        self.output_tokens = 10
+
+
+class SlowOnceClient:
+    """First call stalls; every other call is fast."""
+    def __init__(self, stall_s: float = 0.5):
+        self.stall_s = stall_s
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def complete(self, prompt: str):
+        with self.lock:
+            self.calls += 1
+            first = self.calls == 1
+        time.sleep(self.stall_s if first else 0.001)
+        return UsageResp("slow" if first else "fast")
+
+
+class FlakyClient:
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.calls = 0
+
+    def complete(self, prompt: str):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ConnectionError("reset by peer")
+        return UsageResp("ok")
+
+
+def test_slow_request_is_hedged_and_extra_cost_recorded():
+    tracker = LatencyTracker(min_samples=5)
+    for _ in range(5):
+        tracker.record("m", 5.0)
+
+    records = []
+    pricing = ModelPricing(input_token_cost=1e-6, output_token_cost=2e-6)
+    with HedgedClient(
+        SlowOnceClient(),
+        model_id="m",
+        tracker=tracker,
+        pricing=pricing,
+        on_usage=records.append,
+    ) as client:
+        start = time.perf_counter()
+        resp = client.complete("hi")
+        elapsed = time.perf_counter() - start
+
+    assert resp.text == "fast"
+    assert elapsed < 0.4
+    assert client.stats.hedged == 1
+    assert client.stats.hedge_wins == 1
+    assert client.stats.hedge_rate == 1.0
+
+    assert sorted((r.meta["hedge"], r.meta["won"]) for r in records) == [
+        ("duplicate", True),
+        ("primary", False),
+    ]
+    assert len({r.trace_id for r in records}) == 1
+    assert client.stats.extra_cost_usd == pytest.approx(100 * 1e-6 + 10 * 2e-6)
+
+
+def test_no_hedge_until_enough_samples():
+    with HedgedClient(SlowOnceClient(stall_s=0.05), model_id="m") as client:
+        assert client.complete("hi").text == "slow"
+    assert client.stats.hedged == 0
+
+
+def test_transient_errors_retry_with_jittered_backoff():
+    sleeps = []
+    inner = FlakyClient(failures=2)
+    with HedgedClient(
+        inner, model_id="m", sleep=sleeps.append, rng=lambda: 0.5, backoff_base_s=1.0
+    ) as client:
+        assert client.complete("hi").text == "ok"
+
+    assert inner.calls == 3
+    assert client.stats.retries == 2
+    assert sleeps == [0.5, 1.0]
+
+
+def test_retries_exhausted_raises():
+    with HedgedClient(FlakyClient(failures=5), model_id="m", max_retries=1, sleep=lambda s: None) as client:
+        with pytest.raises(ConnectionError):
+            client.complete("hi")
+
+
+class SteadyClient:
+    def __init__(self, latency_s: float):
+        self.latency_s = latency_s
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def complete(self, prompt: str):
+        with self.lock:
+            self.calls += 1
+        time.sleep(self.latency_s)
+        return UsageResp("ok")
+
+
+def test_queued_calls_do_not_hedge():
+    tracker = LatencyTracker(min_samples=5)
+    for _ in range(5):
+        tracker.record("m", 150.0)
+
+    inner = SteadyClient(0.1)
+    with HedgedClient(inner, model_id="m", tracker=tracker, max_workers=2) as client:
+        # 6 calls on 2 workers: the last ones queue for ~0.2s, well past the
+        # 150ms delay, but each runs for only 100ms once started
+        threads = [threading.Thread(target=client.complete, args=("hi",)) for _ in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    assert client.stats.hedged == 0
+    assert inner.calls == 6
@@ -0,0 +1,66 @@
+import random
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from conftest import usage
+from evaluators.latency_sketch import LatencySketch, LatencySketches
+from evaluators.usage_eval import AuditLogWriter
+
+
+def _exact(values, q):
+    return np.sort(values)[int(q * (len(values) - 1))]
+
+
+def test_quantiles_within_relative_error_and_merge_is_exact():
+    rng = random.Random(7)
+    values = [rng.lognormvariate(5, 1) for _ in range(20_000)]
+
+    whole = LatencySketch(relative_accuracy=0.01)
+    parts = [LatencySketch(relative_accuracy=0.01) for _ in range(4)]
+    for i, v in enumerate(values):
+        whole.add(v)
+        parts[i % 4].add(v)
+
+    merged = LatencySketch(relative_accuracy=0.01)
+    for p in parts:
+        merged.merge(p)
+
+    for q in (0.5, 0.9, 0.95, 0.99):
+        exact = _exact(values, q)
+        assert abs(whole.quantile(q) - exact) <= 0.01 * exact
+        assert merged.quantile(q) == whole.quantile(q)
+    assert whole.quantile(0) == min(values) and whole.quantile(1) == max(values)
+
+    restored = LatencySketch.from_dict(whole.to_dict())
+    assert restored.quantile(0.99) == whole.quantile(0.99)
+    with pytest.raises(ValueError):
+        whole.merge(LatencySketch(relative_accuracy=0.02))
+
+
+def test_bucket_limit_bounds_memory():
+    sketch = LatencySketch(relative_accuracy=0.01, max_buckets=64)
+    for v in np.geomspace(1e-3, 1e6, 10_000):
+        sketch.add(float(v))
+    assert len(sketch._bins) <= 64
+    assert sketch.quantile(0.99) == pytest.approx(np.quantile(np.geomspace(1e-3, 1e6, 10_000), 0.99), rel=0.02)
+
+
+def test_per_route_windows_from_writer_listener(tmp_path: Path):
+    sketches = LatencySketches(bucket_s=3600)
+    with AuditLogWriter(tmp_path / "audit.jsonl", listeners=[sketches.on_flush]) as writer:
+        for i in range(240):  # four hours, one record per minute
+            route, latency = ("/chat", 100) if i % 2 else ("/transcribe", 1000)
+            writer.write(usage(i, model="gpt-a", latency_ms=latency, timestamp_ms=i * 60_000, meta={"route": route}))
+
+    assert sketches.quantiles(value="/chat")[0.99] == pytest.approx(100, rel=0.01)
+    assert sketches.quantiles(value="/transcribe", since_ms=3_600_000, until_ms=7_200_000)[0.5] == pytest.approx(1000, rel=0.01)
+    assert sketches.window(since_ms=3_600_000, until_ms=7_200_000).count == 60
+
+    path = tmp_path / "sketches.json"
+    sketches.save(path)
+    other = LatencySketches.load(path)
+    other.merge(sketches)  # e.g. a second host
+    assert other.window().count == 480
+    assert other.quantiles()[0.5] == sketches.quantiles()[0.5]
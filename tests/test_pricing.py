@@ -0,0 +1,87 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from evaluators.pricing import PricingRegistry, project
+from evaluators.usage_eval import ModelPricing, calculate_cost
+
+DAY_MS = 86_400_000
+
+
+def test_loads_bundled_price_sheet_and_matches_scalar_cost():
+    registry = PricingRegistry.from_file()
+    pricing = registry.get("gpt-4o-mini")
+    assert pricing == ModelPricing(input_token_cost=0.00000015, output_token_cost=0.00000060)
+
+    inp = np.array([1000, 0, 12345])
+    out = np.array([500, 10, 0])
+    costs = registry.price(["gpt-4o-mini"] * 3, inp, out)
+    expected = [calculate_cost(i, o, pricing) for i, o in zip(inp.tolist(), out.tolist())]
+    assert costs.tolist() == pytest.approx(expected)
+
+    with pytest.raises(KeyError, match="no pricing"):
+        registry.price(["unknown"], [1], [1])
+
+
+def test_effective_dated_versions_from_jsonl(tmp_path: Path):
+    sheet = tmp_path / "prices.jsonl"
+    sheet.write_text(
+        "\n".join(
+            json.dumps(e)
+            for e in [
+                {"model": "m", "input_token_cost": 2e-6, "output_token_cost": 4e-6, "effective_from": "2025-01-01"},
+                {"model": "m", "input_token_cost": 1e-6, "output_token_cost": 2e-6, "effective_from": "2025-02-01"},
+            ]
+        )
+    )
+    registry = PricingRegistry.from_file(sheet)
+    feb = 1738368000000  # 2025-02-01T00:00Z
+    ts = np.array([feb - 1, feb, feb + DAY_MS])
+    costs = registry.price(["m", "m", "m"], [1000] * 3, [0] * 3, ts)
+    assert costs.tolist() == pytest.approx([2e-3, 1e-3, 1e-3])
+    with pytest.raises(KeyError):
+        registry.price(["m"], [1], [1], [0])
+
+
+def test_monthly_and_what_if_projection():
+    registry = PricingRegistry()
+    registry.add("big", ModelPricing(1e-5, 3e-5))
+    registry.add("small", ModelPricing(1e-6, 2e-6))
+
+    n = 10
+    columns = {
+        "model": np.array(["big"] * n, dtype=object),
+        "input_tokens": np.full(n, 1000),
+        "output_tokens": np.full(n, 100),
+        "timestamp_ms": np.linspace(0, 3 * DAY_MS, n).astype(np.int64),
+    }
+    proj = project(columns, registry, model_map={"big": "small"}, output_scale=0.5)
+
+    assert proj.observed_days == pytest.approx(3.0)
+    assert proj.baseline_usd == pytest.approx(n * (1e-2 + 3e-3))
+    assert proj.scenario_usd == pytest.approx(n * (1e-3 + 1e-4))
+    assert proj.baseline_monthly_usd == pytest.approx(proj.baseline_usd * 10)
+    assert proj.by_model["big"] == pytest.approx((proj.baseline_usd, proj.scenario_usd))
+
+    instant = project({**columns, "timestamp_ms": np.zeros(n, dtype=np.int64)}, registry)
+    assert instant.baseline_usd == pytest.approx(proj.baseline_usd)
+    assert instant.baseline_monthly_usd is None and instant.delta_monthly_usd is None
+
+
+def test_cli_rejects_malformed_swap(tmp_path: Path):
+    import os
+    import subprocess
+    import sys
+
+    log = tmp_path / "audit.jsonl"
+    log.write_text("")
+    proc = subprocess.run(
+        [sys.executable, "-m", "evaluators.pricing", str(log), "--swap", "gpt-4o"],
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONPATH": str(Path(__file__).parents[1] / "src")},
+    )
+    assert proc.returncode == 2
+    assert "expected OLD=NEW" in proc.stderr
@@ -0,0 +1,131 @@
+import pytest
+
+from evaluators.rate_limit import (
+    Budget,
+    BudgetExceededError,
+    ModelLimits,
+    RateLimitedClient,
+    RateLimiter,
+)
+from evaluators.usage_eval import ModelPricing
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TokenResp:
+    def __init__(self, text: str, input_tokens: int, output_tokens: int):
+        self.text = text
+        self.input_tokens = input_tokens
+        self.output_tokens = output_tokens
+
+
+class FixedUsageClient:
+    def __init__(self):
+        self.calls = 0
+
+    def complete(self, prompt: str):
+        self.calls += 1
+        return TokenResp("ok", 100, 50)
+
+
+def test_requests_are_paced_under_rpm():
+    clock = FakeClock()
+    limiter = RateLimiter(
+        {"m": ModelLimits(requests_per_min=60, tokens_per_min=1_000_000)},
+        headroom=1.0,
+        clock=clock,
+        sleep=clock.sleep,
+    )
+    client = RateLimitedClient(FixedUsageClient(), model_id="m", limiter=limiter)
+
+    for _ in range(5):
+        client.complete("hello")
+
+    # one request of burst, then one per second with no oscillation
+    assert clock.now == pytest.approx(4.0)
+    assert all(s == pytest.approx(1.0) for s in clock.sleeps)
+
+
+def test_token_limit_uses_actual_usage():
+    clock = FakeClock()
+    limiter = RateLimiter(
+        {"m": ModelLimits(requests_per_min=1_000, tokens_per_min=600)},
+        headroom=1.0,
+        burst_s=30.0,
+        clock=clock,
+        sleep=clock.sleep,
+    )
+    client = RateLimitedClient(
+        FixedUsageClient(), model_id="m", limiter=limiter, expected_output_tokens=50
+    )
+
+    for _ in range(4):
+        client.complete("x" * 400)  # ~100 prompt tokens, 150 total per call
+
+    # 600 tokens at 10 tokens/s with a 300-token burst -> 30s of pacing
+    assert clock.now == pytest.approx(30.0)
+
+
+def test_budget_is_enforced_before_sending():
+    clock = FakeClock()
+    limiter = RateLimiter({}, clock=clock, sleep=clock.sleep)
+    inner = FixedUsageClient()
+    pricing = ModelPricing(input_token_cost=1e-3, output_token_cost=2e-3)
+    client = RateLimitedClient(
+        inner,
+        model_id="m",
+        limiter=limiter,
+        pricing=pricing,
+        budget=Budget(limit_usd=0.5),
+        expected_output_tokens=50,
+        max_output_tokens=50,
+    )
+
+    client.complete("x" * 400)  # 0.1 + 0.1 = $0.20
+    client.complete("x" * 400)  # $0.40 spent
+    with pytest.raises(BudgetExceededError):
+        client.complete("x" * 400)
+
+    assert inner.calls == 2
+    assert client.budget.spent_usd == pytest.approx(0.4)
+    assert client.budget.reserved_usd == pytest.approx(0.0)
+
+
+def test_budget_reserves_worst_case_when_actual_exceeds_estimate():
+    clock = FakeClock()
+    limiter = RateLimiter({}, clock=clock, sleep=clock.sleep)
+    inner = FixedUsageClient()  # always reports 50 output tokens
+    pricing = ModelPricing(input_token_cost=1e-3, output_token_cost=2e-3)
+    client = RateLimitedClient(
+        inner,
+        model_id="m",
+        limiter=limiter,
+        pricing=pricing,
+        budget=Budget(limit_usd=0.55),
+        expected_output_tokens=10,  # estimate $0.12 per call, actual $0.20
+        max_output_tokens=50,
+    )
+
+    client.complete("x" * 400)
+    client.complete("x" * 400)
+    # an estimate-based reservation would let this through and end at $0.60
+    with pytest.raises(BudgetExceededError):
+        client.complete("x" * 400)
+
+    assert inner.calls == 2
+    assert client.budget.spent_usd == pytest.approx(0.4)
+    assert client.budget.spent_usd <= client.budget.limit_usd
+
+    with pytest.raises(ValueError):
+        RateLimitedClient(inner, model_id="m", limiter=limiter, pricing=pricing, budget=Budget(limit_usd=1.0))
@@ -0,0 +1,195 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from evaluators.bias_eval import load_bias_cases, evaluate_bias_case
+from evaluators.fact_eval import build_prompt
+from evaluators.judge_eval import load_judge_cases, evaluate_judge_suite
+from evaluators.runner import MicroBatcher, PromptRunner, RunStats
+
+
+class DummyResponse:
+    def __init__(self, text: str):
+        self._text = text
+
+    @property
+    def text(self) -> str:
+        return self._text
+
+
+class SlowEchoClient:
+    """Sync client that records how many calls overlap."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.peak = 0
+
+    def complete(self, prompt: str):
+        with self.lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        time.sleep(0.01)
+        with self.lock:
+            self.in_flight -= 1
+        return DummyResponse(prompt.upper())
+
+
+class AsyncEchoClient:
+    def __init__(self):
+        self.sync_calls = 0
+
+    def complete(self, prompt: str):
+        self.sync_calls += 1
+        return DummyResponse(prompt)
+
+    async def acomplete(self, prompt: str):
+        # later prompts finish first to exercise ordering
+        await asyncio.sleep(0.001 * (10 - int(prompt)))
+        return DummyResponse(prompt)
+
+
+def test_runner_bounds_concurrency_and_keeps_order():
+    client = SlowEchoClient()
+    prompts = [f"p{i}" for i in range(20)]
+
+    responses = PromptRunner(concurrency=4).run(client, prompts)
+
+    assert [r.text for r in responses] == [p.upper() for p in prompts]
+    assert 1 < client.peak <= 4
+
+
+def test_runner_prefers_acomplete():
+    client = AsyncEchoClient()
+    prompts = [str(i) for i in range(10)]
+
+    responses = PromptRunner(concurrency=3).run(client, prompts)
+
+    assert [r.text for r in responses] == prompts
+    assert client.sync_calls == 0
+
+
+def test_judge_suite_concurrent_matches_sequential():
+    class ScoreByLength:
+        def complete(self, prompt: str):
+            return DummyResponse(f"SCORE: {len(prompt) % 10}\nEXPLANATION: len")
+
+    dataset = Path(__file__).parents[1] / "data" / "judge_minimal.jsonl"
+    cases = load_judge_cases(dataset) * 5
+
+    serial = evaluate_judge_suite(ScoreByLength(), cases)
+    parallel = evaluate_judge_suite(ScoreByLength(), cases, runner=PromptRunner(concurrency=8))
+
+    assert parallel == serial
+
+
+class BatchEchoClient:
+    def __init__(self):
+        self.batch_sizes = []
+
+    def complete(self, prompt: str):
+        raise AssertionError("complete_batch should be used")
+
+    def complete_batch(self, prompts):
+        self.batch_sizes.append(len(prompts))
+        return [DummyResponse(p) for p in prompts]
+
+
+def test_runner_micro_batches_and_reports_metrics():
+    prompts = [f"p{i}" for i in range(10)]
+
+    for concurrency in (1, 3):
+        client = BatchEchoClient()
+        runner = PromptRunner(concurrency=concurrency, batch_size=4)
+        responses = runner.run(client, prompts)
+
+        assert [r.text for r in responses] == prompts
+        assert sorted(client.batch_sizes) == [2, 4, 4]
+        assert runner.stats.batches == 3
+        assert runner.stats.max_batch_size == 4
+        assert runner.stats.mean_batch_latency_ms >= 0.0
+
+
+def test_micro_batches_use_acomplete():
+    client = AsyncEchoClient()
+    prompts = [str(i) for i in range(10)]
+
+    runner = PromptRunner(concurrency=2, batch_size=4)
+    responses = runner.run(client, prompts)
+
+    assert [r.text for r in responses] == prompts
+    assert client.sync_calls == 0
+    assert runner.stats.batches == 3
+
+
+def test_batch_window_flushes_staggered_prompts():
+    async def staggered():
+        client = BatchEchoClient()
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            batcher = MicroBatcher(client, pool, max_size=8, window_ms=30, concurrency=1, stats=RunStats())
+            futures = [batcher.submit("a"), batcher.submit("b")]
+            await asyncio.sleep(0.01)
+            futures.append(batcher.submit("c"))  # still inside the first window
+            await asyncio.sleep(0.1)  # window expires: a, b, c go out together
+            futures.append(batcher.submit("d"))
+            first = await asyncio.gather(*futures[:3])
+            assert client.batch_sizes == [3]
+            await batcher.aclose()
+            last = await futures[3]
+        return client.batch_sizes, [r.text for r in first] + [last.text]
+
+    sizes, texts = asyncio.run(staggered())
+    assert sizes == [3, 1]
+    assert texts == ["a", "b", "c", "d"]
+
+
+def test_bias_case_falls_back_to_sequential_complete():
+    class Constant:
+        def complete(self, prompt: str):
+            return DummyResponse("6")
+
+    dataset = Path(__file__).parents[1] / "data" / "bias_minimal.jsonl"
+    case = load_bias_cases(dataset)[0]
+    result = evaluate_bias_case(Constant(), case)
+
+    assert [s.label for s in result.variant_scores] == list(case.variants)
+    assert result.max_delta == 0.0
+
+
+class PrefixCacheStandIn:
+    """Mimics a vLLM-style prefix cache holding only the previous prompt's blocks."""
+    BLOCK = 16
+
+    def __init__(self):
+        self.previous = ""
+        self.cached_blocks = 0
+        self.total_blocks = 0
+
+    def complete(self, prompt: str):
+        blocks = len(prompt) // self.BLOCK
+        shared = 0
+        while shared < blocks and prompt[: (shared + 1) * self.BLOCK] == self.previous[: (shared + 1) * self.BLOCK]:
+            shared += 1
+        self.cached_blocks += shared
+        self.total_blocks += blocks
+        self.previous = prompt
+        return DummyResponse(prompt[-2:])
+
+
+def test_prefix_ordering_improves_reuse_and_keeps_order():
+    passages = [f"Passage {i}: " + "lorem ipsum " * 40 for i in range(5)]
+    # dataset order interleaves passages, as cross-case flattening can
+    prompts = [build_prompt(p, f"Question {q:02d}?") for q in range(4) for p in passages]
+
+    plain, ordered = PrefixCacheStandIn(), PrefixCacheStandIn()
+    plain_runner = PromptRunner()
+    ordered_runner = PromptRunner(order_by_prefix=True)
+
+    plain_out = plain_runner.run(plain, prompts)
+    ordered_out = ordered_runner.run(ordered, prompts)
+
+    assert [r.text for r in ordered_out] == [r.text for r in plain_out]
+    assert ordered.cached_blocks > 2 * plain.cached_blocks
+    assert ordered_runner.stats.prefix_reuse_ratio > 0.5
+    assert ordered_runner.stats.prefix_reuse_ratio > plain_runner.stats.prefix_reuse_ratio
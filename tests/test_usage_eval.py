@@ -1,5 +1,9 @@
+import threading
 from pathlib import Path
+
+from conftest import usage
 from evaluators.usage_eval import (
+    AuditLogWriter,
     ModelPricing,
     build_usage_record,
     append_audit_log,
@@ -57,3 +61,82 @@ def test_usage_record_and_audit_log(tmp_path: Path):
     assert r.latency_ms == 120
     assert abs(r.cost_usd - (1000 * 1e-6 + 500 * 2e-6)) < 1e-9
     assert r.meta["route"] == "/transcribe"
+
+
+def test_audit_log_writer_batches_and_notifies_listeners(tmp_path: Path):
+    log_file = tmp_path / "audit.jsonl"
+    seen = []
+
+    def on_flush(batch, offsets):
+        seen.extend(zip((r.trace_id for r in batch), offsets))
+
+    with AuditLogWriter(log_file, batch_size=64, listeners=[on_flush]) as writer:
+        threads = [
+            threading.Thread(target=lambda k=k: [writer.write(usage(k * 100 + i)) for i in range(100)])
+            for k in range(4)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        writer.flush()
+        assert writer.flushes < 400
+
+    records = read_audit_log(log_file)
+    assert sorted(r.trace_id for r in records) == sorted(f"t{i}" for i in range(400))
+
+    data = log_file.read_bytes()
+    for trace_id, offset in seen:
+        assert data[offset:].startswith(b'{"trace_id": "%s"' % trace_id.encode())
+
+
+def test_audit_log_writer_drops_when_full_without_blocking(tmp_path: Path):
+    gate = threading.Event()
+    writer = AuditLogWriter(
+        tmp_path / "audit.jsonl", batch_size=1, max_queue=2, block=False,
+        listeners=[lambda batch, offsets: gate.wait()],
+    )
+    for i in range(10):
+        writer.write(usage(i))
+    assert writer.dropped >= 7
+    gate.set()
+    writer.close()
+    assert len(read_audit_log(tmp_path / "audit.jsonl")) == 10 - writer.dropped
+
+
+def test_audit_log_writer_close_race_and_drain_fsync(tmp_path: Path, monkeypatch):
+    import pytest
+
+    import evaluators.usage_eval as usage_eval
+
+    synced = []
+    monkeypatch.setattr(usage_eval.os, "fsync", lambda fd: synced.append(fd))
+
+    writer = AuditLogWriter(tmp_path / "audit.jsonl", fsync_interval_s=3600)
+    for burst in range(2):
+        writer.write(usage(burst))
+        writer.flush()
+        assert len(synced) == burst + 1  # the drained queue is fsynced despite the long interval
+
+    writer.close()
+    with pytest.raises(RuntimeError):
+        writer.write(usage(9))
+    writer.flush()  # returns even though the worker is gone
+    assert len(read_audit_log(tmp_path / "audit.jsonl")) == 2
+
+
+def test_unclosed_audit_log_writer_drains_at_exit(tmp_path: Path):
+    import os
+    import subprocess
+    import sys
+
+    log_file = tmp_path / "audit.jsonl"
+    script = (
+        "from evaluators.usage_eval import AuditLogWriter, LLMUsageRecord\n"
+        f"writer = AuditLogWriter({str(log_file)!r}, flush_interval_s=60, batch_size=1000)\n"
+        "for i in range(5):\n"
+        "    writer.write(LLMUsageRecord(f't{i}', 'gpt-a', 1, 1, 1, 0.0, i, {}))\n"
+    )
+    src = str(Path(__file__).parents[1] / "src")
+    subprocess.run([sys.executable, "-c", script], check=True, env={**os.environ, "PYTHONPATH": src}, timeout=30)
+    assert [r.trace_id for r in read_audit_log(log_file)] == [f"t{i}" for i in range(5)]
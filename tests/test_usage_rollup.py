@@ -0,0 +1,77 @@
+from functools import partial
+from pathlib import Path
+
+import pytest
+
+from conftest import usage
+from evaluators.usage_eval import AuditLogWriter, append_audit_log
+from evaluators.usage_rollup import UsageRollup
+
+HOUR_MS = 3_600_000
+
+
+# four records per hour; the route pattern is offset from the model pattern
+_usage = partial(
+    usage,
+    cost_usd=0.25,
+    timestamp_ms=lambda i: i * HOUR_MS // 4,
+    meta=lambda i: {"route": "/chat" if i % 3 else "/transcribe", "tags": ["x"]},
+)
+
+
+def test_rollups_by_model_route_and_day(tmp_path: Path):
+    log = tmp_path / "audit.jsonl"
+    for i in range(96):  # one day
+        append_audit_log(_usage(i), log)
+
+    rollup = UsageRollup(log)
+    assert rollup.update() == 96
+
+    hourly = rollup.query(model="gpt-a")
+    assert len(hourly) == 24
+    assert all(r.requests == 2 and r.cost_usd == pytest.approx(0.5) for r in hourly)
+
+    daily = rollup.query(dimension="route", bucket_s=86400)
+    by_key = {(r.model, r.value): r for r in daily}
+    assert sum(r.requests for r in daily) == 96
+    assert by_key[("gpt-b", "/transcribe")].requests == 16
+    assert by_key[("gpt-a", "/chat")].cost_usd == pytest.approx(32 * 0.25)
+    assert rollup.query(dimension="tags") == []  # non-scalar meta is not rolled up
+
+    with pytest.raises(ValueError):
+        rollup.query(bucket_s=90 * 60)
+    rollup.close()
+
+
+def test_listener_updates_match_rebuild(tmp_path: Path):
+    log = tmp_path / "audit.jsonl"
+    rollup = UsageRollup(log, dimensions=["route"])
+    with AuditLogWriter(log, batch_size=5, listeners=[rollup.on_flush]) as writer:
+        for i in range(50):
+            writer.write(_usage(i))
+
+    assert rollup.update() == 0
+    live = rollup.query(dimension="route", bucket_s=86400)
+    assert rollup.rebuild() == 50
+    assert rollup.query(dimension="route", bucket_s=86400) == live
+    rollup.close()
+
+    with pytest.raises(ValueError):
+        UsageRollup(log, bucket_s=60)
+
+
+def test_empty_meta_key_and_trailing_blank_lines(tmp_path: Path):
+    log = tmp_path / "audit.jsonl"
+    for i in range(4):
+        append_audit_log(_usage(i, meta={"": ""}), log)
+    with log.open("ab") as f:
+        f.write(b"\n\n")
+
+    rollup = UsageRollup(log)
+    assert rollup.update() == 4
+    assert rollup._meta("consumed_bytes") == log.stat().st_size
+    assert sum(r.requests for r in rollup.query()) == 4  # totals are not doubled
+    assert [r.dimension for r in rollup.query()] == [None, None]
+    assert sum(r.requests for r in rollup.query(dimension="")) == 4
+    assert rollup.update() == 0
+    rollup.close()
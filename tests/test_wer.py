@@ -6,3 +6,157 @@ def test_stt_eval():
     assert "avg_cer" in results
     assert isinstance(results["wer_scores"], list)
     assert isinstance(results["cer_scores"], list)
+
+
+def test_alignment_matches_jiwer():
+    import random
+
+    import jiwer
+
+    from evaluators.wer import char_error_rate, score_pairs
+
+    rng = random.Random(7)
+    vocab = ["a", "b", "c", "dd", "eee"]
+
+    def sentence():
+        return "  ".join(rng.choice(vocab) for _ in range(rng.randint(0, 8))).strip()
+
+    refs = [sentence() for _ in range(300)]
+    preds = [sentence() for _ in range(300)]
+    wer_scores, cer_scores, totals = score_pairs(refs, preds)
+
+    assert wer_scores == [jiwer.wer(r, p) for r, p in zip(refs, preds)]
+    assert (totals.cer, cer_scores) == char_error_rate(refs, preds)
+
+    nonempty = [(r, p) for r, p in zip(refs, preds) if r]
+    corpus = jiwer.process_words([r for r, _ in nonempty], [p for _, p in nonempty])
+    _, _, sub = score_pairs(*zip(*nonempty))
+    assert (sub.hits, sub.substitutions, sub.deletions, sub.insertions) == (
+        corpus.hits, corpus.substitutions, corpus.deletions, corpus.insertions
+    )
+    assert sub.wer == corpus.wer
+
+
+def test_parallel_scoring_is_bit_identical():
+    import random
+
+    from evaluators.wer import score_pairs, score_pairs_parallel
+
+    rng = random.Random(3)
+    vocab = ["x", "y", "zz", "w"]
+    refs = [" ".join(rng.choice(vocab) for _ in range(rng.randint(0, 9))) for _ in range(1000)]
+    preds = [" ".join(rng.choice(vocab) for _ in range(rng.randint(0, 9))) for _ in range(1000)]
+
+    serial = score_pairs(refs, preds)
+    parallel = score_pairs_parallel(refs, preds, processes=2, chunk_size=137)
+    assert parallel == serial
+    assert sum(parallel[0]) == sum(serial[0])
+
+
+def test_stream_matches_batch_and_pairs_by_key(tmp_path):
+    import json
+
+    from evaluators.wer import evaluate_stt, stream_stt
+
+    refs = ["the cat sat", "on the mat", "hello world", "good night"]
+    preds = ["the cat sat down", "on mat", "hello word", "good night"]
+    (tmp_path / "ref.txt").write_text("\n".join(refs) + "\n", encoding="utf-8")
+    (tmp_path / "pred.txt").write_text("\n".join(preds + ["extra line"]) + "\n", encoding="utf-8")
+
+    batch = evaluate_stt(str(tmp_path / "pred.txt"), str(tmp_path / "ref.txt"))
+    streamed = stream_stt(str(tmp_path / "pred.txt"), str(tmp_path / "ref.txt"), scores_out=str(tmp_path / "s.jsonl"))
+    for name in ("avg_wer", "avg_cer", "corpus_wer", "num_pairs", "substitutions", "deletions", "insertions"):
+        assert streamed[name] == batch[name]
+    assert (streamed["unpaired_refs"], streamed["unpaired_preds"]) == (0, 1)
+    rows = [json.loads(line) for line in (tmp_path / "s.jsonl").read_text().splitlines()]
+    assert [r["wer"] for r in rows] == batch["wer_scores"]
+
+    with (tmp_path / "ref.jsonl").open("w") as f:
+        for i, text in enumerate(refs):
+            f.write(json.dumps({"id": i, "text": text}) + "\n")
+    with (tmp_path / "pred.jsonl").open("w") as f:
+        for i in (3, 1, 0, 2, 9):
+            f.write(json.dumps({"id": i, "text": (preds + [""] * 6)[i]}) + "\n")
+
+    keyed = stream_stt(str(tmp_path / "pred.jsonl"), str(tmp_path / "ref.jsonl"), key="id")
+    assert keyed["corpus_wer"] == batch["corpus_wer"]
+    assert keyed["avg_cer"] == batch["avg_cer"]
+    assert (keyed["unpaired_refs"], keyed["unpaired_preds"]) == (0, 1)
+
+
+def test_cer_gate_exact_below_cutoff():
+    import random
+
+    import Levenshtein
+
+    from evaluators.wer import bounded_char_distance, cer_gate
+
+    assert bounded_char_distance("abcdef", "abcxef", 1) == 1
+    assert bounded_char_distance("abcdef", "xyz", 2) is None
+    assert bounded_char_distance("abcdef", "fedcba", 3) is None
+
+    rng = random.Random(5)
+    refs = ["".join(rng.choice("ab c") for _ in range(rng.randint(0, 40))) for _ in range(300)]
+    preds = ["".join(rng.choice("ab c") for _ in range(rng.randint(0, 40))) for _ in range(300)]
+    gate = cer_gate(refs, preds, 0.29)
+    for r, p, cer in zip(refs, preds, gate.cer_scores):
+        full = Levenshtein.distance(r, p) / len(r) if r else 0.0
+        assert cer == (full if full <= 0.29 else None)
+    assert gate.passed + gate.failed == 300
+
+
+def test_normalizer_is_shared_by_wer_and_cer():
+    from evaluators.wer import (
+        NormalizationConfig,
+        TextNormalizer,
+        align_pair,
+        score_pairs,
+        score_pairs_parallel,
+    )
+
+    config = NormalizationConfig(
+        lowercase=True, expand_contractions=True, numbers_to_words=True, remove_punctuation=True
+    )
+    norm = TextNormalizer(config)
+    assert norm.normalize("We CAN'T ship 2 builds, OK?") == "we can not ship two builds ok"
+    assert norm.words("It’s 3.5 km.") == ("it", "is", "three", "point", "five", "km")
+    assert norm.normalize("1,234 vs 1,2345") == "one thousand two hundred thirty four vs one two thousand three hundred forty five"
+
+    score = align_pair("Hello, World!", "hello world", norm)
+    assert (score.wer, score.cer) == (0.0, 0.0)
+    assert norm.normalize.cache_info().hits >= 2  # words() reused the normalized text
+
+    refs = ["Dr. Smith won't be in", "Call 911 now!"] * 50
+    preds = ["dr smith will not be in", "call nine one one now"] * 50
+    serial = score_pairs(refs, preds, norm)
+    assert serial == score_pairs_parallel(refs, preds, processes=2, chunk_size=7, normalizer=norm)
+    assert (serial[2].substitutions, serial[2].insertions) == (100, 0)  # "nine hundred eleven" vs "nine one one"
+    assert config.to_dict()["lowercase"] is True
+
+
+def _run_wer_cli(tmp_path, *args):
+    import os
+    import subprocess
+    import sys
+    from pathlib import Path
+
+    src = str(Path(__file__).parents[1] / "src")
+    return subprocess.run(
+        [sys.executable, "-m", "evaluators.wer", *args, "--no-write-json"],
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONPATH": src},
+        cwd=tmp_path,
+    )
+
+
+def test_replace_requires_old_equals_new(tmp_path):
+    proc = _run_wer_cli(tmp_path, "--replace", "foo")
+    assert proc.returncode == 2
+    assert "expected OLD=NEW" in proc.stderr
+
+
+def test_max_cer_rejects_unsupported_modes(tmp_path):
+    proc = _run_wer_cli(tmp_path, "--max-cer", "0.1", "--stream", "--processes", "4")
+    assert proc.returncode == 2
+    assert "--max-cer cannot be combined with --stream, --processes" in proc.stderr
@@ -0,0 +1,79 @@
+from evaluators.wer import NormalizationConfig, TextNormalizer, score_pairs
+from evaluators.wer_store import ScoreStore
+
+REFS = ["the cat sat", "on the mat", "", "hello world", "hello world", "good night moon"]
+PREDS = ["the cat sat down", "on mat", "noise", "hello word", "hello word", "good night"]
+
+
+def test_rescoring_only_aligns_changed_pairs(tmp_path):
+    path = tmp_path / "scores.sqlite"
+    with ScoreStore(path) as store:
+        assert store.score(REFS, PREDS) == score_pairs(REFS, PREDS)
+        assert store.last_scored == 5  # the duplicate pair is aligned once
+        assert store.score(REFS, PREDS) == score_pairs(REFS, PREDS)
+        assert store.last_scored == 0
+
+    changed = list(PREDS)
+    changed[1] = "on the mat"
+    with ScoreStore(path) as store:
+        assert store.score(REFS, changed) == score_pairs(REFS, changed)
+        assert store.last_scored == 1
+        assert len(store) == 6
+
+
+def test_normalization_config_is_part_of_the_key(tmp_path):
+    lower = TextNormalizer(NormalizationConfig(lowercase=True))
+    with ScoreStore(tmp_path / "scores.sqlite") as store:
+        store.score(REFS, PREDS)
+        assert store.score(REFS, PREDS, lower) == score_pairs(REFS, PREDS, lower)
+        assert store.last_scored == 5
+
+        upper = [p.upper() for p in PREDS]
+        assert store.score(REFS, upper, lower) == score_pairs(REFS, upper, lower)
+        assert store.last_scored == 0  # same normalized text, nothing to re-align
+
+
+def test_evaluate_stt_with_store(tmp_path):
+    from evaluators.wer import evaluate_stt
+
+    (tmp_path / "ref.txt").write_text("\n".join(r or "-" for r in REFS) + "\n", encoding="utf-8")
+    (tmp_path / "pred.txt").write_text("\n".join(PREDS) + "\n", encoding="utf-8")
+    plain = evaluate_stt(str(tmp_path / "pred.txt"), str(tmp_path / "ref.txt"))
+    with ScoreStore(tmp_path / "scores.sqlite") as store:
+        stored = evaluate_stt(str(tmp_path / "pred.txt"), str(tmp_path / "ref.txt"), store=store)
+    assert stored == plain
+
+
+def test_prune_keeps_only_current_runs(tmp_path):
+    lower = TextNormalizer(NormalizationConfig(lowercase=True))
+    with ScoreStore(tmp_path / "scores.sqlite") as store:
+        store.score(REFS, PREDS)
+        store.score(REFS[:2], PREDS[:2], lower)
+        store.score(["old ref"], ["old pred"])
+        assert len(store) == 8
+
+        assert store.prune([(REFS, PREDS, None)]) == 3
+        assert len(store) == 5
+        assert store.score(REFS, PREDS) == score_pairs(REFS, PREDS)
+        assert store.last_scored == 0
+        store.score(REFS[:2], PREDS[:2], lower)
+        assert store.last_scored == 2
+
+
+def test_dataset_snapshot_rescoring(tmp_path):
+    with ScoreStore(tmp_path / "scores.sqlite") as store:
+        assert store.score(REFS, PREDS, dataset="dev") == score_pairs(REFS, PREDS)
+        assert store.last_scored == 6  # a first run aligns straight into the snapshot
+        assert len(store) == 0
+
+        changed, refs = PREDS[:1] + ["on the mat"] + PREDS[2:] + ["extra"], REFS + ["extra"]
+        assert store.score(refs, changed, dataset="dev") == score_pairs(refs, changed)
+        assert store.last_scored == 2  # the edited pair and the appended one
+        assert store.score(refs, changed, dataset="dev") == score_pairs(refs, changed)
+        assert store.last_scored == 0
+        assert store.score(refs[:3], PREDS[:3], dataset="dev") == score_pairs(refs[:3], PREDS[:3])
+        assert store.last_scored == 1
+
+        assert store.prune([(refs, changed, None)]) == 1
+        assert store.score(refs, changed, dataset="dev") == score_pairs(refs, changed)
+        assert store.last_scored == 2  # the first, unkeyed run never stored these